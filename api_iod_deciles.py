@@ -0,0 +1,117 @@
+"""HTTP API serving the IoD deciles and the app's Vega-Lite chart specs as JSON, from the data in
+data/ (utils/utils_api.py). Responses are cached in memory, carry an ETag (If-None-Match gets a 304)
+and are gzip (or brotli, if installed) compressed.
+
+Run from the repository root with: python api_iod_deciles.py [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import altair as alt
+
+from utils.utils_api import (
+    ApiError,
+    choose_encoding,
+    etag_matches,
+    get_compressed_body,
+    get_response,
+    parse_query,
+)
+from utils.utils_fonts_colours import nestafont
+
+logger = logging.getLogger("geographical_iod_analysis.api")
+
+
+class IodRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; every response sets Content-Length.
+    protocol_version = "HTTP/1.1"
+    # The headers and body are sent separately; without TCP_NODELAY the body waits ~40 ms
+    # for the client's delayed ACK of the headers.
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        query = parse_query(url.query)
+        try:
+            response = get_response(path, query)
+        except ApiError as error:
+            self.send_body(error.status, json.dumps({"error": str(error)}).encode("utf-8"))
+            return
+        except Exception:
+            logger.exception("Failed to answer %s", self.path)
+            self.send_body(500, b'{"error": "Internal server error"}')
+            return
+
+        headers = {
+            "ETag": response.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(self.headers.get("If-None-Match", ""), response.etag):
+            self.send_body(304, b"", headers)
+            return
+        encoding = choose_encoding(self.headers.get("Accept-Encoding", ""), response.body)
+        body = response.body
+        if encoding is not None:
+            body = get_compressed_body(path, query, encoding)
+            headers["Content-Encoding"] = encoding
+        self.send_body(200, body, headers, response.content_type)
+
+    def send_body(
+        self,
+        status: int,
+        body: bytes,
+        headers: dict = None,
+        content_type: str = "application/json",
+    ) -> None:
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+def make_server(host: str, port: int) -> ThreadingHTTPServer:
+    """Creating the API server, with the app's chart theme enabled.
+
+    Args:
+        host (str): Address to listen on.
+        port (int): Port to listen on (0 picks a free one).
+
+    Returns:
+        ThreadingHTTPServer: The server, which handles each connection in a thread.
+    """
+    alt.themes.register("nestafont", nestafont)
+    alt.themes.enable("nestafont")
+    server = ThreadingHTTPServer((host, port), IodRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    server = make_server(args.host, args.port)
+    print(f"Serving the IoD API on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
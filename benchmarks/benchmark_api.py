@@ -0,0 +1,144 @@
+"""Load testing the IoD API (api_iod_deciles.py): requests per second and latency of a mix of data
+and chart endpoints, from several client threads over keep-alive connections. Each endpoint is run
+plain, gzipped and with If-None-Match (answered with a 304).
+
+Starts the server in-process unless --url is given.
+Run from the repository root with: python -m benchmarks.benchmark_api [--threads 8] [--seconds 5]
+[--url http://127.0.0.1:8000] [--output results.json]
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ENDPOINTS = [
+    "/",
+    "/las?region=London",
+    "/lsoas?lad19cd=E06000001",
+    "/lsoas?dataset=welsh&lad19cd=W06000015",
+    "/chart?type=la_overview",
+    "/chart?type=la_region&region=London&region_name=London",
+    "/chart?type=la_comparison&lad19cd=E06000001&lad19cd=E06000002",
+    "/chart?type=lsoa&lad19cd=E06000001",
+]
+MODES: Dict[str, Dict[str, str]] = {
+    "plain": {},
+    "gzip": {"Accept-Encoding": "gzip"},
+    "etag": {"Accept-Encoding": "gzip"},  # If-None-Match is added once the ETag is known.
+}
+
+
+def run_client(
+    host: str, port: int, requests: List[tuple], deadline: float, latencies: List[float], errors: List[str]
+) -> None:
+    """Sending requests round-robin over one keep-alive connection until the deadline."""
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    i = 0
+    while time.perf_counter() < deadline:
+        path, headers = requests[i % len(requests)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status not in (200, 304):
+                errors.append(f"{path}: {response.status}")
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(f"{path}: {error}")
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def load_test(host: str, port: int, mode: str, threads: int, seconds: float) -> dict:
+    """Running every endpoint in one mode from `threads` clients for `seconds`."""
+    requests = []
+    warmup = http.client.HTTPConnection(host, port, timeout=600)
+    first_seconds = []
+    for path in ENDPOINTS:
+        headers = dict(MODES[mode])
+        start = time.perf_counter()
+        warmup.request("GET", path, headers=headers)
+        response = warmup.getresponse()
+        response.read()
+        first_seconds.append(time.perf_counter() - start)
+        if mode == "etag":
+            headers["If-None-Match"] = response.getheader("ETag")
+        requests.append((path, headers))
+    warmup.close()
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    deadline = time.perf_counter() + seconds
+    workers = [
+        threading.Thread(
+            target=run_client, args=(host, port, requests, deadline, latencies, errors)
+        )
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "threads": threads,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies else None,
+        "p99_ms": float(np.percentile(latencies, 99) * 1000) if latencies else None,
+        "first_request_seconds": first_seconds if mode == "plain" else None,
+        "errors": errors[:10],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Test an already running server instead of starting one.")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        from api_iod_deciles import make_server
+
+        server = make_server("127.0.0.1", 0)
+        host, port = "127.0.0.1", server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = []
+    try:
+        for mode in args.modes:
+            result = load_test(host, port, mode, args.threads, args.seconds)
+            results.append(result)
+            print(
+                f"{mode:<6} {result['requests_per_second']:9.0f} requests/s, "
+                f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+                f"{len(result['errors'])} errors"
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""Benchmarking every page of the app headlessly, over a matrix of region/LA/index selections.
+
+Each page is run in its own process with Streamlit's AppTest (the navigation menu is replaced by the
+page name and the password is filled in), so the first selection of a page is a cold start and the
+rest reuse the process' caches, as they would in a worker. For each selection it records the wall time
+of the final rerun, the peak RSS of the process so far, the serialized size of the charts sent to the
+browser and the time spent in each getter. With --profile it also dumps a cProfile (or pyinstrument,
+if it is installed and asked for) profile of every selection. With --trace-memory it also records the
+peak Python memory allocated during the final rerun of each selection (tracemalloc), e.g. to check a
+rerun slices the cached tables rather than copying them.
+
+Run from the repository root with: python -m benchmarks.benchmark_app [--pages "English LA Breakdown"]
+[--regions 2] [--indices 2] [--output results.json] [--profile profiles/] [--profiler cprofile]
+[--trace-memory]
+"""
+import argparse
+import cProfile
+import functools
+import json
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+APP_FILE = REPO_DIR / "streamlit_app_iod_deciles.py"
+# Only used inside the benchmark, to get past the password box.
+PASSWORD = "benchmark"
+PAGES = [
+    "About",
+    "English LA Breakdown",
+    "English LA Comparison",
+    "English LSOA Breakdown",
+    "Welsh LSOA Breakdown",
+    "Comparing Welsh and English IoD",
+]
+ENGLISH_REGIONS = [
+    "North East",
+    "North West",
+    "Yorkshire and The Humber",
+    "East Midlands",
+    "West Midlands",
+    "South West",
+    "East",
+    "South East",
+    "London",
+]
+# Labels of the widgets the scenarios set.
+PALETTE = "Choose a colour palette for the maps:"
+INDEX = "Choose IoD Decile to view on the map:"
+LA_REGION = "To look in closer detail, choose a region of England:"
+LA_INDEX = "Choose a IoD Decile to view on the map:"
+LAS = "Choose up to five LAs:"
+REGION = "Choose a region of England:"
+LA = "Choose a local authority from the region chosen above to see the LSOA breakdown:"
+WELSH_REGION = "Choose a region of Wales:"
+COMPARISON_LA = "Choose a local authority from the region chosen above to compare the LSOA breakdown:"
+COMPARISON_WELSH_LA = "Choose a local authority from Wales to compare the LSOA breakdown:"
+
+
+class Scenario(NamedTuple):
+    page: str
+    name: str
+    # Widget values to set, by label; the app reruns after each step, as options can
+    # depend on the step before (e.g. the LAs of the region chosen).
+    steps: Tuple[Dict[str, Any], ...] = ()
+
+
+def page_scenarios(page: str, n_regions: int, n_indices: int) -> List[Scenario]:
+    """Building the selections to benchmark a page over; the first regions, indices and
+    the first LA of each region.
+
+    Args:
+        page (str): Page name, one of PAGES.
+        n_regions (int): Number of regions to go through.
+        n_indices (int): Number of indices to go through.
+
+    Returns:
+        List[Scenario]: Selections for the page, the default one first.
+    """
+    from getters.english_la_iod_data_2019 import get_english_la_iod_2019
+    from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+    from utils.utils_iod_values import iod_combined_names, iod_names, wiod_names
+
+    english = get_english_la_iod_2019(columns=["lad19nm", "region_name"])
+    welsh = get_welsh_lsoa_iod_2019(columns=["lad19nm", "region_name"])
+
+    def first_la(data, region_name: str) -> str:
+        return sorted(data[data.region_name == region_name].lad19nm.astype(str).unique())[0]
+
+    regions = ENGLISH_REGIONS[:n_regions]
+    welsh_regions = sorted(welsh.region_name.astype(str).unique())[:n_regions]
+    scenarios = [Scenario(page, "default")]
+    for region in regions:
+        for index in iod_names[:n_indices]:
+            if page == "English LA Breakdown":
+                steps = ({LA_REGION: region, LA_INDEX: index},)
+            elif page == "English LA Comparison":
+                las = sorted(english[english.region_name == region].lad19nm.astype(str))[:5]
+                steps = ({LAS: las, INDEX: index},)
+            elif page == "English LSOA Breakdown":
+                steps = ({REGION: region, INDEX: index}, {LA: first_la(english, region)})
+            else:
+                continue
+            scenarios.append(Scenario(page, f"{region} / {index}", steps))
+    for welsh_region in welsh_regions:
+        for index in wiod_names[:n_indices]:
+            if page == "Welsh LSOA Breakdown":
+                steps = (
+                    {WELSH_REGION: welsh_region, INDEX: index},
+                    {LA: first_la(welsh, welsh_region)},
+                )
+                scenarios.append(Scenario(page, f"{welsh_region} / {index}", steps))
+    for region, welsh_region in zip(regions, welsh_regions):
+        for index in iod_combined_names[:n_indices]:
+            if page == "Comparing Welsh and English IoD":
+                steps = (
+                    {REGION: region, INDEX: index},
+                    {
+                        COMPARISON_LA: first_la(english, region),
+                        COMPARISON_WELSH_LA: first_la(welsh, welsh_region),
+                    },
+                )
+                scenarios.append(
+                    Scenario(page, f"{region} + {welsh_region} / {index}", steps)
+                )
+    return scenarios
+
+
+def instrument_getters(timings: Dict[str, float]) -> None:
+    """Timing every get_* function of the getters package, by replacing it with a timed
+    wrapper in every module of this repository that has imported it, and in the module-level
+    dicts that hold it (e.g. REGION_TABLES, or the getter field of STORE_DATASETS' entries).
+
+    Args:
+        timings (Dict[str, float]): Seconds spent in each getter are added to this, keyed
+            by "module.function".
+    """
+    import getters  # noqa: F401 (so the getters modules are in sys.modules)
+
+    def timed(function: Callable, name: str) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+        return wrapper
+
+    wrappers = {}
+    for module_name, module in list(sys.modules.items()):
+        if module_name.startswith("getters."):
+            for attr, value in vars(module).items():
+                if attr.startswith("get_") and getattr(value, "__module__", None) == module_name:
+                    wrappers[id(value)] = timed(value, f"{module_name}.{attr}")
+
+    def wrapped(value: Any) -> Any:
+        """The value with its getters replaced; NamedTuple records are rebuilt."""
+        if id(value) in wrappers:
+            return wrappers[id(value)]
+        if isinstance(value, tuple) and hasattr(value, "_replace"):
+            fields = {
+                field: wrappers[id(item)]
+                for field, item in zip(value._fields, value)
+                if id(item) in wrappers
+            }
+            return value._replace(**fields) if fields else value
+        return value
+
+    for module_name, module in list(sys.modules.items()):
+        if module_name.split(".")[0] in ("getters", "utils", "pipeline"):
+            for attr, value in list(vars(module).items()):
+                if id(value) in wrappers:
+                    setattr(module, attr, wrappers[id(value)])
+                elif isinstance(value, dict):
+                    for key, item in list(value.items()):
+                        value[key] = wrapped(item)
+
+
+def spec_bytes(app_test: Any) -> int:
+    """Serialized size of the charts on the page; the specs plus their datasets."""
+    total = 0
+    for chart in app_test.get("arrow_vega_lite_chart"):
+        total += len(chart.proto.spec) + len(chart.proto.data.data)
+        total += sum(len(dataset.data.data) for dataset in chart.proto.datasets)
+    return total
+
+
+def set_widgets(app_test: Any, values: Dict[str, Any]) -> None:
+    """Setting the widgets with the given labels on the current page."""
+    widgets = list(app_test.selectbox) + list(app_test.multiselect)
+    for label, value in values.items():
+        matches = [widget for widget in widgets if widget.label == label]
+        if not matches:
+            raise ValueError(f"No widget labelled {label!r} on the page")
+        matches[0].set_value(value)
+
+
+def run_scenario(
+    app_test: Any,
+    scenario: Scenario,
+    timings: Dict[str, float],
+    profile_path: Optional[Path] = None,
+    profiler: str = "cprofile",
+    trace_memory: bool = False,
+) -> Dict[str, Any]:
+    """Running one selection of a page and measuring the final rerun.
+
+    Args:
+        app_test (Any): AppTest of the app, already past the password box.
+        scenario (Scenario): Selection to run.
+        timings (Dict[str, float]): Getter timings filled in by instrument_getters.
+        profile_path (Path, optional): Where to dump a profile of the final rerun.
+        profiler (str, optional): "cprofile" or "pyinstrument". Defaults to "cprofile".
+        trace_memory (bool, optional): Record the peak memory allocated during the rerun.
+            Defaults to False.
+
+    Returns:
+        Dict[str, Any]: The measurements.
+    """
+    for step in scenario.steps[:-1]:
+        set_widgets(app_test, step)
+        app_test.run()
+    if scenario.steps:
+        set_widgets(app_test, scenario.steps[-1])
+    timings.clear()
+
+    profile = None
+    if profile_path is not None and profiler == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profile = Profiler()
+        profile.start()
+    elif profile_path is not None:
+        profile = cProfile.Profile()
+        profile.enable()
+    if trace_memory:
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    app_test.run()
+    wall_seconds = time.perf_counter() - start
+    rerun_peak_mb = None
+    if trace_memory:
+        rerun_peak_mb = (tracemalloc.get_traced_memory()[1] - baseline_bytes) / 2**20
+    if profile_path is not None and profiler == "pyinstrument":
+        profile.stop()
+        profile_path.with_suffix(".html").write_text(profile.output_html())
+    elif profile_path is not None:
+        profile.disable()
+        profile.dump_stats(str(profile_path.with_suffix(".prof")))
+
+    return {
+        "page": scenario.page,
+        "scenario": scenario.name,
+        "wall_seconds": wall_seconds,
+        # ru_maxrss is in KB on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        # Peak memory allocated during the rerun, above what was allocated before it.
+        "rerun_peak_mb": rerun_peak_mb,
+        "spec_bytes": spec_bytes(app_test),
+        "getter_seconds": dict(sorted(timings.items())),
+        "exceptions": [exception.value for exception in app_test.exception],
+    }
+
+
+def run_page(
+    page: str,
+    n_regions: int,
+    n_indices: int,
+    profile_dir: Optional[Path] = None,
+    profiler: str = "cprofile",
+    trace_memory: bool = False,
+) -> List[Dict[str, Any]]:
+    """Running every selection of one page in this process.
+
+    Args:
+        page (str): Page name, one of PAGES.
+        n_regions (int): Number of regions to go through.
+        n_indices (int): Number of indices to go through.
+        profile_dir (Path, optional): Folder to dump the profiles into.
+        profiler (str, optional): "cprofile" or "pyinstrument". Defaults to "cprofile".
+        trace_memory (bool, optional): Record the peak memory allocated during each final
+            rerun. Defaults to False.
+
+    Returns:
+        List[Dict[str, Any]]: The measurements of each selection.
+    """
+    import streamlit_option_menu
+    from streamlit.testing.v1 import AppTest
+
+    # The menu is a custom component AppTest can't click, so it just returns the page.
+    streamlit_option_menu.option_menu = lambda *args, **kwargs: page
+    # Imported before instrumenting, so the app's modules use the timed getters.
+    import utils.utils_charts  # noqa: F401
+    import utils.utils_export  # noqa: F401
+    import utils.utils_page_data  # noqa: F401
+
+    timings = {}
+    instrument_getters(timings)
+    if trace_memory:
+        tracemalloc.start()
+
+    app_test = AppTest.from_file(str(APP_FILE), default_timeout=600)
+    app_test.secrets["PASSWORD"] = PASSWORD
+    app_test.run()
+    app_test.sidebar.text_input[0].input(PASSWORD)
+
+    from getters.iod_data_loader import clear_iod_data_cache
+
+    results = []
+    for scenario in page_scenarios(page, n_regions, n_indices):
+        if not results:
+            # page_scenarios reads the LA and Welsh tables; the first selection starts cold.
+            clear_iod_data_cache()
+        profile_path = None
+        if profile_dir is not None:
+            profile_path = profile_dir / re.sub(r"\W+", "_", f"{page}_{scenario.name}")
+        results.append(
+            run_scenario(app_test, scenario, timings, profile_path, profiler, trace_memory)
+        )
+        results[-1]["cold"] = len(results) == 1
+    return results
+
+
+def run_page_process(
+    page: str,
+    n_regions: int,
+    n_indices: int,
+    profile_dir: Optional[Path] = None,
+    profiler: str = "cprofile",
+    trace_memory: bool = False,
+) -> List[Dict[str, Any]]:
+    """Running every selection of one page in a fresh worker process (see run_page), so the
+    page starts cold and its RSS is its own.
+
+    Raises:
+        RuntimeError: If the worker fails.
+
+    Returns:
+        List[Dict[str, Any]]: The measurements of each selection.
+    """
+    command = [
+        sys.executable, "-m", "benchmarks.benchmark_app", "--worker",
+        "--pages", page, "--regions", str(n_regions), "--indices", str(n_indices),
+        "--profiler", profiler,
+    ]
+    if profile_dir is not None:
+        command += ["--profile", str(profile_dir.resolve())]
+    if trace_memory:
+        command.append("--trace-memory")
+    worker = subprocess.run(command, cwd=REPO_DIR, capture_output=True, text=True)
+    if worker.returncode != 0:
+        raise RuntimeError(f"{page} failed:\n{worker.stderr}")
+    return json.loads(worker.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="+", default=PAGES, choices=PAGES)
+    parser.add_argument("--regions", type=int, default=2, help="Regions per page.")
+    parser.add_argument("--indices", type=int, default=2, help="Indices per region.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--profile", help="Dump a profile of every selection into this folder.")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record the peak memory allocated during each rerun (slower).",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    profile_dir = Path(args.profile) if args.profile else None
+    if profile_dir is not None:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.worker:
+        warnings.simplefilter("ignore")
+        print(
+            json.dumps(
+                run_page(
+                    args.pages[0], args.regions, args.indices, profile_dir, args.profiler,
+                    args.trace_memory,
+                )
+            )
+        )
+        return
+
+    results = []
+    for page in args.pages:
+        try:
+            page_results = run_page_process(
+                page, args.regions, args.indices, profile_dir, args.profiler, args.trace_memory
+            )
+        except RuntimeError as error:
+            sys.exit(str(error))
+        for result in page_results:
+            results.append(result)
+            print(
+                f"{result['page']:32} {result['scenario']:60} {result['wall_seconds']:7.3f}s "
+                f"{result['peak_rss_mb']:7.1f}MB {result['spec_bytes']:9d}B"
+                + (f" {result['rerun_peak_mb']:7.2f}MB/rerun" if args.trace_memory else "")
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
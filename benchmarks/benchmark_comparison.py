@@ -0,0 +1,102 @@
+"""Timing the England-Wales comparison analytics (utils/utils_comparison.py) and checking them
+against straightforward references. The all-pairs LA distances are checked against a loop over
+every pair of LAs, and the domain crosstabs against pd.crosstab.
+
+Run from the repository root with: python -m benchmarks.benchmark_comparison [--repeats 10]
+[--output results.json]
+"""
+import argparse
+import json
+import sys
+import time
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from utils.utils_comparison import (
+    DISTANCE_METRICS,
+    get_decile_distributions,
+    get_domain_crosstabs,
+    most_similar_las,
+    pairwise_distances,
+)
+from utils.utils_iod_values import iod_combined_indices
+
+
+def loop_distances(shares: np.ndarray, metric: str) -> np.ndarray:
+    """Distances between every pair of groups, one pair at a time."""
+    values = np.cumsum(shares, axis=2) if metric == "wasserstein" else shares
+    n_groups, n_indices = values.shape[:2]
+    distances = np.zeros((n_groups, n_groups))
+    for i in range(n_groups):
+        for j in range(n_groups):
+            distances[i, j] = np.abs(values[i] - values[j]).sum() / n_indices
+    return distances / 2 if metric == "total_variation" else distances
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    shares = get_decile_distributions("lad19cd").shares
+    results = {"las": len(shares), "metrics": []}
+    for metric in DISTANCE_METRICS:
+        seconds = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            distances = pairwise_distances(shares, metric)
+            seconds.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        expected = loop_distances(shares, metric)
+        loop_seconds = time.perf_counter() - start
+        result = {
+            "metric": metric,
+            "seconds": min(seconds),
+            "loop_seconds": loop_seconds,
+            "max_difference": float(np.abs(distances - expected).max()),
+        }
+        results["metrics"].append(result)
+        print(
+            f"{metric:<16} {len(shares)}x{len(shares)} LA pairs in {result['seconds'] * 1000:7.2f} ms "
+            f"(loop {loop_seconds:6.2f} s), max difference {result['max_difference']:.1e}"
+        )
+
+    data = get_english_wales_lsoa_iod_2019()
+    start = time.perf_counter()
+    crosstabs = get_domain_crosstabs.__wrapped__()
+    results["crosstab_seconds"] = time.perf_counter() - start
+    deciles = range(1, 11)
+    results["crosstabs_match"] = all(
+        np.array_equal(
+            crosstabs[a, b],
+            pd.crosstab(data[index_a], data[index_b])
+            .reindex(index=deciles, columns=deciles, fill_value=0)
+            .to_numpy(),
+        )
+        for (a, index_a), (b, index_b) in product(enumerate(iod_combined_indices), repeat=2)
+    )
+    print(
+        f"every domain crosstab in {results['crosstab_seconds'] * 1000:.2f} ms, "
+        f"match: {results['crosstabs_match']}"
+    )
+
+    start = time.perf_counter()
+    similar = most_similar_las(5, nations="other")
+    results["most_similar_seconds"] = time.perf_counter() - start
+    print(f"most similar LA table ({len(similar)} rows) in {results['most_similar_seconds']:.3f} s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if not results["crosstabs_match"] or any(
+        result["max_difference"] > 1e-5 for result in results["metrics"]
+    ):
+        sys.exit("The comparison analytics differ from the references")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Measuring how long the app's modules take to import in a fresh interpreter (python -X importtime),
+and checking the heavy libraries the app doesn't need at start (matplotlib, geopandas) stay unimported.
+
+Cold imports are paid by every new app worker, so this is meant to be run in CI as a guard; it exits
+with status 1 if a forbidden module is imported or the total goes over --max-ms.
+Run from the repository root with: python -m benchmarks.benchmark_import_time [--repeats 5] [--max-ms 3000] [--output results.json]
+"""
+import argparse
+import ast
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Libraries that must only be imported by the functions that use them.
+FORBIDDEN_MODULES = ["matplotlib", "geopandas"]
+REPO_DIR = Path(__file__).resolve().parents[1]
+APP_FILE = REPO_DIR / "streamlit_app_iod_deciles.py"
+# Packages of this repository.
+REPO_PACKAGES = ("getters", "utils")
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def app_imports(app_file: Path = APP_FILE) -> List[str]:
+    """Modules the app imports at the top level, in order, read from its source (importing the
+    app would run it).
+
+    Args:
+        app_file (Path, optional): The app's script. Defaults to APP_FILE.
+
+    Returns:
+        List[str]: Module names, e.g. "utils.utils_charts".
+    """
+    modules = []
+    for node in ast.parse(app_file.read_text()).body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+# The modules streamlit_app_iod_deciles.py imports from this repository.
+APP_MODULES = [module for module in app_imports() if module.split(".")[0] in REPO_PACKAGES]
+
+
+def import_times(modules: List[str]) -> Tuple[Dict[str, int], int]:
+    """Importing the modules in a fresh interpreter, returning the cumulative import time
+    in microseconds of every module that got imported, and the total for the modules.
+
+    Args:
+        modules (List[str]): Modules to import, in order.
+
+    Returns:
+        Tuple[Dict[str, int], int]: Cumulative microseconds keyed by module name, and the total.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    roots = {module.split(".")[0] for module in modules}
+    times, total = {}, 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        times[module] = cumulative
+        # Top-level imports already include everything they imported, so only they add up
+        # to the total (the interpreter's own start-up imports are left out).
+        if len(indent) == 1 and module.split(".")[0] in roots:
+            total += cumulative
+    return times, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, help="Fail if the app modules take longer than this.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    runs = [import_times(APP_MODULES) for _ in range(args.repeats)]
+    # Best of the runs, as the others only add noise from the machine.
+    total_ms = min(total for _, total in runs) / 1000
+    module_ms = {
+        module: min(times.get(module, 0) for times, _ in runs) / 1000 for module in APP_MODULES
+    }
+    forbidden = sorted(
+        {module.split(".")[0] for times, _ in runs for module in times}
+        & set(FORBIDDEN_MODULES)
+    )
+    results = {
+        "total_ms": total_ms,
+        "module_ms": module_ms,
+        "forbidden_imported": forbidden,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if forbidden:
+        sys.exit(f"Imported at app start: {', '.join(forbidden)}")
+    if args.max_ms is not None and total_ms > args.max_ms:
+        sys.exit(f"App modules took {total_ms:.0f}ms to import, over the {args.max_ms:.0f}ms budget")
+
+
+if __name__ == "__main__":
+    main()
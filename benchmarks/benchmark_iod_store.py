@@ -0,0 +1,112 @@
+"""Checking the long IoD store (utils/utils_iod_store.py) against the four wide tables it is built
+from, and timing it. For each dataset it compares store.pivot() with the wide table, column by
+column, and times the pivot and a one-LA selection against a boolean mask of the wide table. It
+also reports the memory of the store and of the wide tables, and times a cross-nation long() query.
+
+No column should differ: the store keeps each dataset's own area names, LAs and regions, so
+the comparison table keeps Shepway (now Folkestone and Hythe) and its one Welsh LSOA in Powys.
+
+Run from the repository root with: python -m benchmarks.benchmark_iod_store [--repeats 20]
+[--output results.json]
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Callable
+
+import pandas as pd
+
+from utils.utils_iod_store import STORE_DATASETS, get_iod_store
+
+def best_seconds(function: Callable, repeats: int) -> float:
+    """Fastest of several runs of a function."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def mismatched_rows(wide: pd.DataFrame, pivot: pd.DataFrame) -> dict:
+    """Number of rows that differ in each column, missing values comparing equal."""
+    mismatches = {}
+    for column in wide.columns.union(pivot.columns):
+        if column not in wide or column not in pivot:
+            mismatches[column] = len(wide)
+            continue
+        a = wide[column].astype(object).where(wide[column].notna(), None).astype(str)
+        b = pivot[column].astype(object).where(pivot[column].notna(), None).astype(str)
+        n_rows = int((a.to_numpy() != b.to_numpy()).sum())
+        if n_rows:
+            mismatches[column] = n_rows
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = get_iod_store()
+    results = {"build_seconds": time.perf_counter() - start, "datasets": []}
+    wide_bytes = 0
+    for dataset, spec in STORE_DATASETS.items():
+        wide = spec.getter().reset_index(drop=True)
+        wide_bytes += int(wide.memory_usage(deep=True).sum())
+        pivot = store.pivot(dataset)
+        la_code = str(wide.lad19cd.iloc[0])
+        area_codes = wide[wide.lad19cd == la_code][spec.area_column].astype(str)
+        result = {
+            "dataset": dataset,
+            "rows": len(pivot),
+            "mismatches": mismatched_rows(wide, pivot),
+            "pivot_seconds": best_seconds(lambda: store.pivot(dataset), args.repeats),
+            "pivot_la_seconds": best_seconds(
+                lambda: store.pivot(dataset, area_codes=area_codes), args.repeats
+            ),
+            "mask_la_seconds": best_seconds(
+                lambda: wide[wide.lad19cd == la_code], args.repeats
+            ),
+        }
+        results["datasets"].append(result)
+        print(
+            f"{dataset:<13} {result['rows']:>6} rows, pivot {result['pivot_seconds'] * 1000:6.2f} ms, "
+            f"one LA {result['pivot_la_seconds'] * 1000:6.2f} ms "
+            f"(mask {result['mask_la_seconds'] * 1000:6.2f} ms), mismatches {result['mismatches']}"
+        )
+
+    english, welsh = store.pivot("english_lsoa").lsoa11cd[0], store.pivot("welsh_lsoa").lsoa11cd[0]
+    results["cross_nation_seconds"] = best_seconds(
+        lambda: store.long(area_codes=[english, welsh]), args.repeats
+    )
+    results["store_mb"] = (
+        store.areas.memory_usage(deep=True).sum() + store.values.memory_usage(deep=True).sum()
+    ) / 2**20
+    results["wide_mb"] = wide_bytes / 2**20
+    results["values"] = len(store.values)
+    results["decile_bytes_per_value"] = float(
+        store.values.memory_usage(deep=True).sum() / max(len(store.values), 1)
+    )
+    print(
+        f"store {results['store_mb']:.1f} MB ({results['values']} values, "
+        f"{results['decile_bytes_per_value']:.1f} bytes each) vs {results['wide_mb']:.1f} MB wide; "
+        f"built in {results['build_seconds']:.2f} s; every decile of an English and a Welsh LSOA "
+        f"in {results['cross_nation_seconds'] * 1000:.2f} ms"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=float)
+    for result in results["datasets"]:
+        if result["mismatches"]:
+            sys.exit(
+                f"store.pivot({result['dataset']!r}) differs from the wide table in "
+                f"{set(result['mismatches'])}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Checking that preprocess_strings (utils/utils_preprocessing.py) gives the same output as the
+chained str.replace version it replaced, on every region, LA and LSOA name and column header in
+data/ and on a set of awkward strings, and timing both.
+
+Run from the repository root with: python -m benchmarks.benchmark_preprocessing [--repeats 5]
+[--output results.json]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from utils.utils_preprocessing import preprocess_string, preprocess_strings
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+NAME_COLUMNS = ["region_name", "lad19nm", "lsoa11nm", "LSOA name (Eng)", "LSOA name (Welsh)"]
+# Runs of spaces, underscores and punctuation of every length, and other edge cases.
+EDGE_CASES = [
+    "",
+    " ",
+    "__",
+    "Yorkshire and The Humber",
+    "Bristol, City of",
+    "Rhondda Cynon Taf / Rhondda Cynon Taff",
+    "King's Lynn and West Norfolk",
+    "Income (%): rate",
+    "  leading and trailing\t",
+    "a\tb\n c",
+    "Ünïcödé İstanbul straße",
+    "a_-_b",
+    "x/ /y",
+] + ["a" + sep * n + "b" for sep in [" ", "_", "-", " _", "/", "( )"] for n in range(1, 13)]
+
+
+def preprocess_strings_chained(strings: pd.Series) -> pd.Series:
+    """The original, chained implementation, kept as the reference."""
+    return (
+        strings.str.replace(r"[/]", " ", regex=True)
+        .str.replace(r"[:()\%']", "", regex=True)
+        .str.replace("  ", " ", regex=True)
+        .str.strip()
+        .str.lower()
+        .str.replace(r"[^a-zA-Z0-9_]", r"_", regex=True)
+        .str.replace("___", "_", regex=True)
+        .str.replace("__", "_", regex=True)
+    )
+
+
+def get_test_strings() -> Dict[str, pd.Series]:
+    """Every name column and the column headers of the CSVs in data/, and EDGE_CASES."""
+    strings = {"edge_cases": pd.Series(EDGE_CASES + [None, np.nan])}
+    headers = []
+    for path in sorted(DATA_DIR.glob("*.csv")):
+        data = pd.read_csv(path, dtype=str)
+        headers.extend(data.columns)
+        for column in data.columns.intersection(NAME_COLUMNS):
+            strings[f"{path.stem}.{column}"] = data[column]
+    strings["headers"] = pd.Series(headers)
+    return strings
+
+
+def same_value(a, b) -> bool:
+    """Equal strings, or missing values of the same kind (None, NaN or pd.NA)."""
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    return type(a) is type(b) and bool(pd.isna(a)) and bool(pd.isna(b))
+
+
+def count_mismatches(cleaned: pd.Series, expected: pd.Series) -> int:
+    """Number of rows that differ (see same_value)."""
+    return sum(
+        not same_value(a, b)
+        for a, b in zip(cleaned.to_numpy(dtype=object), expected.to_numpy(dtype=object))
+    )
+
+
+def best_seconds(function: Callable, strings: pd.Series, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        preprocess_string.cache_clear()
+        start = time.perf_counter()
+        function(strings)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    for name, strings in get_test_strings().items():
+        expected = preprocess_strings_chained(strings)
+        cleaned = preprocess_strings(strings)
+        mismatches = count_mismatches(cleaned, expected)
+        results.append(
+            {
+                "strings": name,
+                "rows": len(strings),
+                "mismatches": mismatches,
+                "chained_seconds": best_seconds(preprocess_strings_chained, strings, args.repeats),
+                "single_pass_seconds": best_seconds(preprocess_strings, strings, args.repeats),
+            }
+        )
+        result = results[-1]
+        print(
+            f"{name:<45} {len(strings):>7} rows: chained {result['chained_seconds'] * 1000:8.2f} ms, "
+            f"single pass {result['single_pass_seconds'] * 1000:8.2f} ms, {mismatches} mismatches"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if any(result["mismatches"] for result in results):
+        sys.exit("preprocess_strings differs from the chained version")
+
+
+if __name__ == "__main__":
+    main()
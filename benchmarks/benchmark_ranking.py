@@ -0,0 +1,90 @@
+"""Timing incremental decile updates (utils/utils_ranking.py) against re-ranking every LSOA, and
+checking that both give the same deciles and that update() reports exactly the LSOAs that changed.
+
+Run from the repository root with: python -m benchmarks.benchmark_ranking [--edits 10 100 1000]
+[--index a_index_of_multiple_deprivation_imd] [--seed 0] [--output results.json]
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from utils.utils_ranking import DecileRanking, decile_cuts, get_decile_ranking
+
+
+def rerank_deciles(ranks: Dict[str, float]) -> pd.Series:
+    """Deciles from sorting every LSOA on (rank, lsoa11cd), as a what-if run would without
+    the incremental ranking.
+
+    Args:
+        ranks (Dict[str, float]): Rank of each LSOA.
+
+    Returns:
+        pd.Series: Deciles indexed on lsoa11cd.
+    """
+    codes = np.array(list(ranks), dtype=object)
+    order = np.lexsort((codes, np.fromiter(ranks.values(), dtype=np.float64)))
+    deciles = np.searchsorted(decile_cuts(len(codes)), np.arange(len(codes)), side="right") + 1
+    return pd.Series(deciles.astype(np.uint8), index=codes[order])
+
+
+def run_edits(ranking: DecileRanking, n_edits: int, rng: np.random.Generator) -> dict:
+    """Editing n_edits random LSOAs both ways and comparing the results."""
+    before = ranking.deciles()
+    codes = rng.choice(before.index.to_numpy(), size=n_edits, replace=False)
+    new_ranks = dict(zip(codes, rng.uniform(0.5, len(ranking) + 0.5, size=n_edits)))
+
+    start = time.perf_counter()
+    changed = ranking.update(new_ranks)
+    incremental_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = rerank_deciles(ranking.ranks)
+    rerank_seconds = time.perf_counter() - start
+
+    after = ranking.deciles()
+    diff = after.reindex(before.index) != before
+    return {
+        "edits": n_edits,
+        "incremental_seconds": incremental_seconds,
+        "rerank_seconds": rerank_seconds,
+        "changed_deciles": len(changed),
+        "deciles_match": bool(after.reindex(expected.index).eq(expected).all()),
+        "changes_match": set(changed) == set(diff[diff].index)
+        and all(after[code] == decile for code, decile in changed.items()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edits", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--index", default="a_index_of_multiple_deprivation_imd")
+    parser.add_argument("--dataset", choices=["english", "welsh"], default="english")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for n_edits in args.edits:
+        result = run_edits(get_decile_ranking(args.index, args.dataset), n_edits, rng)
+        results.append(result)
+        print(
+            f"{n_edits:>6} edits: incremental {result['incremental_seconds'] * 1000:8.2f} ms, "
+            f"re-rank {result['rerank_seconds'] * 1000:8.2f} ms, "
+            f"{result['changed_deciles']} deciles changed, "
+            f"match: {result['deciles_match'] and result['changes_match']}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if not all(r["deciles_match"] and r["changes_match"] for r in results):
+        sys.exit("Incremental deciles differ from a full re-rank")
+
+
+if __name__ == "__main__":
+    main()
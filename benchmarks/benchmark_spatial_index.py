@@ -0,0 +1,79 @@
+"""Timing bulk geocoding of random points to LSOAs and their deciles (utils/utils_spatial_index.py):
+loading the persisted index, and the throughput of lookup_lsoa_deciles on a million points. A sample
+of the points is checked against testing every LSOA polygon directly.
+
+Needs the index built by pipeline/build_spatial_index.py.
+Run from the repository root with: python -m benchmarks.benchmark_spatial_index [--points 1000000]
+[--check 1000] [--seed 0] [--output results.json]
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import shapely
+
+from utils.utils_spatial_index import get_area_index, lookup_lsoa_deciles
+
+
+def check_sample(x: np.ndarray, y: np.ndarray, codes: np.ndarray) -> int:
+    """Counting the points whose LSOA differs from the one found by testing every polygon.
+    Points in no polygon are skipped, as they take the nearest LSOA."""
+    index = get_area_index("lsoa")
+    mismatches = 0
+    for point_x, point_y, code in zip(x, y, codes):
+        inside = shapely.intersects(index.geometries, shapely.Point(point_x, point_y))
+        if inside.any() and code not in set(index.codes[inside]):
+            mismatches += 1
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--check", type=int, default=1000, help="Points to check by brute force.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = get_area_index("lsoa")
+    load_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(args.seed)
+    min_x, min_y, max_x, max_y = shapely.total_bounds(index.geometries)
+    x = rng.uniform(min_x, max_x, args.points)
+    y = rng.uniform(min_y, max_y, args.points)
+
+    start = time.perf_counter()
+    located = lookup_lsoa_deciles(x, y)
+    lookup_seconds = time.perf_counter() - start
+
+    mismatches = check_sample(x[: args.check], y[: args.check], located.lsoa11cd[: args.check])
+    results = {
+        "areas": len(index.codes),
+        "points": args.points,
+        "load_seconds": load_seconds,
+        "lookup_seconds": lookup_seconds,
+        "points_per_second": args.points / lookup_seconds,
+        "inside_share": float((located.distance == 0).mean()),
+        "nearest_share": float((located.distance > 0).mean()),
+        "checked": min(args.check, args.points),
+        "mismatches": mismatches,
+    }
+    print(
+        f"Loaded {results['areas']} LSOAs in {load_seconds:.2f}s; geocoded {args.points} points in "
+        f"{lookup_seconds:.2f}s ({results['points_per_second']:,.0f} points/s), "
+        f"{results['inside_share']:.1%} inside an LSOA, {results['nearest_share']:.1%} nearest; "
+        f"{mismatches} of {results['checked']} checked points differ"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if mismatches:
+        sys.exit("Some points were geocoded to the wrong LSOA")
+
+
+if __name__ == "__main__":
+    main()
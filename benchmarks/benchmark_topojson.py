@@ -0,0 +1,79 @@
+"""Comparing the GeoJSON boundary files against their TopoJSON copies; file size (raw and gzipped)
+and the time vl-convert takes to parse and draw the map, as a stand-in for first paint in the browser.
+
+Needs the GeoJSON files in the local shapefiles folder and the TopoJSON built by pipeline/build_topojson.py.
+Run from the repository root with: python -m benchmarks.benchmark_topojson [--repeats 3] [--output results.json]
+"""
+import argparse
+import gzip
+import json
+import time
+from typing import Optional
+
+import altair as alt
+
+from getters.la_shapefiles_2019 import TOPOJSON_OBJECT
+from getters.lsoa_la_tiles_2011 import get_shapefiles_dir
+from pipeline.build_topojson import get_boundary_files, get_topojson_path
+
+
+def render_seconds(data: alt.Data, repeats: int) -> Optional[float]:
+    """Best time out of `repeats` to render a geoshape of the data to SVG, or None without vl-convert."""
+    try:
+        import vl_convert as vlc
+    except ImportError:
+        return None
+    spec = (
+        alt.Chart(data)
+        .mark_geoshape(stroke="black")
+        .project(type="identity", reflectY=True)
+        .to_dict()
+    )
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vlc.vegalite_to_svg(spec)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    for boundary_file in get_boundary_files():
+        geojson_path = get_shapefiles_dir() / boundary_file
+        topojson_path = get_topojson_path(boundary_file)
+        if not (geojson_path.exists() and topojson_path.exists()):
+            print(f"Skipping {boundary_file}: GeoJSON or TopoJSON copy missing")
+            continue
+        geojson_bytes = geojson_path.read_bytes()
+        topojson_bytes = topojson_path.read_bytes()
+        geojson_data = alt.Data(values=json.loads(geojson_bytes)["features"])
+        topojson_data = alt.InlineData(
+            values=json.loads(topojson_bytes),
+            format=alt.DataFormat(type="topojson", feature=TOPOJSON_OBJECT),
+        )
+        results.append(
+            {
+                "file": boundary_file,
+                "geojson_bytes": len(geojson_bytes),
+                "topojson_bytes": len(topojson_bytes),
+                "geojson_gzip_bytes": len(gzip.compress(geojson_bytes)),
+                "topojson_gzip_bytes": len(gzip.compress(topojson_bytes)),
+                "geojson_render_seconds": render_seconds(geojson_data, args.repeats),
+                "topojson_render_seconds": render_seconds(topojson_data, args.repeats),
+            }
+        )
+        print(json.dumps(results[-1]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
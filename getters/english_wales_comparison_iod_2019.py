@@ -1,14 +1,23 @@
+from typing import List, Optional
+
 import pandas as pd
 
+from getters.iod_data_loader import load_iod_table
+from utils.utils_timing import timed
+
 
-def get_english_wales_lsoa_iod_2019() -> pd.DataFrame:
+@timed("getter")
+def get_english_wales_lsoa_iod_2019(columns: Optional[List[str]] = None) -> pd.DataFrame:
     """Pulling in the English and Welsh IoD data for 2019; with the England regions, LA codes/names
     and IoD deciles. This data has been made for comparability for Income and Employment domains ONLY. 
     The results may slightly differ from the English and Welsh IoD's. The deciles were calculated from the 
     Ranks. The lower the decile, the higher the deprivation.
 
+    Args:
+        columns (List[str], optional): Only load these columns. Defaults to all columns.
+
     Returns:
-        pd.DataFrame: Pandas dataframe.
+        pd.DataFrame: Pandas dataframe, with uint8 deciles and categorical region/LA columns.
+            It is shared between callers, so don't modify it in place.
     """
-    url = "https://raw.githubusercontent.com/j-gillam/geographical_iod_analysis/main/data/england_wales_decile_comparison.csv"
-    return pd.read_csv(url)
\ No newline at end of file
+    return load_iod_table("england_wales_decile_comparison.csv", columns=columns)
@@ -0,0 +1,168 @@
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from getters.iod_mmap_store import open_iod_store
+
+# The CSVs ship with the repository, so we read them from disk by default.
+# Set IOD_DATA_DIR to point at a different copy of the data folder.
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+# Public copy of the data folder, only used when remote loading is allowed.
+DATA_URL = "https://raw.githubusercontent.com/j-gillam/geographical_iod_analysis/main/data"
+# Sub folder of the data folder holding the Parquet copies (see pipeline/build_iod_parquet.py).
+PARQUET_DIR_NAME = "parquet"
+# Sub folder of the data folder holding the memory-mapped stores (see pipeline/build_iod_mmap_store.py).
+STORE_DIR_NAME = "mmap"
+
+IOD_DATA_FILES = [
+    "la_english_iod_2019.csv",
+    "lsoa_english_iod_2019.csv",
+    "lsoa_welsh_iod_2019.csv",
+    "england_wales_decile_comparison.csv",
+]
+# Packages whose cached functions clear_iod_data_cache clears.
+CACHED_PACKAGES = ("getters", "utils")
+# Low-cardinality text columns, stored as categoricals.
+CATEGORICAL_COLUMNS = ["lad19cd", "lad19nm", "region_code", "region_name", "country"]
+
+
+def get_data_dir() -> Path:
+    """Returning the folder the IoD CSVs are read from; IOD_DATA_DIR if it is set,
+    otherwise the data folder in this repository.
+
+    Returns:
+        Path: Path to the data folder.
+    """
+    return Path(os.environ.get("IOD_DATA_DIR", DEFAULT_DATA_DIR))
+
+
+def get_parquet_path(file_name: str) -> Path:
+    """Returning where the Parquet copy of one of the IoD CSVs lives.
+
+    Args:
+        file_name (str): Name of the CSV in the data folder, e.g. "la_english_iod_2019.csv".
+
+    Returns:
+        Path: Path to the Parquet file (which may not have been built yet).
+    """
+    return get_data_dir() / PARQUET_DIR_NAME / f"{Path(file_name).stem}.parquet"
+
+
+def get_store_path(file_name: str) -> Path:
+    """Returning where the memory-mapped store of one of the IoD CSVs lives.
+
+    Args:
+        file_name (str): Name of the CSV in the data folder, e.g. "la_english_iod_2019.csv".
+
+    Returns:
+        Path: Path to the store folder (which may not have been built yet).
+    """
+    return get_data_dir() / STORE_DIR_NAME / Path(file_name).stem
+
+
+def _is_up_to_date(built_path: Path, local_path: Path) -> bool:
+    """Checking a built copy exists and is not older than the CSV it was made from."""
+    return built_path.exists() and (
+        not local_path.exists() or built_path.stat().st_mtime >= local_path.stat().st_mtime
+    )
+
+
+def compact_iod_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Shrinking the IoD columns to compact dtypes; the deciles (1-10) become uint8
+    (UInt8 if there are missing values) and the region/LA columns become categoricals.
+
+    Args:
+        df (pd.DataFrame): IoD dataframe as read from the CSV.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe with compact dtypes.
+    """
+    dtypes = {}
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            dtypes[column] = "category"
+        elif pd.api.types.is_numeric_dtype(df[column]):
+            values = df[column].dropna()
+            if ((values % 1) == 0).all() and values.between(0, 255).all():
+                dtypes[column] = "UInt8" if df[column].isna().any() else "uint8"
+    return df.astype(dtypes)
+
+
+def _remote_allowed() -> bool:
+    """Checking IOD_ALLOW_REMOTE to see if we may fall back to the public url."""
+    return os.environ.get("IOD_ALLOW_REMOTE", "").lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=None)
+def _read_csv(source: str) -> pd.DataFrame:
+    """Reading a CSV once per process, keyed on the local path or url it came from."""
+    return compact_iod_dtypes(pd.read_csv(source))
+
+
+@lru_cache(maxsize=None)
+def _read_parquet(path: str, columns: Optional[Tuple[str, ...]]) -> pd.DataFrame:
+    """Reading a Parquet file once per process for each column projection."""
+    return pd.read_parquet(path, columns=list(columns) if columns else None)
+
+
+def load_iod_table(
+    file_name: str,
+    columns: Optional[List[str]] = None,
+    allow_remote: Optional[bool] = None,
+) -> pd.DataFrame:
+    """Loading one of the IoD tables with compact dtypes. The memory-mapped store is used if
+    it has been built and is up to date (its decile columns are views shared with other processes),
+    then the Parquet copy, then the local CSV, and the public url is only used if the local file
+    is missing and remote loading is allowed.
+    The parsed dataframe is kept in memory, so later calls don't re-read the file.
+    The same dataframe is shared between callers, so don't modify it in place.
+
+    Args:
+        file_name (str): Name of the CSV in the data folder, e.g. "la_english_iod_2019.csv".
+        columns (List[str], optional): Only load these columns. Defaults to all columns.
+        allow_remote (bool, optional): Fall back to the public url if the local file is missing.
+            Defaults to the IOD_ALLOW_REMOTE environment variable.
+
+    Raises:
+        FileNotFoundError: If the local file is missing and remote loading is not allowed.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe.
+    """
+    local_path = get_data_dir() / file_name
+    store_path = get_store_path(file_name)
+    if _is_up_to_date(store_path / "meta.json", local_path):
+        return open_iod_store(str(store_path.resolve())).to_frame(columns)
+    parquet_path = get_parquet_path(file_name)
+    if _is_up_to_date(parquet_path, local_path):
+        return _read_parquet(
+            str(parquet_path.resolve()), tuple(columns) if columns else None
+        )
+    if local_path.exists():
+        df = _read_csv(str(local_path.resolve()))
+    else:
+        if allow_remote is None:
+            allow_remote = _remote_allowed()
+        if not allow_remote:
+            raise FileNotFoundError(
+                f"{local_path} does not exist; set IOD_DATA_DIR or IOD_ALLOW_REMOTE=1 to load it."
+            )
+        df = _read_csv(f"{DATA_URL}/{file_name}")
+    return df[columns] if columns else df
+
+
+def clear_iod_data_cache() -> None:
+    """Dropping all the cached dataframes, so the next load re-reads the files, and every
+    cache built from them; the lru_caches of all the getters and utils modules loaded so far
+    (the LSOA index, region index, hierarchy, melts, chart specs, exports, API responses, ...).
+    """
+    for module_name, module in list(sys.modules.items()):
+        if module_name.split(".")[0] not in CACHED_PACKAGES:
+            continue
+        for value in list(vars(module).values()):
+            if getattr(value, "__module__", None) == module_name and hasattr(value, "cache_clear"):
+                value.cache_clear()
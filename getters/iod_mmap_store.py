@@ -0,0 +1,150 @@
+"""Read-only, memory-mapped copies of the IoD tables.
+
+Each table is stored in its own folder:
+    meta.json       column names/kinds and the number of rows.
+    deciles.npy     uint8 array (rows x decile columns) in column-major order, 0 for missing.
+    strings.bin     utf-8 text of every distinct string, back to back.
+    offsets.npy     int64 offsets into strings.bin (one more entry than there are strings).
+    <column>.codes.npy  int32 index into that column's slice of the string table, -1 for missing.
+
+The arrays are opened with mmap, so several worker processes reading the same store share one
+physical copy through the page cache, and the decile columns handed back are views onto it.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_KIND = "category"
+DECILE_KIND = "decile"
+STRING_KIND = "string"
+
+
+def write_iod_store(df: pd.DataFrame, store_path: Path) -> None:
+    """Writing an IoD dataframe (with compact dtypes) to a memory-mappable store.
+
+    Args:
+        df (pd.DataFrame): IoD dataframe, with uint8/UInt8 deciles and text columns.
+        store_path (Path): Folder to write the store to.
+    """
+    store_path.mkdir(parents=True, exist_ok=True)
+    columns, deciles, strings = [], [], []
+    for name in df.columns:
+        values = df[name]
+        if pd.api.types.is_integer_dtype(values):
+            columns.append(
+                {"name": name, "kind": DECILE_KIND, "nullable": bool(values.isna().any())}
+            )
+            deciles.append(values.fillna(0).to_numpy(dtype=np.uint8))
+        else:
+            codes, uniques = pd.factorize(values, sort=True)
+            is_categorical = isinstance(values.dtype, pd.CategoricalDtype)
+            columns.append(
+                {
+                    "name": name,
+                    "kind": CATEGORICAL_KIND if is_categorical else STRING_KIND,
+                    "start": len(strings),
+                    "stop": len(strings) + len(uniques),
+                }
+            )
+            strings.extend(str(value) for value in uniques)
+            np.save(store_path / f"{name}.codes.npy", codes.astype(np.int32))
+
+    np.save(store_path / "deciles.npy", np.asfortranarray(np.column_stack(deciles)))
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(store_path / "offsets.npy", offsets)
+    (store_path / "strings.bin").write_bytes(b"".join(encoded))
+    # meta.json is written last, so its timestamp marks a complete store.
+    with open(store_path / "meta.json", "w") as f:
+        json.dump({"n_rows": len(df), "columns": columns}, f)
+
+
+class IoDStore:
+    """An opened, read-only IoD store. The arrays are memory-mapped and the strings
+    are only decoded for the columns that are asked for."""
+
+    def __init__(self, store_path: Path):
+        self.store_path = store_path
+        with open(store_path / "meta.json") as f:
+            meta = json.load(f)
+        self.n_rows = meta["n_rows"]
+        self.columns = [column["name"] for column in meta["columns"]]
+        self._meta = {column["name"]: column for column in meta["columns"]}
+        decile_names = [c["name"] for c in meta["columns"] if c["kind"] == DECILE_KIND]
+        self._decile_index = {name: i for i, name in enumerate(decile_names)}
+        self.deciles = np.load(store_path / "deciles.npy", mmap_mode="r")
+        self._offsets = np.load(store_path / "offsets.npy", mmap_mode="r")
+        # np.memmap can't map an empty file.
+        if self._offsets[-1]:
+            self._strings = np.memmap(store_path / "strings.bin", dtype=np.uint8, mode="r")
+        else:
+            self._strings = np.zeros(0, dtype=np.uint8)
+        self._columns_cache = {}
+
+    def _string_table(self, start: int, stop: int) -> List[str]:
+        """Decoding a slice of the string table."""
+        offsets = self._offsets[start : stop + 1]
+        data = self._strings[offsets[0] : offsets[-1]].tobytes()
+        base = offsets[0]
+        return [
+            data[begin - base : end - base].decode("utf-8")
+            for begin, end in zip(offsets[:-1], offsets[1:])
+        ]
+
+    def column(self, name: str):
+        """Returning one column; deciles are views onto the mapped array, text columns are
+        decoded once and kept for later calls.
+
+        Args:
+            name (str): Column name.
+
+        Returns:
+            Array-like column values.
+        """
+        meta = self._meta[name]
+        if meta["kind"] == DECILE_KIND:
+            # A plain ndarray view, so pandas doesn't carry the memmap subclass around.
+            values = self.deciles[:, self._decile_index[name]].view(np.ndarray)
+            if meta["nullable"]:
+                return pd.arrays.IntegerArray(values, values == 0)
+            return values
+        if name not in self._columns_cache:
+            codes = np.load(self.store_path / f"{name}.codes.npy", mmap_mode="r")
+            categorical = pd.Categorical.from_codes(
+                codes, categories=self._string_table(meta["start"], meta["stop"])
+            )
+            if meta["kind"] == STRING_KIND:
+                self._columns_cache[name] = pd.Series(np.asarray(categorical)).array
+            else:
+                self._columns_cache[name] = categorical
+        return self._columns_cache[name]
+
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Building a dataframe over the store without copying the decile columns.
+
+        Args:
+            columns (List[str], optional): Only include these columns. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: Pandas dataframe.
+        """
+        columns = columns or self.columns
+        return pd.DataFrame({name: self.column(name) for name in columns}, copy=False)
+
+
+@lru_cache(maxsize=None)
+def open_iod_store(store_path: str) -> IoDStore:
+    """Opening a store once per process.
+
+    Args:
+        store_path (str): Folder the store was written to.
+
+    Returns:
+        IoDStore: The opened store.
+    """
+    return IoDStore(Path(store_path))
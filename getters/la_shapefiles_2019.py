@@ -1,5 +1,9 @@
 import altair as alt
-import geopandas as gpd
+
+# TopoJSON copies of the boundary files are built by pipeline/build_topojson.py into
+# shapefiles/topojson, with every layer stored under the same object name.
+TOPOJSON_DIR_NAME = "topojson"
+TOPOJSON_OBJECT = "boundaries"
 
 
 def get_english_la_shapefiles_2019() -> alt.Data:
@@ -17,6 +21,22 @@ def get_english_la_shapefiles_2019() -> alt.Data:
     )
     return geodata_la
 
+
+def get_english_la_topojson_2019() -> alt.Data:
+    """Pulling in the English Local Authority (LA) boundaries for 2019 as quantized TopoJSON;
+    the same areas and properties as get_english_la_shapefiles_2019, with shared borders stored once.
+    Note: You have to use a public url to pull in the shapefiles, it is an issue with altair/streamlit.
+    Otherwise it won't plot the map.
+
+    Returns:
+        alt.Data: Data for Altair to produce the choropleths in streamlit.
+    """
+    topojson_la = f"https://raw.githubusercontent.com/j-gillam/geographical_iod_analysis/main/shapefiles/{TOPOJSON_DIR_NAME}/la_clean_shapefiles_2019.topojson"
+    return alt.Data(
+        url=topojson_la, format=alt.DataFormat(type="topojson", feature=TOPOJSON_OBJECT)
+    )
+
+
 def get_english_la_long_lat_shapefiles_2019() -> alt.Data:
     """Pulling in the English Local Authority (LA) shape files for 2019; with the England regions 
     and LA codes/names. The Deciles are of the Average LSOA Score for each LA.
@@ -26,5 +46,8 @@ def get_english_la_long_lat_shapefiles_2019() -> alt.Data:
     Returns:
         alt.Data: Data for Altair to produce the choropleths in streamlit.
     """
+    # geopandas is slow to import and only needed here, so it isn't imported at app start.
+    import geopandas as gpd
+
     geojson_la = "https://raw.githubusercontent.com/j-gillam/geographical_iod_analysis/main/shapefiles/la_clean_shapefiles_2019.geojson"
     return gpd.read_file(geojson_la)
\ No newline at end of file
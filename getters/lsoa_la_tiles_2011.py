@@ -0,0 +1,91 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+import altair as alt
+
+from utils.utils_timing import timed
+
+# Boundary files built by the pipeline/ scripts are read from here.
+# Set IOD_SHAPEFILES_DIR to point at a different copy of the shapefiles folder.
+DEFAULT_SHAPEFILES_DIR = Path(__file__).resolve().parents[1] / "shapefiles"
+LA_TILES_DIR_NAME = "la_tiles"
+
+
+def get_shapefiles_dir() -> Path:
+    """Returning the local shapefiles folder; IOD_SHAPEFILES_DIR if it is set,
+    otherwise the shapefiles folder in this repository.
+
+    Returns:
+        Path: Path to the shapefiles folder.
+    """
+    return Path(os.environ.get("IOD_SHAPEFILES_DIR", DEFAULT_SHAPEFILES_DIR))
+
+
+def get_lsoa_la_tile_path(lad19cd: str) -> Path:
+    """Returning where the LSOA tile of an LA lives (see pipeline/build_lsoa_la_tiles.py).
+
+    Args:
+        lad19cd (str): The LA code, e.g. "E06000001".
+
+    Returns:
+        Path: Path to the GeoJSON tile (which may not have been built yet).
+    """
+    return get_shapefiles_dir() / LA_TILES_DIR_NAME / f"{lad19cd}.geojson"
+
+
+def has_lsoa_la_tile(lad19cd: str) -> bool:
+    """Checking whether the LSOA tile of an LA has been built.
+
+    Args:
+        lad19cd (str): The LA code, e.g. "E06000001".
+
+    Returns:
+        bool: True if the tile exists.
+    """
+    return get_lsoa_la_tile_path(lad19cd).exists()
+
+
+@lru_cache(maxsize=512)
+def _read_tile_features(path: str) -> tuple:
+    """Reading a tile once per process, with each feature's properties moved to the top level."""
+    with open(path) as f:
+        features = json.load(f)["features"]
+    return tuple(
+        {**feature["properties"], "type": "Feature", "geometry": feature["geometry"]}
+        for feature in features
+    )
+
+
+@timed("getter")
+def get_lsoa_la_tile_2011(lad19cd: str) -> alt.Data:
+    """Pulling in the simplified LSOA (2011) boundaries of one LA, with the IoD deciles
+    already joined on. The properties sit at the top level of each feature, where
+    transform_lookup would have put them, so the charts can use the same field names
+    without a lookup or filter in the browser.
+
+    Args:
+        lad19cd (str): The LA code, e.g. "E06000001".
+
+    Returns:
+        alt.Data: Data for Altair to produce the choropleths in streamlit.
+    """
+    features = _read_tile_features(str(get_lsoa_la_tile_path(lad19cd)))
+    return alt.Data(values=list(features))
+
+
+def get_lsoa_la_tile_geometries(lad19cd: str) -> Dict[str, dict]:
+    """Pulling in the simplified LSOA (2011) geometries of one LA, keyed on the LSOA code.
+
+    Args:
+        lad19cd (str): The LA code, e.g. "E06000001".
+
+    Returns:
+        Dict[str, dict]: GeoJSON geometry of each LSOA; empty if the tile hasn't been built.
+    """
+    if not has_lsoa_la_tile(lad19cd):
+        return {}
+    features = _read_tile_features(str(get_lsoa_la_tile_path(lad19cd)))
+    return {feature["lsoa11cd"]: feature["geometry"] for feature in features}
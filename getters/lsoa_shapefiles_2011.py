@@ -1,5 +1,7 @@
 import altair as alt
 
+from getters.la_shapefiles_2019 import TOPOJSON_DIR_NAME, TOPOJSON_OBJECT
+
 
 def get_english_lsoa_shapefiles_2011(region_name: str) -> alt.Data:
     """Pulling in the English Lower Super Output Area (LSOA) shape files for 2011; with the England regions,
@@ -18,6 +20,24 @@ def get_english_lsoa_shapefiles_2011(region_name: str) -> alt.Data:
     )
     return geodata_lsoa
 
+
+def get_english_lsoa_topojson_2011(region_name: str) -> alt.Data:
+    """Pulling in the English Lower Super Output Area (LSOA) boundaries for 2011 as quantized TopoJSON;
+    the same areas and properties as get_english_lsoa_shapefiles_2011, with shared borders stored once.
+    Note: You have to use a public url to pull in the shapefiles, it is an issue with altair/streamlit.
+    Otherwise it won't plot the map.
+    Args:
+        region_name (str): The lower case region name.
+
+    Returns:
+        alt.Data: Data for Altair to produce the choropleths in streamlit.
+    """
+    topojson_lsoa = f"https://raw.githubusercontent.com/j-gillam/geographical_iod_analysis/main/shapefiles/{TOPOJSON_DIR_NAME}/lsoa_clean_shapefiles_2011_{region_name}_reduced.topojson"
+    return alt.Data(
+        url=topojson_lsoa, format=alt.DataFormat(type="topojson", feature=TOPOJSON_OBJECT)
+    )
+
+
 def get_welsh_lsoa_shapefiles_2011() -> alt.Data:
     """Pulling in the Welsh Lower Super Output Area (LSOA) shape files for 2011; with the LSOA codes/names. 
     Note: You have to use a public url to pull in the shapefiles, it is an issue with altair/streamlit.
@@ -33,3 +53,18 @@ def get_welsh_lsoa_shapefiles_2011() -> alt.Data:
         url=geojson_lsoa, format=alt.DataFormat(property="features", type="json")
     )
     return geodata_lsoa
+
+
+def get_welsh_lsoa_topojson_2011() -> alt.Data:
+    """Pulling in the Welsh Lower Super Output Area (LSOA) boundaries for 2011 as quantized TopoJSON;
+    the same areas and properties as get_welsh_lsoa_shapefiles_2011, with shared borders stored once.
+    Note: You have to use a public url to pull in the shapefiles, it is an issue with altair/streamlit.
+    Otherwise it won't plot the map.
+
+    Returns:
+        alt.Data: Data for Altair to produce the choropleths in streamlit.
+    """
+    topojson_lsoa = f"https://raw.githubusercontent.com/j-gillam/geographical_iod_analysis/main/shapefiles/{TOPOJSON_DIR_NAME}/lsoa_clean_shapefiles_2011_wales.topojson"
+    return alt.Data(
+        url=topojson_lsoa, format=alt.DataFormat(type="topojson", feature=TOPOJSON_OBJECT)
+    )
@@ -0,0 +1,36 @@
+"""Building the memory-mapped stores of the IoD CSVs that the getters load first.
+
+Run from the repository root with: python -m pipeline.build_iod_mmap_store
+"""
+import pandas as pd
+
+from getters.iod_data_loader import (
+    IOD_DATA_FILES,
+    clear_iod_data_cache,
+    compact_iod_dtypes,
+    get_data_dir,
+    get_store_path,
+)
+from getters.iod_mmap_store import write_iod_store
+
+
+def build_iod_mmap_store(file_name: str) -> None:
+    """Converting one IoD CSV to a memory-mapped store.
+
+    Args:
+        file_name (str): Name of the CSV in the data folder, e.g. "la_english_iod_2019.csv".
+    """
+    df = compact_iod_dtypes(pd.read_csv(get_data_dir() / file_name))
+    write_iod_store(df, get_store_path(file_name))
+
+
+def main() -> None:
+    """Building the memory-mapped stores of all the IoD CSVs."""
+    for file_name in IOD_DATA_FILES:
+        build_iod_mmap_store(file_name)
+        print(f"Built {get_store_path(file_name)}")
+    clear_iod_data_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Building the Parquet copies of the IoD CSVs that the getters load first.
+
+Run from the repository root with: python -m pipeline.build_iod_parquet
+"""
+import pandas as pd
+
+from getters.iod_data_loader import (
+    IOD_DATA_FILES,
+    clear_iod_data_cache,
+    compact_iod_dtypes,
+    get_data_dir,
+    get_parquet_path,
+)
+
+
+def build_iod_parquet(file_name: str) -> None:
+    """Converting one IoD CSV to Parquet, with uint8 deciles and categorical region/LA columns.
+
+    Args:
+        file_name (str): Name of the CSV in the data folder, e.g. "la_english_iod_2019.csv".
+    """
+    df = compact_iod_dtypes(pd.read_csv(get_data_dir() / file_name))
+    parquet_path = get_parquet_path(file_name)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(parquet_path, index=False)
+
+
+def main() -> None:
+    """Building the Parquet copies of all the IoD CSVs."""
+    for file_name in IOD_DATA_FILES:
+        build_iod_parquet(file_name)
+        print(f"Built {get_parquet_path(file_name)}")
+    clear_iod_data_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Building one small GeoJSON tile of LSOA (2011) boundaries per LA, with the geometry
+simplified and the IoD deciles already merged into the feature properties.
+
+Run from the repository root with: python -m pipeline.build_lsoa_la_tiles [--tolerance 10]
+"""
+import argparse
+from typing import List
+
+import geopandas as gpd
+import pandas as pd
+
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from getters.lsoa_la_tiles_2011 import get_lsoa_la_tile_path, get_shapefiles_dir
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_iod_values import iod_combined_indices, iod_indices, wiod_indices
+from utils.utils_preprocessing import preprocess_strings
+
+SHAPEFILES_URL = "https://raw.githubusercontent.com/j-gillam/geographical_iod_analysis/main/shapefiles"
+# Simplification tolerance, in the units of the boundary files' coordinates.
+DEFAULT_TOLERANCE = 10.0
+
+
+def get_boundary_source(file_name: str) -> str:
+    """Using the local copy of a boundary file if there is one, otherwise the public url.
+
+    Args:
+        file_name (str): Name of the boundary file, e.g. "la_clean_shapefiles_2019.geojson".
+
+    Returns:
+        str: Local path or url to read the file from.
+    """
+    local_path = get_shapefiles_dir() / file_name
+    return str(local_path) if local_path.exists() else f"{SHAPEFILES_URL}/{file_name}"
+
+
+def build_lsoa_la_tiles(
+    boundary_file: str, iod_data: pd.DataFrame, tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Splitting one LSOA boundary file into per-LA tiles, simplifying the geometry and
+    merging on the IoD deciles.
+
+    Args:
+        boundary_file (str): Name of the LSOA boundary file, e.g. "lsoa_clean_shapefiles_2011_wales.geojson".
+        iod_data (pd.DataFrame): LSOA IoD data with lsoa11cd, lsoa11nm, lad19cd, lad19nm and decile columns.
+        tolerance (float, optional): Simplification tolerance. Defaults to DEFAULT_TOLERANCE.
+
+    Returns:
+        List[str]: The LA codes a tile was written for.
+    """
+    boundaries = gpd.read_file(get_boundary_source(boundary_file))[["lsoa11cd", "geometry"]]
+    boundaries["geometry"] = boundaries.geometry.simplify(tolerance, preserve_topology=True)
+    tiles = boundaries.merge(iod_data, on="lsoa11cd", how="inner")
+    written = []
+    for lad19cd, tile in tiles.groupby("lad19cd", observed=True):
+        tile_path = get_lsoa_la_tile_path(lad19cd)
+        tile_path.parent.mkdir(parents=True, exist_ok=True)
+        tile.to_file(tile_path, driver="GeoJSON")
+        written.append(lad19cd)
+    return written
+
+
+def main() -> None:
+    """Building the LSOA tiles of every English and Welsh LA."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    combined = get_english_wales_lsoa_iod_2019(columns=["lsoa11cd"] + iod_combined_indices)
+    english = get_english_lsoa_iod_2019().merge(combined, on="lsoa11cd", how="left")
+    welsh = get_welsh_lsoa_iod_2019().merge(combined, on="lsoa11cd", how="left")
+    english_columns = ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm", "region_name"]
+    english = english[english_columns + iod_indices + iod_combined_indices]
+    welsh = welsh[english_columns + wiod_indices + iod_combined_indices]
+
+    region_names = sorted(english.region_name.unique())
+    region_slugs = preprocess_strings(pd.Series(region_names))
+    for region_name, region_slug in zip(region_names, region_slugs):
+        written = build_lsoa_la_tiles(
+            f"lsoa_clean_shapefiles_2011_{region_slug}_reduced.geojson",
+            english[english.region_name == region_name],
+            args.tolerance,
+        )
+        print(f"{region_name}: built {len(written)} LA tiles")
+    written = build_lsoa_la_tiles(
+        "lsoa_clean_shapefiles_2011_wales.geojson", welsh, args.tolerance
+    )
+    print(f"Wales: built {len(written)} LA tiles")
+
+
+if __name__ == "__main__":
+    main()
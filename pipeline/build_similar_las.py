@@ -0,0 +1,42 @@
+"""Precomputing the most similar LAs of every English and Welsh LA, by the distance between the
+decile distributions of their LSOAs in the four England-Wales comparison domains
+(utils/utils_comparison.py). The table is written as CSV or Parquet, picked by the extension.
+
+Run from the repository root with: python -m pipeline.build_similar_las [--n-similar 5]
+[--metric wasserstein] [--nations any] [--output data/similar_las/most_similar_las.csv]
+"""
+import argparse
+import os
+from pathlib import Path
+
+from getters.iod_data_loader import get_data_dir
+from utils.utils_comparison import DISTANCE_METRICS, NATION_FILTERS, most_similar_las
+
+
+def get_similar_las_path() -> Path:
+    """Default path of the most similar LA table, in the data folder."""
+    return get_data_dir() / "similar_las" / "most_similar_las.csv"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-similar", type=int, default=5, help="Similar LAs per LA.")
+    parser.add_argument("--metric", choices=DISTANCE_METRICS, default="wasserstein")
+    parser.add_argument("--nations", choices=NATION_FILTERS, default="any")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    path = args.output or get_similar_las_path()
+    similar = most_similar_las(args.n_similar, args.metric, args.nations)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if path.suffix == ".parquet":
+        similar.to_parquet(tmp_path, index=False)
+    else:
+        similar.to_csv(tmp_path, index=False)
+    tmp_path.replace(path)
+    print(f"Wrote {len(similar)} rows for {similar.lad19cd.nunique()} LAs to {path}")
+
+
+if __name__ == "__main__":
+    main()
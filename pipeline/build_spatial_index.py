@@ -0,0 +1,86 @@
+"""Building the spatial index of the LSOA (2011) and LA (2019) boundaries used to geocode points to
+areas (utils/utils_spatial_index.py). The geometries should be the full resolution boundaries, e.g.
+the ONS "Full Clipped" (BFC) files of the LSOAs (December 2011) and LAs (December 2019), not the
+simplified *_reduced.geojson outlines the app draws, which would let points within a few metres of
+a border match its neighbour. Any file geopandas reads will do (shapefile, GeoPackage, GeoJSON),
+as long as it has an lsoa11cd or lad19cd column (in any case). The geometries are stored as WKB, so
+loading the index doesn't parse the boundary files.
+
+Run from the repository root with: python -m pipeline.build_spatial_index
+[--lsoa-boundaries LSOA_2011_BFC.shp ...] [--la-boundaries LAD_2019_BFC.shp ...]
+"""
+import argparse
+from typing import List
+
+import geopandas as gpd
+import pandas as pd
+
+from utils.utils_spatial_index import LAYERS, get_spatial_index_path, write_area_geometries
+
+
+def read_boundaries(sources: List[str], code_column: str) -> gpd.GeoDataFrame:
+    """Reading boundary files into one table of area codes and geometries, in the CRS of the
+    first file; areas with no geometry are dropped, and areas in several files kept once.
+
+    Args:
+        sources (List[str]): Paths or urls of the boundary files.
+        code_column (str): Column with the area codes, e.g. "lsoa11cd"; matched in any case,
+            as the ONS files have e.g. "LSOA11CD".
+
+    Returns:
+        gpd.GeoDataFrame: Geopandas dataframe with code_column and geometry columns.
+    """
+    boundaries = []
+    for source in sources:
+        boundary = gpd.read_file(source)
+        columns = {column.lower(): column for column in boundary.columns}
+        if code_column not in columns:
+            raise ValueError(f"{source} has no {code_column} column")
+        boundary = boundary.rename(columns={columns[code_column]: code_column})
+        boundaries.append(boundary[[code_column, "geometry"]])
+    crs = boundaries[0].crs
+    areas = pd.concat([b.to_crs(crs) if crs else b for b in boundaries], ignore_index=True)
+    return areas[areas.geometry.notna()].drop_duplicates(code_column)
+
+
+def build_spatial_index(layer: str, sources: List[str]) -> int:
+    """Reading the full resolution boundaries of a layer and storing the codes and geometries.
+
+    Args:
+        layer (str): "lsoa" or "la".
+        sources (List[str]): Paths or urls of the layer's boundary files.
+
+    Returns:
+        int: Number of areas stored.
+    """
+    areas = read_boundaries(sources, LAYERS[layer])
+    write_area_geometries(
+        get_spatial_index_path(layer),
+        areas[LAYERS[layer]].astype(str).to_numpy(),
+        areas.geometry.to_numpy(),
+        areas.crs.to_string() if areas.crs else None,
+    )
+    return len(areas)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    for layer in LAYERS:
+        parser.add_argument(
+            f"--{layer}-boundaries",
+            nargs="+",
+            default=[],
+            help=f"Full resolution {layer.upper()} boundary files to index.",
+        )
+    args = parser.parse_args()
+    sources = {layer: getattr(args, f"{layer}_boundaries") for layer in LAYERS}
+    if not any(sources.values()):
+        parser.error("give the full resolution boundaries of at least one layer")
+    for layer, layer_sources in sources.items():
+        if layer_sources:
+            n_areas = build_spatial_index(layer, layer_sources)
+            print(f"{layer}: stored {n_areas} areas in {get_spatial_index_path(layer)}")
+
+
+if __name__ == "__main__":
+    main()
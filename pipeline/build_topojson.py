@@ -0,0 +1,81 @@
+"""Converting the LA (2019) and LSOA (2011) boundary files to quantized TopoJSON. Borders shared
+by neighbouring areas are stored once, and the coordinates are snapped to an integer grid.
+
+Run from the repository root with: python -m pipeline.build_topojson [--quantization 100000]
+"""
+import argparse
+from pathlib import Path
+from typing import List
+
+import geopandas as gpd
+import pandas as pd
+import topojson
+
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.lsoa_la_tiles_2011 import get_shapefiles_dir
+from getters.la_shapefiles_2019 import TOPOJSON_DIR_NAME, TOPOJSON_OBJECT
+from pipeline.build_lsoa_la_tiles import get_boundary_source
+from utils.utils_preprocessing import preprocess_strings
+
+# Number of grid steps across each axis of a layer's bounding box.
+DEFAULT_QUANTIZATION = 100_000
+
+
+def get_boundary_files() -> List[str]:
+    """Listing the boundary files to convert; the LA file, one LSOA file per English region and the Welsh LSOA file.
+
+    Returns:
+        List[str]: Boundary file names.
+    """
+    region_names = sorted(get_english_lsoa_iod_2019(columns=["region_name"]).region_name.unique())
+    region_slugs = preprocess_strings(pd.Series(region_names))
+    return (
+        ["la_clean_shapefiles_2019.geojson"]
+        + [f"lsoa_clean_shapefiles_2011_{slug}_reduced.geojson" for slug in region_slugs]
+        + ["lsoa_clean_shapefiles_2011_wales.geojson"]
+    )
+
+
+def get_topojson_path(boundary_file: str) -> Path:
+    """Returning where the TopoJSON copy of a boundary file is written.
+
+    Args:
+        boundary_file (str): Name of the boundary file, e.g. "la_clean_shapefiles_2019.geojson".
+
+    Returns:
+        Path: Path to the TopoJSON file.
+    """
+    return get_shapefiles_dir() / TOPOJSON_DIR_NAME / f"{Path(boundary_file).stem}.topojson"
+
+
+def build_topojson(boundary_file: str, quantization: int = DEFAULT_QUANTIZATION) -> Path:
+    """Converting one GeoJSON boundary file to quantized TopoJSON.
+
+    Args:
+        boundary_file (str): Name of the boundary file, e.g. "la_clean_shapefiles_2019.geojson".
+        quantization (int, optional): Grid steps per axis. Defaults to DEFAULT_QUANTIZATION.
+
+    Returns:
+        Path: Path to the TopoJSON file.
+    """
+    boundaries = gpd.read_file(get_boundary_source(boundary_file))
+    topology = topojson.Topology(
+        boundaries, prequantize=quantization, object_name=TOPOJSON_OBJECT
+    )
+    topojson_path = get_topojson_path(boundary_file)
+    topojson_path.parent.mkdir(parents=True, exist_ok=True)
+    topojson_path.write_text(topology.to_json())
+    return topojson_path
+
+
+def main() -> None:
+    """Converting all the boundary files to TopoJSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quantization", type=int, default=DEFAULT_QUANTIZATION)
+    args = parser.parse_args()
+    for boundary_file in get_boundary_files():
+        print(f"Built {build_topojson(boundary_file, args.quantization)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Annotating each row of a CSV or Parquet file of LSOA (lsoa11cd) or LA (lad19cd) codes with the
+IoD deciles, streaming the file a chunk at a time so memory stays bounded whatever its size.
+
+Run from the repository root with: python -m pipeline.enrich_iod_deciles input.csv output.csv
+[--key lsoa11cd] [--chunk-rows 250000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from utils.utils_enrichment import ENRICH_CHUNK_ROWS, ENRICH_KEYS, enrich_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", type=Path, help="CSV or Parquet file to enrich.")
+    parser.add_argument("output", type=Path, help="CSV or Parquet file to write (by extension).")
+    parser.add_argument("--key", choices=ENRICH_KEYS, help="Defaults to the code column in the input.")
+    parser.add_argument("--chunk-rows", type=int, default=ENRICH_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        counts = enrich_file(args.input, args.output, args.key, args.chunk_rows)
+    except (KeyError, ValueError) as error:
+        sys.exit(f"Can't enrich {args.input}: {error}")
+    print(
+        f"Enriched {counts['rows']} rows ({counts['matched']} matched) into {args.output} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
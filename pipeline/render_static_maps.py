@@ -0,0 +1,206 @@
+"""Rendering the LSOA map of every English and Welsh LA, for every index, to static PNG/SVG files.
+
+The maps are the ones on the LSOA breakdown pages (utils/utils_charts.py), drawn offline by vl-convert
+from the per-LA tiles (pipeline/build_lsoa_la_tiles.py) across a pool of processes. Each file is written
+to a temporary name and renamed when it is complete, and files newer than their tile and IoD data are
+skipped, so rerunning after a failure or an interruption only renders what is missing or out of date.
+
+Run from the repository root with: python -m pipeline.render_static_maps [--formats png svg]
+[--datasets english welsh] [--las E06000001 ...] [--palette Spring] [--workers 4] [--output-dir maps] [--force]
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from getters.iod_data_loader import get_data_dir
+from getters.lsoa_la_tiles_2011 import get_lsoa_la_tile_path, has_lsoa_la_tile
+from utils.utils_iod_values import iod_dict, wiod_dict
+from utils.utils_palettes import get_palette_names
+
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parents[1] / "maps"
+DEFAULT_PALETTE = "Spring"
+MAP_SIZE = (500, 500)
+# IoD data and index names of each LSOA dataset that has a map per LA.
+DATA_FILES = {
+    "english": "lsoa_english_iod_2019.csv",
+    "welsh": "lsoa_welsh_iod_2019.csv",
+}
+INDEX_COLUMNS = {"english": iod_dict, "welsh": wiod_dict}
+
+
+class MapJob(NamedTuple):
+    dataset: str
+    la_code: str
+    iod_name: str
+    palette: str
+    file_format: str
+    path: str
+    allow_remote: bool = False
+
+
+def get_map_path(
+    output_dir: Path, dataset: str, la_code: str, iod_name: str, palette: str, file_format: str
+) -> Path:
+    """Returning where the map of one LA and index is written,
+    e.g. maps/png/Spring/E06000001/a_index_of_multiple_deprivation_imd.png.
+
+    Args:
+        output_dir (Path): Folder the maps are written into.
+        dataset (str): "english" or "welsh".
+        la_code (str): The LA code, e.g. "E06000001".
+        iod_name (str): Name of the index.
+        palette (str): Palette name from utils/utils_palettes.py.
+        file_format (str): "png" or "svg".
+
+    Returns:
+        Path: Path to the map.
+    """
+    column = INDEX_COLUMNS[dataset][iod_name]
+    return output_dir / file_format / palette / la_code / f"{column}.{file_format}"
+
+
+def is_up_to_date(job: MapJob) -> bool:
+    """Checking whether a map exists and is newer than the tile and IoD data it is drawn from.
+
+    Args:
+        job (MapJob): The map.
+
+    Returns:
+        bool: True if it doesn't need rendering again.
+    """
+    path = Path(job.path)
+    if not path.exists():
+        return False
+    inputs = [get_data_dir() / DATA_FILES[job.dataset], get_lsoa_la_tile_path(job.la_code)]
+    input_mtimes = [p.stat().st_mtime for p in inputs if p.exists()]
+    return path.stat().st_mtime >= max(input_mtimes, default=0)
+
+
+def render_map(job: MapJob) -> Tuple[str, Optional[str]]:
+    """Rendering one map, in a worker process.
+
+    Args:
+        job (MapJob): The map to render.
+
+    Returns:
+        Tuple[str, Optional[str]]: The map's path, and the error if it failed.
+    """
+    try:
+        import altair as alt
+        import vl_convert as vlc
+
+        from utils.utils_charts import build_lsoa_chart
+        from utils.utils_fonts_colours import nestafont
+
+        if not (job.allow_remote or has_lsoa_la_tile(job.la_code)):
+            raise FileNotFoundError(
+                f"No tile for {job.la_code}; build it with pipeline/build_lsoa_la_tiles.py"
+            )
+        alt.themes.register("nestafont", nestafont)
+        alt.themes.enable("nestafont")
+        spec = build_lsoa_chart(
+            job.dataset, job.la_code, job.iod_name, job.palette, MAP_SIZE
+        ).to_dict()
+        if job.file_format == "svg":
+            content = vlc.vegalite_to_svg(spec).encode("utf-8")
+        else:
+            content = vlc.vegalite_to_png(spec, scale=2)
+        path = Path(job.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+        return job.path, None
+    except Exception as error:
+        return job.path, f"{type(error).__name__}: {error}"
+
+
+def get_map_jobs(
+    output_dir: Path,
+    datasets: List[str],
+    la_codes: Optional[List[str]],
+    palette: str,
+    file_formats: List[str],
+    allow_remote: bool = False,
+) -> List[MapJob]:
+    """Listing every map to render; one per LA, index and format.
+
+    Args:
+        output_dir (Path): Folder the maps are written into.
+        datasets (List[str]): "english" and/or "welsh".
+        la_codes (List[str], optional): Only these LAs. Defaults to every LA.
+        palette (str): Palette name from utils/utils_palettes.py.
+        file_formats (List[str]): "png" and/or "svg".
+        allow_remote (bool, optional): Draw LAs without a tile from the public boundary files.
+
+    Returns:
+        List[MapJob]: The maps.
+    """
+    from utils.utils_hierarchy import get_area_hierarchy
+
+    all_la_codes = sorted(get_area_hierarchy().la_names)
+    jobs = []
+    for dataset in datasets:
+        prefix = "W" if dataset == "welsh" else "E"
+        for la_code in all_la_codes:
+            if not la_code.startswith(prefix) or (la_codes and la_code not in la_codes):
+                continue
+            for iod_name in INDEX_COLUMNS[dataset]:
+                for file_format in file_formats:
+                    path = get_map_path(
+                        output_dir, dataset, la_code, iod_name, palette, file_format
+                    )
+                    jobs.append(
+                        MapJob(
+                            dataset, la_code, iod_name, palette, file_format, str(path), allow_remote
+                        )
+                    )
+    return jobs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--formats", nargs="+", choices=["png", "svg"], default=["png"])
+    parser.add_argument("--datasets", nargs="+", choices=list(DATA_FILES), default=list(DATA_FILES))
+    parser.add_argument("--las", nargs="+", help="Only render these LA codes.")
+    parser.add_argument("--palette", choices=get_palette_names(), default=DEFAULT_PALETTE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--force", action="store_true", help="Render maps that are up to date too.")
+    parser.add_argument(
+        "--allow-remote",
+        action="store_true",
+        help="Draw LAs without a tile from the public boundary files instead of failing them.",
+    )
+    args = parser.parse_args()
+
+    jobs = get_map_jobs(
+        args.output_dir, args.datasets, args.las, args.palette, args.formats, args.allow_remote
+    )
+    todo = [job for job in jobs if args.force or not is_up_to_date(job)]
+    print(f"{len(jobs) - len(todo)} of {len(jobs)} maps are up to date, rendering {len(todo)}")
+
+    failures = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for done, (path, error) in enumerate(executor.map(render_map, todo, chunksize=8), 1):
+            if error is not None:
+                failures[path] = error
+                print(f"Failed {path}: {error}")
+            if done % 100 == 0:
+                print(f"{done}/{len(todo)} rendered")
+
+    # Rerunning picks up where this run stopped, as only missing or stale maps are rendered.
+    failures_path = args.output_dir / "failures.json"
+    if failures:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        failures_path.write_text(json.dumps(failures, indent=2))
+        sys.exit(f"{len(failures)} maps failed, see {failures_path}; rerun to retry them")
+    failures_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
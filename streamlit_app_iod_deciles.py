@@ -1,26 +1,52 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
-import pandas as pd
 import altair as alt
 from utils.utils_fonts_colours import *
 from utils.utils_iod_values import *
 from PIL import Image
-from getters.english_la_iod_data_2019 import get_english_la_iod_2019
-from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
-from getters.la_shapefiles_2019 import get_english_la_shapefiles_2019
-from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
-from getters.lsoa_shapefiles_2011 import (
-    get_english_lsoa_shapefiles_2011, get_welsh_lsoa_shapefiles_2011
+from utils.utils_charts import (
+    la_comparison_chart, la_overview_chart, la_region_chart, lsoa_chart,
+    welsh_english_comparison_chart,
 )
-from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
-from utils.utils_preprocessing import preprocess_strings
+from utils.utils_export import (
+    ExportSelection, export_file_name, export_mime, export_selection, get_export_formats
+)
+from utils.utils_hierarchy import get_area_hierarchy
+from utils.utils_palettes import get_palette_names
+from utils.utils_page_data import load_page_datasets
+from utils.utils_timing import dump_prometheus, timer
 import os
+from typing import Callable, NamedTuple, Tuple
+
+
+def download_selection(selection, label, key):
+    # Download button for the data behind the current selection, in the format picked.
+    # The file is only built once asked for, and only in that format; the exports are
+    # memoized (utils/utils_export.py), so reruns don't rebuild it.
+    file_format = st.selectbox(
+        "Download format:", options=get_export_formats(selection), key=f"{key}_format"
+    )
+    # The prepare button and then the download button share one slot.
+    slot = st.empty()
+    prepared_key = f"{key}_prepared"
+    if st.session_state.get(prepared_key) != (selection, file_format):
+        if not slot.button(f"Prepare the {file_format} file", key=f"{key}_prepare"):
+            return
+        st.session_state[prepared_key] = (selection, file_format)
+    slot.download_button(
+        label,
+        data=export_selection(selection, file_format),
+        file_name=export_file_name(selection, file_format),
+        mime=export_mime(file_format),
+        key=key,
+    )
 
 
-@st.cache
-def convert_df(df):
-    # IMPORTANT: Cache the conversion to prevent computation on every rerun
-    return df.to_csv().encode("utf-8")
+def render_chart(spec):
+    # Draws a memoized Vega-Lite spec from utils/utils_charts.py; the copy keeps the
+    # cached dict intact, as streamlit pulls the datasets out of the spec it is given.
+    with timer("render"):
+        st.vega_lite_chart(dict(spec), use_container_width=True)
 
 
 current_dir = os.getcwd()
@@ -34,40 +60,9 @@ colours = NESTA_COLOURS
 im = Image.open(f"{current_dir}/images/favicon.ico")
 st.set_page_config(page_title="IoD Deciles across England", layout="wide", page_icon=im)
 
-# Creates the Navigation bar on the side:
-with st.sidebar:
-    choose = option_menu(
-        "IoD Geographical Analysis",
-        ["About", "English LA Breakdown", 
-        "English LA Comparison", "English LSOA Breakdown", 
-        "Welsh LSOA Breakdown",
-        "Comparing Welsh and English IoD"
-        ],
-        icons=["house", "geo-alt", 
-        "kanban", "geo-alt",
-        "geo-alt", "kanban"
-        ],
-        default_index=0,
-        orientation="vertical",
-        styles={
-            "container": {
-                "padding": "5!important",
-                "background-color": NESTA_COLOURS[12],
-            },
-            "icon": {"color": NESTA_COLOURS[10], "font-size": "25px"},
-            "nav-link": {
-                "font-size": "16px",
-                "text-align": "left",
-                "margin": "0px",
-                "--hover-color": "#eee",
-            },
-            "nav-link-selected": {"background-color": NESTA_COLOURS[0]},
-        },
-    )
 
-
-# For the About page (which we have not password protected):
-if choose == "About":
+def about_page():
+    # The About page (which we have not password protected).
 
     # Creates a separate container for us to put the header in
     header = st.container()
@@ -137,6 +132,298 @@ if choose == "About":
         unsafe_allow_html=True)
 
 
+def la_breakdown_page():
+    # For the LA Breakdown page:
+    st.title("Local Authorities in England, broken down by IoD Decile")
+    st.markdown(
+        """
+    The first map shows the overall Index of Multiple deprivation for England. The second map shows a region of England where you can select
+    which IoD you wish to look at. Attached to the second map is a bar chart that shows the IoD deciles for the Local Authority (LA)
+    selected on the map.
+
+    You can click on each LA to highlight it, double-click to remove the selection and hover over the map to see the deciles.
+    """
+    )
+    # Choose the colour palette:
+    colour_choice = st.selectbox(
+        "Choose a colour palette for the maps:",
+        options=get_palette_names(),
+    )
+    render_chart(la_overview_chart(tuple(st.session_state.region_filter), colour_choice))
+
+    # Select box to pick the region you wish to look at.
+    region_selection = st.selectbox(
+        "To look in closer detail, choose a region of England:",
+        options=sorted(st.session_state.region_filter),
+    )
+    # Select box to pick the IoD you wish to look at.
+    iod_selection = st.selectbox(
+        "Choose a IoD Decile to view on the map:",
+        options=st.session_state.iod_filter,
+    )
+
+    st.markdown(
+        "Click on one of the LAs to bring up the deciles in a graph below."
+    )
+
+    render_chart(
+        la_region_chart(
+            tuple(st.session_state.region_filter),
+            region_selection,
+            iod_selection,
+            colour_choice,
+        )
+    )
+
+    download_selection(
+        ExportSelection("region", region_names=(region_selection,)),
+        f"Download the LA deciles of {region_selection}",
+        key="download_la_breakdown",
+    )
+
+
+def la_comparison_page():
+    # Comparing different Local Authorities
+    st.title("Comparing the IoD for Local Authorities in England")
+    st.markdown(
+        """
+    This bar chart allows you to select up to five Local Authorities (LAs) across England to compare the different IoDs.
+    """
+    )
+    hierarchy = get_area_hierarchy()
+    la_compare_select = st.multiselect(
+        "Choose up to five LAs:",
+        options=hierarchy.las_of_regions(st.session_state.region_filter),
+        default=None,
+        max_selections=5,
+    )
+    la_iod_select = st.selectbox(
+        "Choose IoD Decile to view on the map:",
+        options=st.session_state.iod_filter,
+        key="iod_compare",
+    )
+    render_chart(
+        la_comparison_chart(
+            tuple(st.session_state.region_filter),
+            tuple(sorted(la_compare_select)),
+            la_iod_select,
+        )
+    )
+
+    if la_compare_select:
+        download_selection(
+            ExportSelection(
+                "la", lad19cds=tuple(sorted(hierarchy.la_code(la) for la in la_compare_select))
+            ),
+            "Download the deciles of these LAs",
+            key="download_la_comparison",
+        )
+
+
+def lsoa_breakdown_page():
+    # Breaking down an English LA by LSOA
+    st.title("Lower Super Output Areas in England, broken down by IoD Decile")
+    st.markdown(
+        """
+    By selecting a region of England, an IoD and a Local Authority (LA), this map shows the breakdown at Lower Super Output Area (LSOA).
+
+    You can click on each LSOA to highlight it, double-click to remove the selection and hover over the map to see the deciles.
+    """
+    )
+    # Choose the colour palette:
+    colour_choice = st.selectbox(
+        "Choose a colour palette for the maps:",
+        options=get_palette_names(),
+    )
+    # Select box to pick the region you wish to look at.
+    hierarchy = get_area_hierarchy()
+    region_selection = st.selectbox(
+        "Choose a region of England:",
+        options=sorted(st.session_state.region_filter),
+        key="region_lsoas",
+    )
+    las_to_plot = hierarchy.las(region_selection)
+    iod_selection = st.selectbox(
+        "Choose IoD Decile to view on the map:",
+        options=st.session_state.iod_filter,
+        key="iod",
+    )
+    la_selection = st.selectbox(
+        "Choose a local authority from the region chosen above to see the LSOA breakdown:",
+        las_to_plot,
+    )
+    la_code = hierarchy.la_code(la_selection)
+    render_chart(
+        lsoa_chart("english", la_code, iod_selection, colour_choice, size=(500, 500))
+    )
+
+    download_selection(
+        ExportSelection("lsoa", lad19cds=(la_code,)),
+        f"Download the LSOA deciles of {la_selection}",
+        key="download_lsoa_breakdown",
+    )
+
+
+def welsh_lsoa_page():
+    # Breaking down a Welsh LA by LSOA
+
+    st.title("Lower Super Output Areas in Wales, broken down by IoD Decile")
+    st.markdown(
+        """
+    By selecting a region of Wales, an IoD and a Local Authority (LA), this map shows the breakdown at Lower Super Output Area (LSOA).
+
+    You can click on each LSOA to highlight it, double-click to remove the selection and hover over the map to see the deciles.
+    """
+    )
+    # Choose the colour palette:
+    colour_choice = st.selectbox(
+        "Choose a colour palette for the maps:",
+        options=get_palette_names(),
+    )
+    # Select box to pick the region you wish to look at.
+    hierarchy = get_area_hierarchy()
+    region_selection = st.selectbox(
+        "Choose a region of Wales:",
+        options=hierarchy.regions("Wales"),
+        key="region_lsoas_wales",
+    )
+    welsh_las_to_plot = hierarchy.las(region_selection)
+    wiod_selection = st.selectbox(
+        "Choose IoD Decile to view on the map:",
+        options=wiod_names,
+        key="iod",
+    )
+    welsh_la_selection = st.selectbox(
+        "Choose a local authority from the region chosen above to see the LSOA breakdown:",
+        welsh_las_to_plot,
+    )
+
+    welsh_la_code = hierarchy.la_code(welsh_la_selection)
+    render_chart(lsoa_chart("welsh", welsh_la_code, wiod_selection, colour_choice))
+
+    download_selection(
+        ExportSelection("lsoa", lad19cds=(welsh_la_code,)),
+        f"Download the LSOA deciles of {welsh_la_selection}",
+        key="download_welsh_lsoa",
+    )
+
+
+def welsh_english_comparison_page():
+    # Comparing LSOAs of an English and a Welsh LA
+    st.title("Comparing IoD Deciles in England and Wales, by Lower Super Output Area (LSOA)")
+    st.markdown(
+    """
+    The open source comparison dataset published is comprised of the domains; Income, Employment, 
+    Income Deprivation Affecting Children Index (IDACI) and Income Deprivation Affecting Older People Index (IDAOPI) only.
+
+    This figure allows you to compare a Local Authority (LA) in Wales to one in England for each IoD. 
+    You can select a region of England and an LA to produce a map which shows the breakdown at Lower Super Output Area (LSOA).
+    Similary you can select an LA from Wales to show the LSOA breakdown.
+
+    You can hold shift and click on LSOA's from England and Wales. Selecting the LSOA's on the map will show them on the bar chart 
+    below to compare the deciles. You can ouble-click to remove the all the selections and hover over the map to see the deciles.
+    """
+    )
+    # Choose the colour palette:
+    colour_choice = st.selectbox(
+        "Choose a colour palette for the maps:",
+        options=get_palette_names(),
+    )
+    iod_combined_selection = st.selectbox(
+        "Choose IoD Decile to view on the map:",
+        options=iod_combined_names,
+    )
+    # Select box to pick the region you wish to look at.
+    hierarchy = get_area_hierarchy()
+    region_selection = st.selectbox(
+        "Choose a region of England:",
+        options=sorted(st.session_state.region_filter),
+        key="region_lsoas",
+    )
+    las_to_plot = hierarchy.las(region_selection)
+    la_selection = st.selectbox(
+        "Choose a local authority from the region chosen above to compare the LSOA breakdown:",
+        las_to_plot,
+    )
+    welsh_la_selection = st.selectbox(
+        "Choose a local authority from Wales to compare the LSOA breakdown:",
+        hierarchy.country_las["Wales"],
+    )
+    la_code = hierarchy.la_code(la_selection)
+    welsh_la_code = hierarchy.la_code(welsh_la_selection)
+    render_chart(
+        welsh_english_comparison_chart(
+            la_code, welsh_la_code, iod_combined_selection, colour_choice
+        )
+    )
+
+    download_selection(
+        ExportSelection("comparison", lad19cds=tuple(sorted((la_code, welsh_la_code)))),
+        f"Download the LSOA deciles of {la_selection} and {welsh_la_selection}",
+        key="download_welsh_english_comparison",
+    )
+
+
+class Page(NamedTuple):
+    icon: str
+    render: Callable
+    # Names of the datasets the page depends on (see utils/utils_page_data.py); only these
+    # are loaded when the page is shown. Every page's option lists need the hierarchy's
+    # English LA and Welsh LSOA tables.
+    datasets: Tuple[str, ...] = ()
+    password_protected: bool = True
+
+
+# The pages of the app, in the order they appear in the navigation bar.
+PAGES = {
+    "About": Page("house", about_page, password_protected=False),
+    "English LA Breakdown": Page(
+        "geo-alt", la_breakdown_page, ("english_la", "welsh_lsoa", "la_boundaries")
+    ),
+    "English LA Comparison": Page("kanban", la_comparison_page, ("english_la", "welsh_lsoa")),
+    "English LSOA Breakdown": Page(
+        "geo-alt", lsoa_breakdown_page, ("english_la", "welsh_lsoa", "english_lsoa")
+    ),
+    "Welsh LSOA Breakdown": Page(
+        "geo-alt", welsh_lsoa_page, ("english_la", "welsh_lsoa", "welsh_lsoa_boundaries")
+    ),
+    "Comparing Welsh and English IoD": Page(
+        "kanban",
+        welsh_english_comparison_page,
+        ("english_la", "welsh_lsoa", "english_lsoa", "comparison", "welsh_lsoa_boundaries"),
+    ),
+}
+
+# Creates the Navigation bar on the side:
+with st.sidebar:
+    choose = option_menu(
+        "IoD Geographical Analysis",
+        list(PAGES),
+        icons=[page.icon for page in PAGES.values()],
+        default_index=0,
+        orientation="vertical",
+        styles={
+            "container": {
+                "padding": "5!important",
+                "background-color": NESTA_COLOURS[12],
+            },
+            "icon": {"color": NESTA_COLOURS[10], "font-size": "25px"},
+            "nav-link": {
+                "font-size": "16px",
+                "text-align": "left",
+                "margin": "0px",
+                "--hover-color": "#eee",
+            },
+            "nav-link-selected": {"background-color": NESTA_COLOURS[0]},
+        },
+    )
+
+
+# For the About page (which we have not password protected):
+if not PAGES[choose].password_protected:
+    PAGES[choose].render()
+
+
 # In order to password protect the rest of the app, put the rest of the code insidea a function. 
 def streamlit_iod():
     # Sets a spinner so we know that the report is updating as we change the user selections.
@@ -145,677 +432,20 @@ def streamlit_iod():
         # Possible regions in England.
         # Using session_state allows sharing of variables between reruns (so the app doesn't forget previous selections!)
         if "region_filter" not in st.session_state:
-            st.session_state.region_filter = [
-                "North East",
-                "North West",
-                "Yorkshire and The Humber",
-                "East Midlands",
-                "West Midlands",
-                "South West",
-                "East",
-                "South East",
-                "London",
-            ]
+            st.session_state.region_filter = list(get_area_hierarchy().regions("England"))
 
         # Possible IoD domains you want to look at.
         if "iod_filter" not in st.session_state:
             st.session_state.iod_filter = iod_names
-        # Loading in the IoD data at LA and LSOA level (query to insure we are only looking at the English Regions).
-        data = get_english_la_iod_2019().query("region_name in @st.session_state.region_filter")
-        lsoa_data = get_english_lsoa_iod_2019().query(
-            "region_name in @st.session_state.region_filter"
-        )
-        data_wales = get_welsh_lsoa_iod_2019()
-        data_welsh_english = get_english_wales_lsoa_iod_2019()
-
-        la_melt = (
-            pd.melt(
-                data,
-                id_vars=["lad19cd", "lad19nm", "region_name"],
-                value_vars=iod_indices,
-            )
-            .rename(columns={"variable": "iod", "value": "decile"})
-            .assign(iod_name=lambda df: df.iod.replace(iod_dict_inv))
-        )
-
-        geodata_la = get_english_la_shapefiles_2019()
-        geodata_lsoa_wales = get_welsh_lsoa_shapefiles_2011()
-
-        # For the LA Breakdown page:
-        if choose == "English LA Breakdown":
-
-            # Altair selections (allows you to select a local authority):
-            la_select = alt.selection_single(fields=["lad19nm"])
-            la_select_all = alt.selection_single(fields=["lad19nm"], empty="none")
-            st.title("Local Authorities in England, broken down by IoD Decile")
-            st.markdown(
-                """
-            The first map shows the overall Index of Multiple deprivation for England. The second map shows a region of England where you can select
-            which IoD you wish to look at. Attached to the second map is a bar chart that shows the IoD deciles for the Local Authority (LA)
-            selected on the map.
-
-            You can click on each LA to highlight it, double-click to remove the selection and hover over the map to see the deciles.
-            """
-            )
-            # Choose the colour palette:
-            colour_choice = st.selectbox(
-                "Choose a colour palette for the maps:",
-                options=list(colour_palettes.keys()),
-            )
-            color_ = alt.condition(
-                la_select,
-                alt.Color(
-                    f'{iod_dict["Index of Multiple Deprivation (IMD)"]}:O',
-                    scale=colour_palettes[colour_choice],
-                    title="Index of Multiple Deprivation (IMD)",
-                    legend=alt.Legend(orient="top"),
-                ),
-                alt.value("lightgray"),
-            )
-            choro_all = (
-                alt.Chart(geodata_la)
-                .mark_geoshape(
-                    stroke="black",
-                )
-                .transform_lookup(
-                    lookup="properties.lad19nm",
-                    from_=alt.LookupData(
-                        data,
-                        "lad19nm",
-                        ["lad19cd", "lad19nm", "region_name"] + iod_indices,
-                    ),
-                )
-                .transform_filter(
-                    alt.FieldOneOfPredicate(
-                        field="properties.lad19nm", oneOf=data.lad19nm.unique()
-                    )
-                )
-                .encode(
-                    color=color_,
-                    tooltip=[alt.Tooltip("lad19nm:N", title="Local Authority")]
-                    + [
-                        alt.Tooltip(
-                            f"{ind}:O", title=name, format="1.2f"
-                        )
-                        for ind, name in zip(iod_indices, iod_tooltip)
-                    ],
-                )
-                .add_selection(la_select)
-                .properties(width=500, height=500)
-            )
-            st.altair_chart(
-                choro_all.configure_legend(
-                    labelLimit=0,
-                    titleLimit=0,
-                    titleFontSize=13,
-                    labelFontSize=13,
-                    symbolStrokeWidth=1.5,
-                    symbolSize=150,
-                )
-                .configure_view(strokeWidth=0)
-                .configure_axis(
-                    labelLimit=0,
-                    titleLimit=0,
-                ),
-                use_container_width=True,
-            )
-
-            # Select box to pick the region you wish to look at.
-            region_selection = st.selectbox(
-                "To look in closer detail, choose a region of England:",
-                options=sorted(st.session_state.region_filter),
-            )
-            # Select box to pick the IoD you wish to look at.
-            iod_selection = st.selectbox(
-                "Choose a IoD Decile to view on the map:",
-                options=st.session_state.iod_filter,
-            )
-
-            st.markdown(
-                "Click on one of the LAs to bring up the deciles in a graph below."
-            )
-
-            las_to_plot = list(data[data["region_name"] == region_selection].lad19nm)
-            color_las = alt.condition(
-                la_select,
-                alt.Color(
-                    f"{iod_dict[iod_selection]}:O",
-                    scale=colour_palettes[colour_choice],
-                    title=iod_selection,
-                    legend=alt.Legend(orient="top"),
-                ),
-                alt.value("lightgray"),
-            )
-
-            choro_legend = (
-                alt.Chart(geodata_la)
-                .mark_geoshape(
-                    stroke="black",
-                )
-                .transform_lookup(
-                    lookup="properties.lad19nm",
-                    from_=alt.LookupData(
-                        data,
-                        "lad19nm",
-                        ["lad19cd", "lad19nm", "region_name"] + iod_indices,
-                    ),
-                )
-                .transform_filter(
-                    alt.FieldOneOfPredicate(
-                        field="properties.lad19nm", oneOf=las_to_plot
-                    )
-                )
-                .encode(
-                    color=color_las,
-                    tooltip=[alt.Tooltip("lad19nm:N", title="Local Authority")]
-                    + [
-                        alt.Tooltip(
-                            f"{ind}:O", title=name, format="1.2f"
-                        )
-                        for ind, name in zip(iod_indices, iod_tooltip)
-                    ],
-                )
-                .add_selection(la_select, la_select_all)
-                .properties(width=500, height=500)
-            )
-            choro_bar = (
-                alt.Chart(la_melt)
-                .mark_bar(color=NESTA_COLOURS[1])
-                .encode(
-                    x=alt.X(
-                        "decile:Q",
-                        title="Decile",
-                        scale=alt.Scale(domain=[0, 10]),
-                        axis=alt.Axis(tickMinStep=1),
-                    ),
-                    y=alt.Y(
-                        "iod_name:N",
-                        title="Indices of Deprivation",
-                        sort=iod_names,
-                        axis=alt.Axis(titlePadding=330),
-                    ),
-                    # If you wanted to add a color scheme to the bars:
-                    # color = alt.Color(
-                    #         'decile:Q',
-                    #         scale=alt.Scale(domain=domain, range=range_),
-                    #         legend=None)
-                )
-                .transform_filter(la_select_all)
-                .properties(width=400, height=400)
-            )
-            la_text = (
-                alt.Chart(la_melt)
-                .mark_text(dy=-210, size=20, color="darkgray")
-                .encode(text="lad19nm:N")
-                .transform_filter(la_select_all)
-            )
-            bar_chart = alt.layer(choro_bar, la_text)
-            st.altair_chart(
-                (
-                    alt.vconcat(choro_legend, bar_chart, center=True)
-                    .configure_legend(
-                        labelLimit=0,
-                        titleLimit=0,
-                        titleFontSize=13,
-                        labelFontSize=13,
-                        symbolStrokeWidth=1.5,
-                        symbolSize=150,
-                    )
-                    .configure_view(strokeWidth=0)
-                    .configure_axis(
-                        labelLimit=0,
-                        titleLimit=0,
-                    )
-                ),
-                use_container_width=True,
-            )
-        # Comparing different Local Authorities
-        elif choose == "English LA Comparison":
-            st.title("Comparing the IoD for Local Authorities in England")
-            st.markdown(
-                """
-            This bar chart allows you to select up to five Local Authorities (LAs) across England to compare the different IoDs.
-            """
-            )
-            if "all_las" not in st.session_state:
-                st.session_state.all_las = data.lad19nm.unique()
-            la_compare_select = st.multiselect(
-                "Choose up to five LAs:",
-                options=sorted(st.session_state.all_las),
-                default=None,
-                max_selections=5,
-            )
-            la_iod_select = st.selectbox(
-                "Choose IoD Decile to view on the map:",
-                options=st.session_state.iod_filter,
-                key="iod_compare",
-            )
-            la_compare = la_melt[
-                (la_melt.lad19nm.isin(la_compare_select))
-                & (la_melt.iod_name == la_iod_select)
-            ]
-
-            compare_las = (
-                alt.Chart(la_compare)
-                .mark_bar(size=50, color=NESTA_COLOURS[1])
-                .encode(
-                    x=alt.X(
-                        "decile:Q",
-                        title="Decile",
-                        scale=alt.Scale(domain=[0, 10]),
-                        axis=alt.Axis(tickMinStep=1),
-                    ),
-                    y=alt.Y("lad19nm:N", title=None),
-                    # color = alt.Color(
-                    #     'lad19nm:N',
-                    #     legend=None),
-                )
-                .properties(width=600, height=400)
-            )
-            st.altair_chart(
-                compare_las.configure_view(strokeWidth=0).configure_axis(
-                    labelLimit=0, titleLimit=0, labelFontSize=18
-                ),
-                use_container_width=True,
-            )
-
-        elif choose == "English LSOA Breakdown":
-            st.title("Lower Super Output Areas in England, broken down by IoD Decile")
-            st.markdown(
-                """
-            By selecting a region of England, an IoD and a Local Authority (LA), this map shows the breakdown at Lower Super Output Area (LSOA).
-
-            You can click on each LSOA to highlight it, double-click to remove the selection and hover over the map to see the deciles.
-            """
-            )
-            # Choose the colour palette:
-            colour_choice = st.selectbox(
-                "Choose a colour palette for the maps:",
-                options=list(colour_palettes.keys()),
-            )
-            # Select box to pick the region you wish to look at.
-            region_selection = st.selectbox(
-                "Choose a region of England:",
-                options=sorted(st.session_state.region_filter),
-                key="region_lsoas",
-            )
-            las_to_plot = list(data[data["region_name"] == region_selection].lad19nm)
-            data_lsoa = lsoa_data[lsoa_data.region_name == region_selection]
-            iod_selection = st.selectbox(
-                "Choose IoD Decile to view on the map:",
-                options=st.session_state.iod_filter,
-                key="iod",
-            )
-            la_selection = st.selectbox(
-                "Choose a local authority from the region chosen above to see the LSOA breakdown:",
-                sorted(las_to_plot),
-            )
-            # Dataset is larger than 5000, so we partition it into two smaller datasets.
-            las_to_split = [
-                "Brighton and Hove",
-                "Medway",
-                "Milton Keynes",
-                "Southampton",
-                "Portsmouth",
-            ]
-            if la_selection in las_to_split:
-                filter_data_lsoa = data_lsoa[data_lsoa.lad19nm.isin(las_to_split)]
-            else:
-                filter_data_lsoa = data_lsoa[~data_lsoa.lad19nm.isin(las_to_split)]
-
-            lsoas_to_plot = list(lsoa_data[lsoa_data.lad19nm == la_selection].lsoa11nm)
-            region_dict = dict(
-                zip(
-                    st.session_state.region_filter,
-                    preprocess_strings(pd.Series(st.session_state.region_filter)),
-                )
-            )
-            geodata_lsoa = get_english_lsoa_shapefiles_2011(region_dict[region_selection])
-            lsoa_select = alt.selection_single(fields=["lsoa11nm"])
-            color_lsoa = alt.condition(
-                lsoa_select,
-                alt.Color(
-                    f"{iod_dict[iod_selection]}:O",
-                    scale=colour_palettes[colour_choice],
-                    title=f"{iod_selection}",
-                    legend=alt.Legend(orient="top"),
-                ),
-                alt.value("lightgray"),
-            )
-            choro_lsoa = (
-                alt.Chart(geodata_lsoa)
-                .mark_geoshape(
-                    stroke="black",
-                )
-                .transform_lookup(
-                    lookup="properties.lsoa11nm",
-                    from_=alt.LookupData(
-                        filter_data_lsoa,
-                        "lsoa11nm",
-                        ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm"] + iod_indices,
-                    ),
-                )
-                .transform_filter(
-                    alt.FieldOneOfPredicate(
-                        field="properties.lsoa11nm", oneOf=lsoas_to_plot
-                    )
-                )
-                .encode(
-                    color=color_lsoa,
-                    tooltip=[alt.Tooltip("lsoa11nm:N", title="LSOA")]
-                    + [
-                        alt.Tooltip(
-                            f"{ind}:O", title=name, format="1.2f"
-                        )
-                        for ind, name in zip(iod_indices, iod_tooltip)
-                    ],
-                    opacity=alt.condition(lsoa_select, alt.value(1), alt.value(0.2)),
-                )
-                .add_selection(lsoa_select)
-                .project(type="identity", reflectY=True)
-                .properties(width=500,height=500)
-            )
-            st.altair_chart(
-                choro_lsoa.configure_legend(
-                    labelLimit=0,
-                    titleLimit=0,
-                    titleFontSize=13,
-                    labelFontSize=13,
-                    symbolStrokeWidth=1.5,
-                    symbolSize=150,
-                )
-                .configure_view(strokeWidth=0)
-                .configure_axis(
-                    labelLimit=0,
-                    titleLimit=0,
-                ),
-                use_container_width=True,
-            )
-        elif choose == "Welsh LSOA Breakdown":
-        
-            st.title("Lower Super Output Areas in Wales, broken down by IoD Decile")
-            st.markdown(
-                """
-            By selecting a region of Wales, an IoD and a Local Authority (LA), this map shows the breakdown at Lower Super Output Area (LSOA).
-
-            You can click on each LSOA to highlight it, double-click to remove the selection and hover over the map to see the deciles.
-            """
-            )
-            # Choose the colour palette:
-            colour_choice = st.selectbox(
-                "Choose a colour palette for the maps:",
-                options=list(colour_palettes.keys()),
-            )
-            # Select box to pick the region you wish to look at.
-            region_selection = st.selectbox(
-                "Choose a region of Wales:",
-                options=sorted(data_wales.region_name.unique()),
-                key="region_lsoas_wales",
-            )
-            welsh_las_to_plot = list(data_wales[data_wales["region_name"] == region_selection].lad19nm.unique())
-            wiod_selection = st.selectbox(
-                "Choose IoD Decile to view on the map:",
-                options=wiod_names,
-                key="iod",
-            )
-            welsh_la_selection = st.selectbox(
-                "Choose a local authority from the region chosen above to see the LSOA breakdown:",
-                sorted(welsh_las_to_plot),
-            )
-
-            welsh_lsoas_to_plot = list(data_wales[data_wales.lad19nm == welsh_la_selection].lsoa11nm)
-            lsoa_select_wales = alt.selection_single(fields=["lsoa11nm"])
-            color_lsoa_wales = alt.condition(
-                lsoa_select_wales,
-                alt.Color(
-                    f"{wiod_dict[wiod_selection]}:O",
-                    scale=colour_palettes[colour_choice],
-                    title=f"{wiod_selection}",
-                    legend=alt.Legend(orient="top"),
-                ),
-                alt.value("lightgray"),
-            )
-            choro_lsoa = (
-                alt.Chart(geodata_lsoa_wales)
-                .mark_geoshape(
-                    stroke="black",
-                )
-                .transform_lookup(
-                    lookup="properties.lsoa11nm",
-                    from_=alt.LookupData(
-                        data_wales,
-                        "lsoa11nm",
-                        ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm"] + wiod_indices,
-                    ),
-                )
-                .transform_filter(
-                    alt.FieldOneOfPredicate(
-                        field="properties.lsoa11nm", oneOf=welsh_lsoas_to_plot
-                    )
-                )
-                .encode(
-                    color=color_lsoa_wales,
-                    tooltip=[alt.Tooltip("lsoa11nm:N", title="LSOA")]
-                    + [
-                        alt.Tooltip(
-                            f"{ind}:O", title=name, format="1.2f"
-                        )
-                        for ind, name in zip(wiod_indices, wiod_tooltip)
-                    ],
-                    opacity=alt.condition(lsoa_select_wales, alt.value(1), alt.value(0.2)),
-                )
-                .add_selection(lsoa_select_wales)
-                .project(type="identity", reflectY=True)
-            )
-            st.altair_chart(
-                choro_lsoa.configure_legend(
-                    labelLimit=0,
-                    titleLimit=0,
-                    titleFontSize=13,
-                    labelFontSize=13,
-                    symbolStrokeWidth=1.5,
-                    symbolSize=150,
-                )
-                .configure_view(strokeWidth=0)
-                .configure_axis(
-                    labelLimit=0,
-                    titleLimit=0,
-                ),
-                use_container_width=True,
-            )
-        if choose=='Comparing Welsh and English IoD':
-            st.title("Comparing IoD Deciles in England and Wales, by Lower Super Output Area (LSOA)")
-            st.markdown(
-            """
-            The open source comparison dataset published is comprised of the domains; Income, Employment, 
-            Income Deprivation Affecting Children Index (IDACI) and Income Deprivation Affecting Older People Index (IDAOPI) only.
-            
-            This figure allows you to compare a Local Authority (LA) in Wales to one in England for each IoD. 
-            You can select a region of England and an LA to produce a map which shows the breakdown at Lower Super Output Area (LSOA).
-            Similary you can select an LA from Wales to show the LSOA breakdown.
-
-            You can hold shift and click on LSOA's from England and Wales. Selecting the LSOA's on the map will show them on the bar chart 
-            below to compare the deciles. You can ouble-click to remove the all the selections and hover over the map to see the deciles.
-            """
-            )
-            # Choose the colour palette:
-            colour_choice = st.selectbox(
-                "Choose a colour palette for the maps:",
-                options=list(colour_palettes.keys()),
-            )
-            iod_combined_selection = st.selectbox(
-                "Choose IoD Decile to view on the map:",
-                options=iod_combined_names,
-            )
-            # Select box to pick the region you wish to look at.
-            region_selection = st.selectbox(
-                "Choose a region of England:",
-                options=sorted(st.session_state.region_filter),
-                key="region_lsoas",
-            )
-            las_to_plot = list(data_welsh_english[data_welsh_english["region_name"] == region_selection].lad19nm.unique())
-            data_lsoa = data_welsh_english[data_welsh_english.region_name == region_selection]
-            la_selection = st.selectbox(
-                "Choose a local authority from the region chosen above to compare the LSOA breakdown:",
-                sorted(las_to_plot),
-            )
-            welsh_la_selection = st.selectbox(
-                "Choose a local authority from Wales to compare the LSOA breakdown:",
-                sorted(data_wales.lad19nm.unique()),
-            )
-            # Dataset is larger than 5000, so we partition it into two smaller datasets.
-            las_to_split = [
-                "Brighton and Hove",
-                "Medway",
-                "Milton Keynes",
-                "Southampton",
-                "Portsmouth",
-            ]
-            if la_selection in las_to_split:
-                filter_data_lsoa = data_lsoa[data_lsoa.lad19nm.isin(las_to_split)]
-            else:
-                filter_data_lsoa = data_lsoa[~data_lsoa.lad19nm.isin(las_to_split)]
-
-            lsoas_to_plot = list(data_welsh_english[data_welsh_english.lad19nm == la_selection].lsoa11nm)
-            region_dict = dict(
-                zip(
-                    st.session_state.region_filter,
-                    preprocess_strings(pd.Series(st.session_state.region_filter)),
-                )
-            )
-            geodata_lsoa = get_english_lsoa_shapefiles_2011(region_dict[region_selection])
-            lsoa_select_multi = alt.selection_multi(fields=["lsoa11nm"])
-            lsoa_select_multi_empty = alt.selection_multi(fields=["lsoa11nm"], empty='none')
-            color_lsoa = alt.condition(
-                lsoa_select_multi,
-                alt.Color(
-                    f"{iod_combined_dict[iod_combined_selection]}:O",
-                    scale=colour_palettes[colour_choice],
-                    title=f"{iod_combined_selection}",
-                    legend=alt.Legend(orient="top"),
-                ),
-                alt.value("lightgray"),
-            )
-            choro_lsoa = (
-                alt.Chart(geodata_lsoa)
-                .mark_geoshape(
-                    stroke="black",
-                )
-                .transform_lookup(
-                    lookup="properties.lsoa11nm",
-                    from_=alt.LookupData(
-                        filter_data_lsoa,
-                        "lsoa11nm",
-                        ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm"] + iod_combined_indices,
-                    ),
-                )
-                .transform_filter(
-                    alt.FieldOneOfPredicate(
-                        field="properties.lsoa11nm", oneOf=lsoas_to_plot
-                    )
-                )
-                .encode(
-                    color=color_lsoa,
-                    tooltip=[alt.Tooltip("lsoa11nm:N", title="LSOA")]
-                    + [
-                        alt.Tooltip(
-                            f"{ind}:O", title=name, format="1.2f"
-                        )
-                        for ind, name in zip(iod_combined_indices, iod_combined_tooltip)
-                    ],
-                    opacity=alt.condition(lsoa_select_multi, alt.value(1), alt.value(0.2)),
-                )
-                .add_selection(lsoa_select_multi,lsoa_select_multi_empty)
-                .project(type="identity", reflectY=True)
-                .properties(width=500,height=500,title=la_selection)
-            )
-
-            welsh_lsoas_to_plot = list(data_welsh_english[data_welsh_english.lad19nm == welsh_la_selection].lsoa11nm)
-
-            wales_data_comp = data_welsh_english[data_welsh_english.lsoa11nm.isin(welsh_lsoas_to_plot)]
-            lsoa_select_wales_multi = alt.selection_multi(fields=["lsoa11nm"])
-            lsoa_select_wales_multi_empty = alt.selection_multi(fields=["lsoa11nm"],empty='none')
-            color_lsoa_wales = alt.condition(
-                lsoa_select_wales_multi,
-                alt.Color(
-                    f"{iod_combined_dict[iod_combined_selection]}:O",
-                    scale=colour_palettes[colour_choice],
-                    title=f"{iod_combined_selection}",
-                    legend=alt.Legend(orient="top"),
-                ),
-                alt.value("lightgray"),
-            )
-            choro_lsoa_wales = (
-                alt.Chart(geodata_lsoa_wales)
-                .mark_geoshape(
-                    stroke="black",
-                )
-                .transform_lookup(
-                    lookup="properties.lsoa11nm",
-                    from_=alt.LookupData(
-                        wales_data_comp,
-                        "lsoa11nm",
-                        ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm"] + iod_combined_indices,
-                    ),
-                )
-                .transform_filter(
-                    alt.FieldOneOfPredicate(
-                        field="properties.lsoa11nm", oneOf=welsh_lsoas_to_plot
-                    )
-                )
-                .encode(
-                    color=color_lsoa_wales,
-                    tooltip=[alt.Tooltip("lsoa11nm:N", title="LSOA")]
-                    + [
-                        alt.Tooltip(
-                            f"{ind}:O", title=name, format="1.2f"
-                        )
-                        for ind, name in zip(iod_combined_indices, iod_combined_tooltip)
-                    ],
-                    opacity=alt.condition(lsoa_select_wales_multi, alt.value(1), alt.value(0.2)),
-                )
-                .add_selection(lsoa_select_wales_multi,lsoa_select_wales_multi_empty)
-                .project(type="identity", reflectY=True)
-                .properties(title=welsh_la_selection)
-            )
-            choro_combined = alt.hconcat(choro_lsoa,choro_lsoa_wales)
-
-            bar_chart = (
-                alt.Chart(data_welsh_english)
-                .mark_bar(color=NESTA_COLOURS[1])
-                .encode(
-                    x=alt.X(
-                        f"{iod_combined_dict[iod_combined_selection]}:Q",
-                        title=f"{iod_combined_selection}",
-                        scale=alt.Scale(domain=[0, 10]),
-                        axis=alt.Axis(tickMinStep=1),
-                    ),
-                    y=alt.Y(
-                        "lsoa11nm:N",
-                        title="LSOA Name",
-                    ),
-                )
-                .transform_filter(lsoa_select_multi_empty | lsoa_select_wales_multi_empty)
-                .properties(width=400, height=400)
-            )
-
-            st.altair_chart(
-                alt.vconcat(choro_combined,bar_chart, center=True).configure_legend(
-                    labelLimit=0,
-                    titleLimit=0,
-                    titleFontSize=13,
-                    labelFontSize=13,
-                    symbolStrokeWidth=1.5,
-                    symbolSize=150,
-                )
-                .configure_view(strokeWidth=0)
-                .configure_axis(
-                    labelLimit=0,
-                    titleLimit=0,
-                ),
-                use_container_width=True,
-            )
 
+        page = PAGES[choose]
+        if page.password_protected:
+            # Only loads the data the chosen page depends on.
+            with timer("page_data", page=choose):
+                load_page_datasets(page.datasets)
+            with timer("page", page=choose):
+                page.render()
+            dump_prometheus()
 
 
 # This adds on the password protection
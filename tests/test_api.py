@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from utils.utils_api import ApiError, etag_matches, get_response, parse_query
+
+
+def status(path, query_string):
+    try:
+        get_response(path, parse_query(query_string))
+    except ApiError as error:
+        return error.status
+    return 200
+
+
+@pytest.mark.parametrize(
+    "query_string, expected",
+    [
+        ("type=la_comparison&lad19cd=E06000001&lad19cd=E06000002", 200),
+        ("type=la_comparison&lad19cd=W06000001", 400),
+        ("type=la_comparison&lad19cd=E99999999", 404),
+        ("type=lsoa&lad19cd=E06000001", 200),
+        ("type=lsoa&dataset=welsh&lad19cd=E06000001", 400),
+        ("type=lsoa&lad19cd=E99999999", 404),
+        ("type=lsoa&dataset=comparison&lad19cd=W06000015", 200),
+        ("type=welsh_english_comparison&lad19cd=E06000001&welsh_lad19cd=W06000015", 200),
+        ("type=welsh_english_comparison&lad19cd=W06000015&welsh_lad19cd=E06000001", 400),
+        ("type=welsh_english_comparison&lad19cd=E06000001&welsh_lad19cd=W99999999", 404),
+    ],
+)
+def test_chart_status(query_string, expected):
+    assert status("/chart", query_string) == expected
+
+
+def test_la_comparison_spec_has_the_las():
+    body = get_response("/chart", parse_query("type=la_comparison&lad19cd=E06000001")).body
+    datasets = json.loads(body)["datasets"]
+    assert any(records for records in datasets.values())
+
+
+def test_unknown_path():
+    assert status("/nowhere", "") == 404
+
+
+@pytest.mark.parametrize(
+    "query_string, regions",
+    [
+        ("dataset=welsh&region=North+Wales", {"North Wales"}),
+        ("dataset=comparison&region=London", {"London"}),
+        ("dataset=comparison&region=London&region=North+Wales", {"London", "North Wales"}),
+    ],
+)
+def test_lsoas_filter_every_dataset_by_region(query_string, regions):
+    records = json.loads(get_response("/lsoas", parse_query(query_string)).body)
+    assert records
+    assert {record["region_name"] for record in records} == regions
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    ["dataset=welsh&region=London", "dataset=comparison&region=Nowhere", "region=North+Wales"],
+)
+def test_lsoas_reject_regions_of_other_datasets(query_string):
+    assert status("/lsoas", query_string) == 400
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", W/"abc"', True),
+        ("*", True),
+        ('"ab"', False),
+        ('"abcd"', False),
+        ("", False),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, '"abc"') is expected
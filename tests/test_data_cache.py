@@ -0,0 +1,29 @@
+from getters.iod_data_loader import _read_csv, clear_iod_data_cache
+from getters.iod_mmap_store import open_iod_store
+from utils.utils_api import get_response, parse_query
+from utils.utils_charts import la_overview_chart
+from utils.utils_hierarchy import _build_hierarchy, get_area_hierarchy
+from utils.utils_lsoa_index import _build_lsoa_index, get_lsoa_index
+from utils.utils_page_data import _build_region_index, get_la_data
+
+
+def test_clears_the_derived_caches():
+    regions = get_area_hierarchy().regions("England")
+    get_lsoa_index()
+    get_la_data(regions)
+    la_overview_chart(regions, "Spring")
+    get_response("/las", parse_query("region=London"))
+    caches = [
+        _build_hierarchy,
+        _build_lsoa_index,
+        _build_region_index,
+        get_la_data,
+        la_overview_chart,
+        get_response,
+    ]
+    assert all(cache.cache_info().currsize for cache in caches)
+
+    clear_iod_data_cache()
+
+    for cache in caches + [_read_csv, open_iod_store]:
+        assert cache.cache_info().currsize == 0, cache.__name__
@@ -0,0 +1,34 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from utils.utils_enrichment import enrich_file
+from utils.utils_iod_values import iod_indices
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".csv"])
+def test_enrich_parquet_with_null_first_chunk(tmp_path, suffix):
+    # The note column is all null in the first chunk, text afterwards.
+    rows = pd.DataFrame(
+        {
+            "lsoa11cd": ["E01000001", "W01000001", "E01000002", "X00000000"],
+            "note": [None, None, "a", "b"],
+        }
+    )
+    input_path = tmp_path / "input.parquet"
+    pq.write_table(pa.Table.from_pandas(rows), input_path)
+    output_path = tmp_path / f"output{suffix}"
+
+    counts = enrich_file(input_path, output_path, chunk_rows=2)
+
+    assert counts == {"rows": 4, "matched": 3}
+    if suffix == ".parquet":
+        output = pd.read_parquet(output_path)
+    else:
+        output = pd.read_csv(output_path)
+    assert output.note.tolist()[2:] == ["a", "b"]
+    assert output.note.iloc[:2].isna().all()
+    assert output.lsoa11cd.tolist() == rows.lsoa11cd.tolist()
+    assert output[iod_indices[0]].iloc[[0, 2]].notna().all()
+    assert output[iod_indices[0]].isna().iloc[3]
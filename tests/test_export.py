@@ -0,0 +1,84 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.lsoa_la_tiles_2011 import LA_TILES_DIR_NAME
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_export import (
+    EXPORT_CHUNK_ROWS,
+    ExportSelection,
+    clear_export_cache,
+    export_selection,
+    get_export_formats,
+    iter_export,
+    write_export,
+)
+
+LSOA_SELECTION = ExportSelection("lsoa", lad19cds=("E06000001",))
+
+
+@pytest.fixture
+def shapefiles_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("IOD_SHAPEFILES_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_geojson_needs_the_tiles(shapefiles_dir):
+    assert "GeoJSON" not in get_export_formats(LSOA_SELECTION)
+    with pytest.raises(ValueError):
+        write_export(LSOA_SELECTION, "GeoJSON", io.BytesIO())
+
+    lsoas = get_english_lsoa_iod_2019(columns=["lsoa11cd", "lad19cd"])
+    lsoa11cds = lsoas[lsoas.lad19cd == "E06000001"].lsoa11cd.astype(str)
+    geometry = {"type": "Point", "coordinates": [0, 0]}
+    features = [{"properties": {"lsoa11cd": code}, "geometry": geometry} for code in lsoa11cds]
+    tile = shapefiles_dir / LA_TILES_DIR_NAME / "E06000001.geojson"
+    tile.parent.mkdir()
+    tile.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+
+    assert "GeoJSON" in get_export_formats(LSOA_SELECTION)
+    buffer = io.BytesIO()
+    write_export(LSOA_SELECTION, "GeoJSON", buffer)
+    exported = json.loads(buffer.getvalue())["features"]
+    assert len(exported) == len(lsoa11cds)
+    assert all(feature["geometry"] == geometry for feature in exported)
+
+
+def test_exports_are_memoized_on_the_selection():
+    clear_export_cache()
+    body = export_selection(LSOA_SELECTION, "CSV")
+    assert export_selection(ExportSelection("lsoa", lad19cds=("E06000001",)), "CSV") is body
+    assert export_selection.cache_info().currsize == 1
+
+    buffer = io.BytesIO()
+    write_export(LSOA_SELECTION, "CSV", buffer)
+    assert buffer.getvalue() == body
+
+
+def test_mixed_selection_exports_both_countries():
+    selection = ExportSelection("lsoa", lad19cds=("E06000001", "W06000015"))
+    exported = pd.read_csv(io.BytesIO(export_selection(selection, "CSV")))
+    english = get_english_lsoa_iod_2019(columns=["lsoa11cd", "lad19cd"])
+    welsh = get_welsh_lsoa_iod_2019(columns=["lsoa11cd", "lad19cd"])
+    expected = (
+        english[english.lad19cd == "E06000001"].lsoa11cd.tolist()
+        + welsh[welsh.lad19cd == "W06000015"].lsoa11cd.tolist()
+    )
+    assert exported.lsoa11cd.tolist() == expected
+    assert exported.wimd_deciles.notna().tolist() == [code.startswith("W") for code in expected]
+
+
+@pytest.mark.parametrize("file_format", ["CSV", "Parquet"])
+def test_exports_stream_in_chunks(file_format):
+    # Every LSOA of England, a few chunks of rows.
+    lad19cds = get_english_lsoa_iod_2019(columns=["lad19cd"]).lad19cd.astype(str)
+    selection = ExportSelection("lsoa", lad19cds=tuple(sorted(set(lad19cds))))
+    chunks = list(iter_export(selection, file_format))
+    assert len(chunks) > len(lad19cds) // EXPORT_CHUNK_ROWS
+    assert max(map(len, chunks)) < len(b"".join(chunks)) / 2
+    read = pd.read_csv if file_format == "CSV" else pd.read_parquet
+    exported = read(io.BytesIO(b"".join(chunks)))
+    assert len(exported) == len(lad19cds)
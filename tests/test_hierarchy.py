@@ -0,0 +1,55 @@
+import shutil
+
+import pandas as pd
+
+from getters.iod_data_loader import IOD_DATA_FILES
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from utils.utils_hierarchy import _old_la_codes, get_area_hierarchy
+from utils.utils_lsoa_index import get_la_lsoa_index, get_lsoa_index
+
+
+def test_hierarchy_matches_lsoa_index():
+    hierarchy = get_area_hierarchy()
+    index = get_lsoa_index()
+    for country in ("England", "Wales"):
+        for region in hierarchy.regions(country):
+            expected = index[index.region_name == region].lad19nm.astype(str).unique()
+            assert hierarchy.las(region) == tuple(sorted(expected))
+    assert set(hierarchy.la_codes.values()) == set(index.lad19cd.astype(str))
+    assert hierarchy.la_code("Cardiff") == "W06000015"
+
+
+def test_caches_follow_data_dir(tmp_path, monkeypatch, request):
+    default = get_area_hierarchy()
+    for file_name in IOD_DATA_FILES:
+        shutil.copy(request.config.rootpath / "data" / file_name, tmp_path / file_name)
+    for file_name in ["la_english_iod_2019.csv", "lsoa_english_iod_2019.csv"]:
+        data = pd.read_csv(tmp_path / file_name)
+        data["lad19nm"] = data.lad19nm.replace({"Hartlepool": "Hartlepool Renamed"})
+        data.to_csv(tmp_path / file_name, index=False)
+
+    monkeypatch.setenv("IOD_DATA_DIR", str(tmp_path))
+    assert "Hartlepool Renamed" in get_area_hierarchy().las("North East")
+    assert get_area_hierarchy().la_code("Hartlepool Renamed") == default.la_code("Hartlepool")
+    assert "Hartlepool Renamed" in set(get_lsoa_index().lad19nm.astype(str))
+
+    monkeypatch.delenv("IOD_DATA_DIR")
+    assert get_area_hierarchy() is default
+
+
+def test_la_code_of_old_comparison_name():
+    # The comparison table still calls Folkestone and Hythe by its old name.
+    hierarchy = get_area_hierarchy()
+    _old_la_codes.cache_clear()
+    assert hierarchy.la_code("Folkestone and Hythe") == "E07000112"
+    # Current names never read the comparison table.
+    assert _old_la_codes.cache_info().currsize == 0
+    assert hierarchy.la_code("Shepway") == "E07000112"
+    assert len(get_la_lsoa_index(hierarchy.la_code("Shepway"))) > 0
+
+
+def test_la_code_of_every_comparison_la():
+    hierarchy = get_area_hierarchy()
+    las = get_english_wales_lsoa_iod_2019(columns=["lad19nm", "lad19cd"]).drop_duplicates()
+    for lad19nm, lad19cd in zip(las.lad19nm.astype(str), las.lad19cd.astype(str)):
+        assert hierarchy.la_code(lad19nm) == lad19cd
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+from benchmarks.benchmark_import_time import APP_MODULES, FORBIDDEN_MODULES, REPO_DIR, app_imports
+
+
+def test_app_modules_are_the_apps_imports():
+    assert "utils.utils_charts" in APP_MODULES
+    assert "utils.utils_hierarchy" in APP_MODULES
+    assert "utils.utils_timing" in APP_MODULES
+    assert set(APP_MODULES) <= set(app_imports())
+
+
+def test_app_imports_leave_the_heavy_libraries_unimported():
+    # Everything the app imports, in a fresh interpreter.
+    code = "; ".join(f"import {module}" for module in app_imports()) + (
+        "; import sys; print(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    imported = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    assert "streamlit" in imported
+    assert not set(FORBIDDEN_MODULES) & set(imported)
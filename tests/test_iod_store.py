@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils.utils_api import get_response, parse_query
+from utils.utils_iod_store import STORE_DATASETS, get_iod_store
+
+
+def _strings(column):
+    return column.astype(object).where(column.notna(), None).astype(str).tolist()
+
+
+@pytest.mark.parametrize("dataset", list(STORE_DATASETS))
+def test_pivot_round_trips_the_wide_table(dataset):
+    spec = STORE_DATASETS[dataset]
+    wide = spec.getter()
+    pivot = get_iod_store().pivot(dataset)
+    assert list(pivot.columns) == list(wide.columns)
+    for column in wide.columns:
+        assert _strings(pivot[column]) == _strings(wide[column]), column
+    for index in spec.indices:
+        expected = wide[index].to_numpy(dtype=float, na_value=np.nan)
+        actual = pivot[index].to_numpy(dtype=float, na_value=np.nan)
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_areas_keep_each_datasets_own_la():
+    store = get_iod_store()
+    las = store.pivot("english_la", area_codes=["E07000112"])
+    assert las.lad19nm.tolist() == ["Folkestone and Hythe"]
+    comparison = store.pivot("comparison", area_codes=["W01000060"])
+    assert comparison[["lad19cd", "lad19nm"]].astype(str).values.tolist() == [["W06000023", "Powys"]]
+    welsh = store.pivot("welsh_lsoa", area_codes=["W01000060"])
+    assert welsh.lad19cd.astype(str).tolist() == ["W06000002"]
+    comparison = get_response("/lsoas", parse_query("dataset=comparison&lad19cd=E07000112")).body
+    assert {record["lad19nm"] for record in json.loads(comparison)} == {"Shepway"}
+
+
+def test_api_lsoas_match_the_wide_table():
+    spec = STORE_DATASETS["welsh_lsoa"]
+    wide = spec.getter()
+    wide = wide[wide.lad19cd == "W06000015"]
+    body = get_response("/lsoas", parse_query("dataset=welsh&lad19cd=W06000015")).body
+    records = json.loads(body)
+    assert [record["lsoa11cd"] for record in records] == wide.lsoa11cd.astype(str).tolist()
+    for index in spec.indices:
+        assert [record[index] for record in records] == wide[index].astype(int).tolist()
+
+
+def test_api_las_filter_by_region():
+    records = json.loads(get_response("/las", parse_query("region=North+East")).body)
+    assert len(records) == 12
+    assert {record["region_name"] for record in records} == {"North East"}
+    assert {record["region_code"] for record in records} == {"E12000001"}
+    assert {record["country"] for record in records} == {"England"}
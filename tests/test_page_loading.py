@@ -0,0 +1,51 @@
+import pytest
+
+from benchmarks.benchmark_app import run_page_process
+
+ENGLISH_LA = "getters.english_la_iod_data_2019.get_english_la_iod_2019"
+ENGLISH_LSOA = "getters.english_lsoa_iod_data_2019.get_english_lsoa_iod_2019"
+WELSH_LSOA = "getters.welsh_lsoa_iod_data_2019.get_welsh_lsoa_iod_2019"
+COMPARISON = "getters.english_wales_comparison_iod_2019.get_english_wales_lsoa_iod_2019"
+ENGLISH_LA_BOUNDARIES = "getters.la_shapefiles_2019.get_english_la_shapefiles_2019"
+ENGLISH_LSOA_BOUNDARIES = "getters.lsoa_shapefiles_2011.get_english_lsoa_shapefiles_2011"
+WELSH_LSOA_BOUNDARIES = "getters.lsoa_shapefiles_2011.get_welsh_lsoa_shapefiles_2011"
+# Cold start of a page (first rerun of a fresh process), generous for slow CI machines.
+MAX_COLD_SECONDS = 15
+# Datasets each page loads (its Page.datasets, plus the English LSOA boundaries its charts load
+# per LA); the hierarchy behind the option lists reads the English LA and Welsh LSOA tables on
+# every page.
+PAGE_DATASETS = {
+    "English LA Breakdown": {ENGLISH_LA, WELSH_LSOA, ENGLISH_LA_BOUNDARIES},
+    "English LA Comparison": {ENGLISH_LA, WELSH_LSOA},
+    "English LSOA Breakdown": {ENGLISH_LA, WELSH_LSOA, ENGLISH_LSOA, ENGLISH_LSOA_BOUNDARIES},
+    "Welsh LSOA Breakdown": {ENGLISH_LA, WELSH_LSOA, WELSH_LSOA_BOUNDARIES},
+    "Comparing Welsh and English IoD": {
+        ENGLISH_LA,
+        WELSH_LSOA,
+        ENGLISH_LSOA,
+        COMPARISON,
+        ENGLISH_LSOA_BOUNDARIES,
+        WELSH_LSOA_BOUNDARIES,
+    },
+}
+# Everything the app loaded on every page before the pages declared their datasets.
+DATASET_GETTERS = {
+    ENGLISH_LA,
+    ENGLISH_LSOA,
+    WELSH_LSOA,
+    COMPARISON,
+    ENGLISH_LA_BOUNDARIES,
+    WELSH_LSOA_BOUNDARIES,
+}
+
+
+@pytest.mark.parametrize("page", list(PAGE_DATASETS))
+def test_page_loads_only_its_datasets(page):
+    # The default selection, in a fresh process.
+    result = run_page_process(page, n_regions=0, n_indices=0)[0]
+    assert result["exceptions"] == []
+    loaded = set(result["getter_seconds"]) & (DATASET_GETTERS | {ENGLISH_LSOA_BOUNDARIES})
+    assert loaded == PAGE_DATASETS[page]
+    # Fewer datasets than loading everything, e.g. the Welsh page skips the English LSOAs.
+    assert len(loaded - {ENGLISH_LSOA_BOUNDARIES}) < len(DATASET_GETTERS)
+    assert result["wall_seconds"] < MAX_COLD_SECONDS
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.benchmark_preprocessing import (
+    count_mismatches,
+    get_test_strings,
+    preprocess_strings_chained,
+)
+from utils.utils_preprocessing import preprocess_strings
+
+
+@pytest.mark.parametrize("name, strings", list(get_test_strings().items()))
+def test_matches_the_chained_version(name, strings):
+    assert count_mismatches(preprocess_strings(strings), preprocess_strings_chained(strings)) == 0
+
+
+@pytest.mark.parametrize("dtype", [object, "string"])
+def test_missing_values_are_kept(dtype):
+    strings = pd.Series(["A b", None, np.nan, 3], dtype=object)
+    if dtype == "string":
+        strings = strings.iloc[:3].astype("string")
+    cleaned = preprocess_strings(strings)
+    expected = preprocess_strings_chained(strings)
+    assert count_mismatches(cleaned, expected) == 0
+    assert cleaned.iloc[0] == "a_b"
+    if dtype == object:
+        assert cleaned.iloc[1] is None
+        assert cleaned.iloc[2] is not None and np.isnan(cleaned.iloc[2])
@@ -0,0 +1,78 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.benchmark_app import run_page_process
+from utils.utils_page_data import (
+    REGION_TABLES,
+    _build_region_index,
+    get_region_index,
+    get_region_rows,
+)
+
+# Peak memory allocated by a rerun on a new region; a rerun that copied the English LSOA or
+# comparison table (about 5 MB each, deep) would go over it.
+MAX_RERUN_PEAK_MB = 4
+
+
+@pytest.mark.parametrize("table", list(REGION_TABLES))
+def test_region_rows_match_a_mask(table):
+    data = REGION_TABLES[table]()
+    regions = sorted(data.region_name.dropna().astype(str).unique())
+    for region_names in [regions[:1], regions[1:3], regions, [], ["Nowhere"]]:
+        expected = data[data.region_name.isin(region_names).to_numpy()]
+        rows = get_region_rows(table, region_names)
+        assert rows.index.tolist() == expected.index.tolist()
+
+
+def test_all_regions_are_a_view_of_the_table():
+    data = REGION_TABLES["lsoa"]()
+    rows = get_region_rows("lsoa", data.region_name.astype(str).unique())
+    column = data.select_dtypes("uint8").columns[0]
+    assert len(rows) == len(data)
+    assert np.shares_memory(rows[column].to_numpy(), data[column].to_numpy())
+
+
+def test_region_index_does_not_copy_the_table():
+    data = REGION_TABLES["lsoa"]()
+    table_bytes = data.memory_usage().sum()
+    _build_region_index.cache_clear()
+    tracemalloc.start()
+    try:
+        get_region_index("lsoa")
+        index_bytes, index_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The index keeps row positions only (4 bytes a row), never a copy of the table.
+    assert index_bytes < table_bytes / 4
+    assert index_peak < table_bytes
+
+
+def test_region_index_follows_data_dir(tmp_path, monkeypatch, request):
+    default = get_region_index("la")
+    data = pd.read_csv(request.config.rootpath / "data" / "la_english_iod_2019.csv")
+    data["region_name"] = data.region_name.replace({"North East": "North East Renamed"})
+    data.to_csv(tmp_path / "la_english_iod_2019.csv", index=False)
+
+    monkeypatch.setenv("IOD_DATA_DIR", str(tmp_path))
+    positions = get_region_index("la").positions
+    assert "North East Renamed" in positions and "North East" not in positions
+    np.testing.assert_array_equal(
+        positions["North East Renamed"], default.positions["North East"]
+    )
+
+    monkeypatch.delenv("IOD_DATA_DIR")
+    assert get_region_index("la") is default
+
+
+@pytest.mark.parametrize("page", ["English LSOA Breakdown", "Comparing Welsh and English IoD"])
+def test_page_reruns_do_not_copy_the_tables(page):
+    # A cold rerun, then reruns on two new regions, in a fresh process.
+    results = run_page_process(page, n_regions=2, n_indices=1, trace_memory=True)
+    cold, warm = results[0], results[1:]
+    assert warm and all(result["exceptions"] == [] for result in results)
+    for result in warm:
+        assert result["rerun_peak_mb"] < MAX_RERUN_PEAK_MB
+        assert result["rerun_peak_mb"] < cold["rerun_peak_mb"] / 2
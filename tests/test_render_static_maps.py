@@ -0,0 +1,18 @@
+from pipeline.render_static_maps import INDEX_COLUMNS, get_map_jobs
+from utils.utils_hierarchy import get_area_hierarchy
+from utils.utils_lsoa_index import _build_country_index
+
+
+def test_map_jobs_cover_every_la_without_the_lsoa_index(tmp_path):
+    _build_country_index.cache_clear()
+    jobs = get_map_jobs(tmp_path, ["english", "welsh"], None, "Spring", ["png"])
+    assert _build_country_index.cache_info().currsize == 0
+    assert {job.la_code for job in jobs} == set(get_area_hierarchy().la_names)
+    welsh = [job for job in jobs if job.dataset == "welsh"]
+    assert welsh and all(job.la_code.startswith("W") for job in welsh)
+
+
+def test_map_jobs_of_chosen_las(tmp_path):
+    jobs = get_map_jobs(tmp_path, ["welsh"], ["W06000015"], "Spring", ["png", "svg"])
+    assert {job.la_code for job in jobs} == {"W06000015"}
+    assert len(jobs) == 2 * len(INDEX_COLUMNS["welsh"])
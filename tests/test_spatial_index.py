@@ -0,0 +1,62 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from pipeline.build_spatial_index import read_boundaries
+from utils.utils_spatial_index import AreaIndex, write_area_geometries
+
+# Two unit squares side by side, in British National Grid metres.
+CODES = np.array(["A", "B"], dtype=object)
+SQUARES = shapely.box([0, 1], [0, 0], [1, 2], [1, 1])
+CRS = "EPSG:27700"
+
+
+@pytest.fixture
+def area_index():
+    return AreaIndex(CODES, SQUARES, CRS)
+
+
+def test_locate_finds_the_area_of_each_point(area_index):
+    located = area_index.locate([0.5, 1.5, 1.0], [0.5, 0.5, 0.5])
+    assert located.code.tolist() == ["A", "B", "A"]
+    assert located.position.tolist() == [0, 1, 0]
+    assert located.distance.tolist() == [0.0, 0.0, 0.0]
+
+
+def test_locate_falls_back_to_the_nearest_area(area_index):
+    located = area_index.locate([-0.5, 2.5, 1.5], [0.5, 1.5, -3.0])
+    assert located.code.tolist() == ["A", "B", "B"]
+    np.testing.assert_allclose(located.distance, [0.5, np.sqrt(0.5), 3.0])
+
+
+def test_locate_without_a_close_enough_area(area_index):
+    located = area_index.locate([-0.5, -5.0], [0.5, 0.5], max_distance=1.0)
+    assert located.code.tolist() == ["A", None]
+    assert located.position.tolist() == [0, -1]
+    assert np.isnan(located.distance[1])
+    located = area_index.locate([-0.5], [0.5], nearest=False)
+    assert located.code.tolist() == [None]
+
+
+def test_index_round_trips_through_its_file(area_index, tmp_path):
+    path = tmp_path / "lsoa.parquet"
+    write_area_geometries(path, CODES, SQUARES, CRS)
+    index = AreaIndex.read(path)
+    assert index.codes.tolist() == ["A", "B"]
+    assert index.crs == CRS
+    assert shapely.equals(index.geometries, SQUARES).all()
+    assert index.locate([1.5], [0.5]).code.tolist() == ["B"]
+
+
+def test_read_boundaries_matches_the_code_column_in_any_case(tmp_path):
+    path = tmp_path / "lsoa_bfc.geojson"
+    boundaries = gpd.GeoDataFrame(
+        {"LSOA11CD": ["A", "B", "B"], "geometry": [*SQUARES, SQUARES[1]]}, crs=CRS
+    )
+    boundaries.to_file(path, driver="GeoJSON")
+    areas = read_boundaries([str(path)], "lsoa11cd")
+    assert areas.lsoa11cd.tolist() == ["A", "B"]
+    assert areas.crs.to_epsg() == 27700
+    with pytest.raises(ValueError):
+        read_boundaries([str(path)], "lad19cd")
@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.benchmark_app import run_page_process
+
+# Most bytes of chart specs (plus their datasets) a page may send to the browser for
+# one selection; the specs carry only the rows and columns of the chosen region or LA.
+MAX_SPEC_BYTES = {
+    "English LA Breakdown": 128_000,
+    "English LA Comparison": 16_000,
+    "English LSOA Breakdown": 128_000,
+    "Welsh LSOA Breakdown": 64_000,
+    "Comparing Welsh and English IoD": 128_000,
+}
+
+
+@pytest.mark.parametrize("page", list(MAX_SPEC_BYTES))
+def test_spec_bytes_per_page(page):
+    results = run_page_process(page, n_regions=2, n_indices=1)
+    for result in results:
+        assert result["exceptions"] == [], result["scenario"]
+        assert 0 < result["spec_bytes"] <= MAX_SPEC_BYTES[page], result["scenario"]
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+from benchmarks.benchmark_app import REPO_DIR
+from utils import utils_timing
+from utils.utils_timing import dump_prometheus
+
+
+def test_no_handler_is_attached_on_import():
+    code = (
+        "import logging, utils.utils_timing as t; "
+        "print(t.logger.name, len(t.logger.handlers), len(logging.getLogger().handlers))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_DIR,
+        env={"IOD_TIMING": "1", "PATH": ""},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    assert output == ["geographical_iod_analysis.timing", "0", "0"]
+
+
+def test_dump_prometheus_is_a_no_op_when_timing_is_off(tmp_path, monkeypatch):
+    path = tmp_path / "iod.prom"
+    monkeypatch.setattr(utils_timing, "TIMING_ENABLED", False)
+    dump_prometheus(str(path))
+    assert not path.exists()
+
+    monkeypatch.setattr(utils_timing, "TIMING_ENABLED", True)
+    utils_timing.record_timing("test.stage", 0.5)
+    dump_prometheus(str(path))
+    assert 'iod_stage_seconds_count{stage="test.stage"}' in path.read_text()
@@ -0,0 +1,147 @@
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_iod_values import iod_combined_indices, iod_indices, wiod_indices
+from utils.utils_timing import timed
+
+N_DECILES = 10
+# LSOAs in the most deprived 30% (deciles 1 to 3) count towards an area's extent.
+EXTENT_DECILES = 3
+
+# A column of the LSOA data to group on (e.g. "lad19cd"), or a mapping from LSOA code to group.
+Groups = Union[str, pd.Series, Mapping[str, str]]
+# The LSOA data and decile columns of each dataset aggregate_lsoas works on.
+LSOA_TABLES: Dict[str, Tuple] = {
+    "english": (get_english_lsoa_iod_2019, iod_indices),
+    "welsh": (get_welsh_lsoa_iod_2019, wiod_indices),
+    "comparison": (get_english_wales_lsoa_iod_2019, iod_combined_indices),
+}
+
+
+def group_codes(data: pd.DataFrame, groups: Groups) -> Tuple[np.ndarray, pd.Index]:
+    """Turning a grouping of the LSOAs into an integer group code per row.
+
+    Args:
+        data (pd.DataFrame): LSOA IoD data, with an lsoa11cd column.
+        groups (Groups): Column of data to group on, or a mapping (dict or pd.Series indexed
+            on lsoa11cd) from LSOA code to group. LSOAs missing from the mapping are left out.
+
+    Returns:
+        Tuple[np.ndarray, pd.Index]: Group code of each row (-1 if it has no group), and the
+            group labels the codes index into.
+    """
+    if isinstance(groups, str):
+        column = data[groups]
+    else:
+        if not isinstance(groups, pd.Series):
+            groups = pd.Series(groups, dtype=object)
+        column = data.lsoa11cd.map(groups)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    codes, labels = pd.factorize(column, sort=True)
+    return codes, pd.Index(labels)
+
+
+def decile_counts(
+    data: pd.DataFrame, groups: Groups, indices: List[str]
+) -> Tuple[np.ndarray, pd.Index]:
+    """Counting the LSOAs of each group in each decile of each index, with one np.bincount
+    over a combined (index, group, decile) key.
+
+    Args:
+        data (pd.DataFrame): LSOA IoD data.
+        groups (Groups): Column of data to group on, or a mapping from LSOA code to group.
+        indices (List[str]): Decile columns to count.
+
+    Returns:
+        Tuple[np.ndarray, pd.Index]: Counts shaped (index, group, decile), where decile 0
+            holds the LSOAs with a missing decile; and the group labels.
+    """
+    codes, labels = group_codes(data, groups)
+    keep = codes >= 0
+    codes = codes[keep].astype(np.int64)
+    n_groups = len(labels)
+    deciles = np.column_stack(
+        [data[column].to_numpy(dtype=np.float64, na_value=0)[keep] for column in indices]
+    ).astype(np.int64)
+    index_offsets = np.arange(len(indices)) * n_groups
+    keys = ((codes[:, None] + index_offsets) * (N_DECILES + 1) + deciles).ravel()
+    counts = np.bincount(keys, minlength=len(indices) * n_groups * (N_DECILES + 1))
+    return counts.reshape(len(indices), n_groups, N_DECILES + 1), labels
+
+
+@timed("aggregate")
+def aggregate_deciles(
+    data: pd.DataFrame,
+    groups: Groups,
+    indices: List[str],
+    extent_deciles: int = EXTENT_DECILES,
+) -> pd.DataFrame:
+    """Aggregating LSOA deciles to any grouping of the LSOAs; for each group and index the
+    number of LSOAs, the share of them in each decile, the extent (share in the most deprived
+    extent_deciles deciles) and the mean decile. The lower the decile, the higher the deprivation.
+
+    Args:
+        data (pd.DataFrame): LSOA IoD data.
+        groups (Groups): Column of data to group on (e.g. "lad19cd" or "region_name"), or a
+            mapping (dict or pd.Series indexed on lsoa11cd) from LSOA code to group.
+        indices (List[str]): Decile columns to aggregate.
+        extent_deciles (int, optional): Deciles counted in the extent. Defaults to EXTENT_DECILES.
+
+    Returns:
+        pd.DataFrame: One row per group and index, with group, iod, n_lsoas, extent,
+            mean_decile and decile_1 to decile_10 (shares) columns. Groups without LSOAs are left out.
+    """
+    counts, labels = decile_counts(data, groups, indices)
+    counted = counts[:, :, 1:]
+    n_lsoas = counted.sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = counted / n_lsoas[:, :, None]
+        mean_decile = (counted @ np.arange(1, N_DECILES + 1)) / n_lsoas
+    extent = shares[:, :, :extent_deciles].sum(axis=2)
+
+    n_indices, n_groups = n_lsoas.shape
+    aggregated = pd.DataFrame(
+        {
+            "group": np.tile(labels.to_numpy(), n_indices),
+            "iod": pd.Categorical.from_codes(
+                np.repeat(np.arange(n_indices), n_groups), categories=indices
+            ),
+            "n_lsoas": n_lsoas.ravel(),
+            "extent": extent.ravel(),
+            "mean_decile": mean_decile.ravel(),
+            **{
+                f"decile_{decile}": shares[:, :, decile - 1].ravel()
+                for decile in range(1, N_DECILES + 1)
+            },
+        }
+    )
+    return aggregated[aggregated.n_lsoas > 0].reset_index(drop=True)
+
+
+def aggregate_lsoas(
+    groups: Groups,
+    dataset: str = "english",
+    indices: Optional[List[str]] = None,
+    extent_deciles: int = EXTENT_DECILES,
+) -> pd.DataFrame:
+    """Aggregating the English, Welsh or comparison LSOA IoD data to any grouping of the LSOAs,
+    e.g. aggregate_lsoas({"E01000001": "Group A", "E01000002": "Group A", ...}).
+
+    Args:
+        groups (Groups): Column to group on (e.g. "lad19cd" or "region_name"), or a mapping
+            from LSOA code to group.
+        dataset (str, optional): "english", "welsh" or "comparison". Defaults to "english".
+        indices (List[str], optional): Decile columns to aggregate. Defaults to all of them.
+        extent_deciles (int, optional): Deciles counted in the extent. Defaults to EXTENT_DECILES.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe as returned by aggregate_deciles.
+    """
+    get_data, default_indices = LSOA_TABLES[dataset]
+    return aggregate_deciles(get_data(), groups, indices or default_indices, extent_deciles)
@@ -0,0 +1,316 @@
+import gzip
+import hashlib
+import json
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.utils_charts import (
+    LSOA_DATASETS,
+    la_comparison_chart,
+    la_overview_chart,
+    la_region_chart,
+    lsoa_chart,
+    welsh_english_comparison_chart,
+)
+from utils.utils_hierarchy import get_area_hierarchy
+from utils.utils_iod_store import STORE_DATASETS, get_iod_store
+from utils.utils_iod_values import iod_combined_dict, iod_dict
+from utils.utils_palettes import get_palette_names
+from utils.utils_timing import timed
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it responses are only gzipped.
+    brotli = None
+
+# Number of response bodies (and of compressed copies) kept in memory.
+RESPONSE_CACHE_SIZE = 256
+# Bodies smaller than this aren't worth compressing.
+MIN_COMPRESS_BYTES = 1024
+DEFAULT_PALETTE = "Spring"
+DEFAULT_INDEX = "Index of Multiple Deprivation (IMD)"
+# Dataset of the IoD store (utils/utils_iod_store.py) behind each LSOA dataset of the API.
+LSOA_STORE_DATASETS = {"english": "english_lsoa", "welsh": "welsh_lsoa", "comparison": "comparison"}
+# Index names each LSOA dataset (and chart) takes.
+DATASET_INDICES = {
+    dataset: dict(zip(STORE_DATASETS[store_dataset].names, STORE_DATASETS[store_dataset].indices))
+    for dataset, store_dataset in LSOA_STORE_DATASETS.items()
+}
+# Countries whose regions each dataset's region=... takes.
+DATASET_COUNTRIES = {"english": ("England",), "welsh": ("Wales",), "comparison": ("England", "Wales")}
+# Query strings are passed around as sorted (name, values) pairs, so they can key the caches.
+Query = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+class ApiError(Exception):
+    """An error sent back to the client, e.g. ApiError(400, "Unknown index")."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Response(NamedTuple):
+    body: bytes
+    etag: str
+    content_type: str = "application/json"
+
+
+def _values(query: Query, name: str) -> Tuple[str, ...]:
+    return dict(query).get(name, ())
+
+
+def _value(query: Query, name: str, default: Optional[str] = None) -> str:
+    values = _values(query, name)
+    if values:
+        return values[-1]
+    if default is None:
+        raise ApiError(400, f"Missing query parameter: {name}")
+    return default
+
+
+def _choice(query: Query, name: str, choices, default: Optional[str] = None) -> str:
+    value = _value(query, name, default)
+    if value not in choices:
+        raise ApiError(400, f"Unknown {name} {value!r}; one of {sorted(choices)}")
+    return value
+
+
+def _region_filter(query: Query, dataset: str = "english") -> Tuple[str, ...]:
+    """Regions chosen with region=..., checked against the regions of the dataset and
+    defaulting to all of them."""
+    regions = get_regions(dataset)
+    region_filter = _values(query, "region") or tuple(regions)
+    unknown = set(region_filter) - set(regions)
+    if unknown:
+        raise ApiError(400, f"Unknown {dataset} regions {sorted(unknown)}; one of {regions}")
+    return tuple(sorted(region_filter))
+
+
+def get_regions(dataset: str = "english") -> List[str]:
+    """Names of the regions of a dataset ("english", "welsh" or "comparison"), from the area
+    hierarchy; the LA data's Welsh LAs and its areas without a region (Scotland and Northern
+    Ireland) aren't served."""
+    hierarchy = get_area_hierarchy()
+    return sorted(
+        region for country in DATASET_COUNTRIES[dataset] for region in hierarchy.regions(country)
+    )
+
+
+def _records(data: pd.DataFrame) -> bytes:
+    return data.to_json(orient="records").encode("utf-8")
+
+
+def _store_deciles(
+    dataset: str, query: Query, region_filter: Optional[Tuple[str, ...]] = None
+) -> pd.DataFrame:
+    """Wide deciles of a dataset of the IoD store, for the areas in region_filter whose codes
+    match the lad19cd=... and lsoa11cd=... values given."""
+    store = get_iod_store()
+    areas = store.dataset_area_table(dataset)
+    keep = np.ones(len(areas), dtype=bool)
+    if region_filter is not None:
+        keep &= areas.region_name.isin(region_filter).to_numpy()
+    if _values(query, "lad19cd"):
+        keep &= areas.lad19cd.isin(_values(query, "lad19cd")).to_numpy()
+    if _values(query, "lsoa11cd"):
+        keep &= areas.index.isin(_values(query, "lsoa11cd"))
+    return store.pivot(dataset, area_codes=areas.index[keep])
+
+
+def la_deciles(query: Query) -> bytes:
+    """English LA deciles, filtered by region=... and lad19cd=..."""
+    return _records(_store_deciles("english_la", query, _region_filter(query)))
+
+
+def lsoa_deciles(query: Query) -> bytes:
+    """English, Welsh or comparison LSOA deciles, filtered by region=..., lad19cd=... and lsoa11cd=...
+    At least one filter is needed for the English LSOAs."""
+    dataset = _choice(query, "dataset", DATASET_INDICES, "english")
+    if dataset == "english" and not any(
+        _values(query, name) for name in ["region", "lad19cd", "lsoa11cd"]
+    ):
+        raise ApiError(400, "Filter the English LSOAs by region, lad19cd or lsoa11cd")
+    region_filter = _region_filter(query, dataset)
+    return _records(_store_deciles(LSOA_STORE_DATASETS[dataset], query, region_filter))
+
+
+def metadata(query: Query) -> bytes:
+    """The regions, palettes and index names the other endpoints take."""
+    return json.dumps(
+        {
+            "regions": {dataset: get_regions(dataset) for dataset in DATASET_COUNTRIES},
+            "palettes": get_palette_names(),
+            "indices": {dataset: list(names) for dataset, names in DATASET_INDICES.items()},
+        }
+    ).encode("utf-8")
+
+
+def embeddable_spec(spec: dict) -> bytes:
+    """Turning a chart spec from utils/utils_charts.py, whose datasets are Arrow IPC streams
+    for Streamlit, into Vega-Lite JSON with the datasets inlined as records, e.g. for vega-embed."""
+    datasets = {
+        name: pa.ipc.open_stream(data).read_all().to_pylist()
+        for name, data in spec.get("datasets", {}).items()
+    }
+    return json.dumps({**spec, "datasets": datasets}, default=str).encode("utf-8")
+
+
+def _la_prefix(dataset: str) -> str:
+    return {"english": "E", "welsh": "W"}.get(dataset, "")
+
+
+def _la_code(query: Query, name: str, dataset: str) -> str:
+    """An LA code given as name=..., checked against the country of the dataset ("english",
+    "welsh" or "comparison" for either) and looked up in the area hierarchy."""
+    la_code = _value(query, name)
+    prefix = _la_prefix(dataset)
+    if prefix and not la_code.startswith(prefix):
+        raise ApiError(400, f"{la_code} isn't in the {dataset} LSOA data")
+    if la_code not in get_area_hierarchy().la_names:
+        raise ApiError(404, f"Unknown LA code {la_code}")
+    return la_code
+
+
+def _la_names(lad19cds: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Names of English LA codes, sorted."""
+    not_english = sorted(code for code in lad19cds if not code.startswith("E"))
+    if not_english:
+        raise ApiError(400, f"Not English LA codes: {not_english}")
+    la_names = get_area_hierarchy().la_names
+    unknown = sorted(code for code in lad19cds if code not in la_names)
+    if unknown:
+        raise ApiError(404, f"Unknown LA codes: {unknown}")
+    return tuple(sorted(la_names[code] for code in set(lad19cds)))
+
+
+def chart(query: Query) -> bytes:
+    """Vega-Lite spec of one of the app's charts, chosen with type=...; see CHART_PARAMETERS."""
+    chart_type = _choice(query, "type", CHART_PARAMETERS)
+    palette = _choice(query, "palette", get_palette_names(), DEFAULT_PALETTE)
+    if chart_type == "la_overview":
+        spec = la_overview_chart(_region_filter(query), palette)
+    elif chart_type == "la_region":
+        region_filter = _region_filter(query)
+        region_name = _choice(query, "region_name", region_filter)
+        iod_name = _choice(query, "index", iod_dict, DEFAULT_INDEX)
+        spec = la_region_chart(region_filter, region_name, iod_name, palette)
+    elif chart_type == "la_comparison":
+        las = _la_names(_values(query, "lad19cd"))
+        iod_name = _choice(query, "index", iod_dict, DEFAULT_INDEX)
+        spec = la_comparison_chart(_region_filter(query), las, iod_name)
+    elif chart_type == "lsoa":
+        dataset = _choice(query, "dataset", LSOA_DATASETS, "english")
+        default_index = next(iter(DATASET_INDICES[dataset]))
+        iod_name = _choice(query, "index", DATASET_INDICES[dataset], default_index)
+        spec = lsoa_chart(dataset, _la_code(query, "lad19cd", dataset), iod_name, palette)
+    else:
+        iod_name = _choice(
+            query, "index", iod_combined_dict, next(iter(iod_combined_dict))
+        )
+        spec = welsh_english_comparison_chart(
+            _la_code(query, "lad19cd", "english"),
+            _la_code(query, "welsh_lad19cd", "welsh"),
+            iod_name,
+            palette,
+        )
+    return embeddable_spec(spec)
+
+
+# Query parameters of each chart type, besides palette (see the README).
+CHART_PARAMETERS: Dict[str, List[str]] = {
+    "la_overview": ["region"],
+    "la_region": ["region", "region_name", "index"],
+    "la_comparison": ["region", "lad19cd", "index"],
+    "lsoa": ["dataset", "lad19cd", "index"],
+    "welsh_english_comparison": ["lad19cd", "welsh_lad19cd", "index"],
+}
+
+ENDPOINTS: Dict[str, Callable[[Query], bytes]] = {
+    "/": metadata,
+    "/las": la_deciles,
+    "/lsoas": lsoa_deciles,
+    "/chart": chart,
+}
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Checking an If-None-Match header, a comma separated list of (possibly weak, W/) ETags
+    or *, against a response's ETag.
+
+    Args:
+        if_none_match (str): The header, e.g. 'W/"abc", "def"'.
+        etag (str): The response's ETag, quoted.
+
+    Returns:
+        bool: True if the client's copy is current (answered with a 304).
+    """
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+@lru_cache(maxsize=RESPONSE_CACHE_SIZE)
+@timed("api")
+def get_response(path: str, query: Query) -> Response:
+    """Building the body of a response once per path and query; errors aren't cached.
+
+    Args:
+        path (str): One of ENDPOINTS.
+        query (Query): Sorted query parameters.
+
+    Returns:
+        Response: The JSON body and its ETag.
+    """
+    endpoint = ENDPOINTS.get(path)
+    if endpoint is None:
+        raise ApiError(404, f"Unknown path {path}; one of {sorted(ENDPOINTS)}")
+    body = endpoint(query)
+    return Response(body, make_etag(body))
+
+
+@lru_cache(maxsize=RESPONSE_CACHE_SIZE)
+def get_compressed_body(path: str, query: Query, encoding: str) -> bytes:
+    """Compressing a cached response body once per encoding ("gzip" or "br")."""
+    body = get_response(path, query).body
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def choose_encoding(accept_encoding: str, body: bytes) -> Optional[str]:
+    """Picking brotli (if installed), then gzip, from an Accept-Encoding header."""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return None
+    accepted = {
+        part.split(";")[0].strip()
+        for part in accept_encoding.lower().split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def parse_query(query_string: str) -> Query:
+    """Parsing a query string into sorted (name, values) pairs, so the same query written in
+    a different order shares a cache entry."""
+    return tuple(
+        sorted((name, tuple(sorted(values))) for name, values in parse_qs(query_string).items())
+    )
+
+
+def clear_response_cache() -> None:
+    """Dropping the cached responses, e.g. after the data has been rebuilt."""
+    get_response.cache_clear()
+    get_compressed_body.cache_clear()
@@ -0,0 +1,575 @@
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import altair as alt
+import pandas as pd
+import pyarrow as pa
+
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from getters.lsoa_la_tiles_2011 import get_lsoa_la_tile_2011, has_lsoa_la_tile
+from getters.lsoa_shapefiles_2011 import (
+    get_english_lsoa_shapefiles_2011,
+    get_english_lsoa_topojson_2011,
+)
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_fonts_colours import NESTA_COLOURS
+from utils.utils_iod_values import (
+    iod_combined_dict,
+    iod_combined_indices,
+    iod_combined_tooltip,
+    iod_dict,
+    iod_indices,
+    iod_names,
+    iod_tooltip,
+    wiod_dict,
+    wiod_indices,
+    wiod_tooltip,
+)
+from utils.utils_hierarchy import get_area_hierarchy
+from utils.utils_long_format import get_la_melt
+from utils.utils_lsoa_index import get_la_lsoa_index
+from utils.utils_page_data import (
+    USE_TOPOJSON,
+    get_la_boundaries,
+    get_la_data,
+    get_welsh_lsoa_boundaries,
+)
+from utils.utils_palettes import get_colour_scale
+from utils.utils_queries import (
+    la_lookup_table,
+    la_melt_table,
+    lsoa_lookup_table,
+    select_rows_and_columns,
+)
+from utils.utils_timing import timed
+
+# Number of specs kept per chart type; each is a few selections of one page.
+CHART_CACHE_SIZE = 64
+LSOA_LOOKUP_FIELDS = ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm"]
+# Altair's enabled data transformer is global, so specs are compiled one at a time.
+_SPEC_LOCK = threading.Lock()
+
+
+class LsoaDataset(NamedTuple):
+    # The LSOA IoD data an LSOA map is coloured from, and the indices it has.
+    get_data: Callable[[], pd.DataFrame]
+    indices: List[str]
+    columns: Dict[str, str]
+    tooltips: List[str]
+
+
+LSOA_DATASETS = {
+    "english": LsoaDataset(get_english_lsoa_iod_2019, iod_indices, iod_dict, iod_tooltip),
+    "welsh": LsoaDataset(get_welsh_lsoa_iod_2019, wiod_indices, wiod_dict, wiod_tooltip),
+    "comparison": LsoaDataset(
+        get_english_wales_lsoa_iod_2019,
+        iod_combined_indices,
+        iod_combined_dict,
+        iod_combined_tooltip,
+    ),
+}
+
+
+def configure_chart(chart: alt.TopLevelMixin, **axis: Any) -> alt.TopLevelMixin:
+    """Applying the legend, view and axis settings every map in the app shares.
+
+    Args:
+        chart (alt.TopLevelMixin): Chart to configure.
+        **axis: Extra axis settings, e.g. labelFontSize=18.
+
+    Returns:
+        alt.TopLevelMixin: The configured chart.
+    """
+    return (
+        chart.configure_legend(
+            labelLimit=0,
+            titleLimit=0,
+            titleFontSize=13,
+            labelFontSize=13,
+            symbolStrokeWidth=1.5,
+            symbolSize=150,
+        )
+        .configure_view(strokeWidth=0)
+        .configure_axis(labelLimit=0, titleLimit=0, **axis)
+    )
+
+
+def arrow_bytes(data: pd.DataFrame) -> bytes:
+    """Serialising a dataframe to the Arrow IPC stream streamlit sends chart datasets as.
+
+    Args:
+        data (pd.DataFrame): Pandas dataframe.
+
+    Returns:
+        bytes: Arrow IPC stream.
+    """
+    table = pa.Table.from_pandas(data)
+    sink = pa.BufferOutputStream()
+    with pa.RecordBatchStreamWriter(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def chart_spec(chart: alt.TopLevelMixin) -> dict:
+    """Compiling an Altair chart to the Vega-Lite spec st.vega_lite_chart takes, with the
+    dataframes already serialised under "datasets" (as st.altair_chart does on every call).
+
+    Args:
+        chart (alt.TopLevelMixin): Chart to compile.
+
+    Returns:
+        dict: Vega-Lite spec.
+    """
+    datasets = {}
+
+    def to_named_dataset(data: pd.DataFrame) -> dict:
+        data_bytes = arrow_bytes(data)
+        name = hashlib.md5(data_bytes).hexdigest()
+        datasets[name] = data_bytes
+        return {"name": name}
+
+    with _SPEC_LOCK:
+        alt.data_transformers.register("iod_arrow", to_named_dataset)
+        with alt.data_transformers.enable("iod_arrow"):
+            spec = chart.to_dict()
+    spec["datasets"] = datasets
+    return spec
+
+
+def decile_colour(selection: Any, column: str, palette: str, title: str) -> dict:
+    """Colouring the selected areas by decile and the rest grey.
+
+    Args:
+        selection (Any): Altair selection the colour is conditioned on.
+        column (str): Decile column, e.g. "a_index_of_multiple_deprivation_imd".
+        palette (str): Palette name from utils/utils_palettes.py.
+        title (str): Legend title.
+
+    Returns:
+        dict: Altair condition for the color channel.
+    """
+    return alt.condition(
+        selection,
+        alt.Color(
+            f"{column}:O",
+            scale=get_colour_scale(palette),
+            title=title,
+            legend=alt.Legend(orient="top"),
+        ),
+        alt.value("lightgray"),
+    )
+
+
+def decile_tooltips(
+    name_field: str, name_title: str, indices: List[str], tooltips: List[str]
+) -> List[alt.Tooltip]:
+    """Tooltip with the area's name and each of its deciles.
+
+    Args:
+        name_field (str): Field holding the area's name, e.g. "lad19nm".
+        name_title (str): Title of the name, e.g. "Local Authority".
+        indices (List[str]): Decile columns.
+        tooltips (List[str]): Short names of the indices, in the same order.
+
+    Returns:
+        List[alt.Tooltip]: Altair tooltips.
+    """
+    return [alt.Tooltip(f"{name_field}:N", title=name_title)] + [
+        alt.Tooltip(f"{ind}:O", title=name, format="1.2f")
+        for ind, name in zip(indices, tooltips)
+    ]
+
+
+def la_geoshape(data: pd.DataFrame, las: List[str]) -> alt.Chart:
+    """Geoshape of the chosen English LAs, with their deciles joined on by name.
+
+    Args:
+        data (pd.DataFrame): English LA IoD data.
+        las (List[str]): LA names to draw.
+
+    Returns:
+        alt.Chart: Altair chart to encode.
+    """
+    return (
+        alt.Chart(get_la_boundaries())
+        .mark_geoshape(
+            stroke="black",
+        )
+        .transform_lookup(
+            lookup="properties.lad19nm",
+            from_=alt.LookupData(
+                la_lookup_table(data, iod_indices, las),
+                "lad19nm",
+                ["lad19cd", "lad19nm", "region_name"] + iod_indices,
+            ),
+        )
+        .transform_filter(alt.FieldOneOfPredicate(field="properties.lad19nm", oneOf=las))
+    )
+
+
+def lsoa_geoshape(
+    la_code: str,
+    geodata_lsoa: alt.Data,
+    lookup_data: pd.DataFrame,
+    lookup_fields: List[str],
+    lsoas_to_plot: List[str],
+) -> alt.Chart:
+    """Geoshape of the LSOAs of one LA. Uses the prebuilt tile of the LA if there is one
+    (pipeline/build_lsoa_la_tiles.py), otherwise joins the deciles onto the boundaries and
+    filters to the LA in the browser.
+
+    Args:
+        la_code (str): The LA code, e.g. "E06000001".
+        geodata_lsoa (alt.Data): LSOA boundaries the LA sits in.
+        lookup_data (pd.DataFrame): Rows to join onto the boundaries on lsoa11cd.
+        lookup_fields (List[str]): Columns of lookup_data to join on.
+        lsoas_to_plot (List[str]): LSOA codes of the LA.
+
+    Returns:
+        alt.Chart: Altair chart to encode.
+    """
+    if has_lsoa_la_tile(la_code):
+        return alt.Chart(get_lsoa_la_tile_2011(la_code)).mark_geoshape(stroke="black")
+    return (
+        alt.Chart(geodata_lsoa)
+        .mark_geoshape(
+            stroke="black",
+        )
+        .transform_lookup(
+            lookup="properties.lsoa11cd",
+            from_=alt.LookupData(lookup_data, "lsoa11cd", lookup_fields),
+        )
+        .transform_filter(
+            alt.FieldOneOfPredicate(field="properties.lsoa11cd", oneOf=lsoas_to_plot)
+        )
+    )
+
+
+def lsoa_boundaries(la_code: str) -> alt.Data:
+    """LSOA boundary file an English or Welsh LA is drawn from, as TopoJSON if USE_TOPOJSON is set.
+
+    Args:
+        la_code (str): The LA code, e.g. "E06000001".
+
+    Returns:
+        alt.Data: Data for Altair to produce the choropleths in streamlit.
+    """
+    if la_code.startswith("W"):
+        return get_welsh_lsoa_boundaries()
+    boundary_region = get_la_lsoa_index(la_code).boundary_region.iloc[0]
+    if USE_TOPOJSON:
+        return get_english_lsoa_topojson_2011(boundary_region)
+    return get_english_lsoa_shapefiles_2011(boundary_region)
+
+
+def lsoa_map(
+    dataset: str, la_code: str, iod_name: str, palette: str, selection: Any
+) -> alt.Chart:
+    """Choropleth of the LSOAs of one LA, coloured by the chosen index where selected.
+
+    Args:
+        dataset (str): One of LSOA_DATASETS.
+        la_code (str): The LA code, e.g. "E06000001".
+        iod_name (str): Name of the index to colour by.
+        palette (str): Palette name from utils/utils_palettes.py.
+        selection (Any): Altair selection highlighting LSOAs.
+
+    Returns:
+        alt.Chart: Altair chart, without its selections added.
+    """
+    lsoa_dataset = LSOA_DATASETS[dataset]
+    return (
+        lsoa_geoshape(
+            la_code,
+            lsoa_boundaries(la_code),
+            lsoa_lookup_table(
+                lsoa_dataset.get_data(), lsoa_dataset.indices, "lad19cd", [la_code]
+            ),
+            LSOA_LOOKUP_FIELDS + lsoa_dataset.indices,
+            list(get_la_lsoa_index(la_code).index),
+        )
+        .encode(
+            color=decile_colour(
+                selection, lsoa_dataset.columns[iod_name], palette, f"{iod_name}"
+            ),
+            tooltip=decile_tooltips(
+                "lsoa11nm", "LSOA", lsoa_dataset.indices, lsoa_dataset.tooltips
+            ),
+            opacity=alt.condition(selection, alt.value(1), alt.value(0.2)),
+        )
+        .project(type="identity", reflectY=True)
+    )
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@timed("chart")
+def la_overview_chart(region_filter: Tuple[str, ...], palette: str) -> dict:
+    """Vega-Lite spec of the map of every English LA, coloured by the IMD.
+
+    Args:
+        region_filter (Tuple[str, ...]): Region names chosen in the app.
+        palette (str): Palette name from utils/utils_palettes.py.
+
+    Returns:
+        dict: Vega-Lite spec. It is shared, so don't modify it.
+    """
+    la_select = alt.selection_single(fields=["lad19nm"])
+    data = get_la_data(region_filter)
+    imd_name = "Index of Multiple Deprivation (IMD)"
+    chart = (
+        la_geoshape(data, list(data.lad19nm.unique()))
+        .encode(
+            color=decile_colour(la_select, iod_dict[imd_name], palette, imd_name),
+            tooltip=decile_tooltips("lad19nm", "Local Authority", iod_indices, iod_tooltip),
+        )
+        .add_selection(la_select)
+        .properties(width=500, height=500)
+    )
+    return chart_spec(configure_chart(chart))
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@timed("chart")
+def la_region_chart(
+    region_filter: Tuple[str, ...], region_name: str, iod_name: str, palette: str
+) -> dict:
+    """Vega-Lite spec of the map of the LAs of one region, with a bar chart of the deciles
+    of the LA clicked on.
+
+    Args:
+        region_filter (Tuple[str, ...]): Region names chosen in the app.
+        region_name (str): Region to draw, e.g. "London".
+        iod_name (str): Name of the index to colour by.
+        palette (str): Palette name from utils/utils_palettes.py.
+
+    Returns:
+        dict: Vega-Lite spec. It is shared, so don't modify it.
+    """
+    la_select = alt.selection_single(fields=["lad19nm"])
+    la_select_all = alt.selection_single(fields=["lad19nm"], empty="none")
+    data = get_la_data(region_filter)
+    las_to_plot = list(get_area_hierarchy().las(region_name))
+    choro_legend = (
+        la_geoshape(data, las_to_plot)
+        .encode(
+            color=decile_colour(la_select, iod_dict[iod_name], palette, iod_name),
+            tooltip=decile_tooltips("lad19nm", "Local Authority", iod_indices, iod_tooltip),
+        )
+        .add_selection(la_select, la_select_all)
+        .properties(width=500, height=500)
+    )
+    region_la_melt = la_melt_table(get_la_melt(region_filter), las_to_plot)
+    choro_bar = (
+        alt.Chart(region_la_melt)
+        .mark_bar(color=NESTA_COLOURS[1])
+        .encode(
+            x=alt.X(
+                "decile:Q",
+                title="Decile",
+                scale=alt.Scale(domain=[0, 10]),
+                axis=alt.Axis(tickMinStep=1),
+            ),
+            y=alt.Y(
+                "iod_name:N",
+                title="Indices of Deprivation",
+                sort=iod_names,
+                axis=alt.Axis(titlePadding=330),
+            ),
+        )
+        .transform_filter(la_select_all)
+        .properties(width=400, height=400)
+    )
+    la_text = (
+        alt.Chart(region_la_melt)
+        .mark_text(dy=-210, size=20, color="darkgray")
+        .encode(text="lad19nm:N")
+        .transform_filter(la_select_all)
+    )
+    bar_chart = alt.layer(choro_bar, la_text)
+    return chart_spec(configure_chart(alt.vconcat(choro_legend, bar_chart, center=True)))
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@timed("chart")
+def la_comparison_chart(
+    region_filter: Tuple[str, ...], las: Tuple[str, ...], iod_name: str
+) -> dict:
+    """Vega-Lite spec of a bar chart comparing one index across a few English LAs.
+
+    Args:
+        region_filter (Tuple[str, ...]): Region names chosen in the app.
+        las (Tuple[str, ...]): LA names to compare.
+        iod_name (str): Name of the index to compare.
+
+    Returns:
+        dict: Vega-Lite spec. It is shared, so don't modify it.
+    """
+    la_melt = get_la_melt(region_filter)
+    la_compare = select_rows_and_columns(
+        la_melt[la_melt.iod_name == iod_name],
+        ["lad19nm", "decile"],
+        "lad19nm",
+        list(las),
+    )
+    compare_las = (
+        alt.Chart(la_compare)
+        .mark_bar(size=50, color=NESTA_COLOURS[1])
+        .encode(
+            x=alt.X(
+                "decile:Q",
+                title="Decile",
+                scale=alt.Scale(domain=[0, 10]),
+                axis=alt.Axis(tickMinStep=1),
+            ),
+            y=alt.Y("lad19nm:N", title=None),
+        )
+        .properties(width=600, height=400)
+    )
+    return chart_spec(
+        compare_las.configure_view(strokeWidth=0).configure_axis(
+            labelLimit=0, titleLimit=0, labelFontSize=18
+        )
+    )
+
+
+def build_lsoa_chart(
+    dataset: str,
+    la_code: str,
+    iod_name: str,
+    palette: str,
+    size: Optional[Tuple[int, int]] = None,
+) -> alt.TopLevelMixin:
+    """Altair chart of the map of the LSOAs of one English or Welsh LA; what lsoa_chart
+    compiles, also used to render the maps offline (pipeline/render_static_maps.py).
+
+    Args:
+        dataset (str): One of LSOA_DATASETS, e.g. "welsh".
+        la_code (str): The LA code, e.g. "W06000015".
+        iod_name (str): Name of the index to colour by.
+        palette (str): Palette name from utils/utils_palettes.py.
+        size (Tuple[int, int], optional): Width and height of the map. Defaults to Altair's.
+
+    Returns:
+        alt.TopLevelMixin: The configured chart.
+    """
+    lsoa_select = alt.selection_single(fields=["lsoa11nm"])
+    chart = lsoa_map(dataset, la_code, iod_name, palette, lsoa_select).add_selection(
+        lsoa_select
+    )
+    if size is not None:
+        chart = chart.properties(width=size[0], height=size[1])
+    return configure_chart(chart)
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@timed("chart")
+def lsoa_chart(
+    dataset: str,
+    la_code: str,
+    iod_name: str,
+    palette: str,
+    size: Optional[Tuple[int, int]] = None,
+) -> dict:
+    """Vega-Lite spec of the map of the LSOAs of one English or Welsh LA.
+
+    Args:
+        dataset (str): One of LSOA_DATASETS, e.g. "welsh".
+        la_code (str): The LA code, e.g. "W06000015".
+        iod_name (str): Name of the index to colour by.
+        palette (str): Palette name from utils/utils_palettes.py.
+        size (Tuple[int, int], optional): Width and height of the map. Defaults to Altair's.
+
+    Returns:
+        dict: Vega-Lite spec. It is shared, so don't modify it.
+    """
+    return chart_spec(build_lsoa_chart(dataset, la_code, iod_name, palette, size))
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@timed("chart")
+def welsh_english_comparison_chart(
+    la_code: str, welsh_la_code: str, iod_name: str, palette: str
+) -> dict:
+    """Vega-Lite spec of the LSOA maps of an English and a Welsh LA side by side, with a bar
+    chart of the LSOAs clicked on.
+
+    Args:
+        la_code (str): The English LA code, e.g. "E06000001".
+        welsh_la_code (str): The Welsh LA code, e.g. "W06000015".
+        iod_name (str): Name of the combined index to colour by.
+        palette (str): Palette name from utils/utils_palettes.py.
+
+    Returns:
+        dict: Vega-Lite spec. It is shared, so don't modify it.
+    """
+    lsoa_index = get_la_lsoa_index(la_code)
+    welsh_lsoa_index = get_la_lsoa_index(welsh_la_code)
+    la_name, welsh_la_name = lsoa_index.lad19nm.iloc[0], welsh_lsoa_index.lad19nm.iloc[0]
+
+    lsoa_select_multi = alt.selection_multi(fields=["lsoa11nm"])
+    lsoa_select_multi_empty = alt.selection_multi(fields=["lsoa11nm"], empty="none")
+    choro_lsoa = (
+        lsoa_map("comparison", la_code, iod_name, palette, lsoa_select_multi)
+        .add_selection(lsoa_select_multi, lsoa_select_multi_empty)
+        .properties(width=500, height=500, title=la_name)
+    )
+    lsoa_select_wales_multi = alt.selection_multi(fields=["lsoa11nm"])
+    lsoa_select_wales_multi_empty = alt.selection_multi(fields=["lsoa11nm"], empty="none")
+    choro_lsoa_wales = (
+        lsoa_map("comparison", welsh_la_code, iod_name, palette, lsoa_select_wales_multi)
+        .add_selection(lsoa_select_wales_multi, lsoa_select_wales_multi_empty)
+        .properties(title=welsh_la_name)
+    )
+    choro_combined = alt.hconcat(choro_lsoa, choro_lsoa_wales)
+
+    # Only the LSOAs of the two LAs on the maps can be selected.
+    column = iod_combined_dict[iod_name]
+    bar_data = select_rows_and_columns(
+        get_english_wales_lsoa_iod_2019(),
+        ["lsoa11nm", column],
+        "lad19cd",
+        [la_code, welsh_la_code],
+    )
+    bar_chart = (
+        alt.Chart(bar_data)
+        .mark_bar(color=NESTA_COLOURS[1])
+        .encode(
+            x=alt.X(
+                f"{column}:Q",
+                title=f"{iod_name}",
+                scale=alt.Scale(domain=[0, 10]),
+                axis=alt.Axis(tickMinStep=1),
+            ),
+            y=alt.Y(
+                "lsoa11nm:N",
+                title="LSOA Name",
+            ),
+        )
+        .transform_filter(lsoa_select_multi_empty | lsoa_select_wales_multi_empty)
+        .properties(width=400, height=400)
+    )
+    return chart_spec(configure_chart(alt.vconcat(choro_combined, bar_chart, center=True)))
+
+
+# The memoized spec builders, by chart type.
+CHART_BUILDERS = {
+    "la_overview": la_overview_chart,
+    "la_region": la_region_chart,
+    "la_comparison": la_comparison_chart,
+    "lsoa": lsoa_chart,
+    "welsh_english_comparison": welsh_english_comparison_chart,
+}
+
+
+def clear_chart_cache(*chart_types: str) -> None:
+    """Dropping the memoized specs of some chart types (all of them if none are given),
+    e.g. after the data or boundaries behind them have been rebuilt.
+
+    Args:
+        *chart_types (str): Names from CHART_BUILDERS.
+    """
+    for chart_type in chart_types or CHART_BUILDERS:
+        CHART_BUILDERS[chart_type].cache_clear()
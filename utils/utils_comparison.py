@@ -0,0 +1,215 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from utils.utils_aggregation import N_DECILES, decile_counts
+from utils.utils_hierarchy import COUNTRIES, get_area_hierarchy
+from utils.utils_iod_values import iod_combined_dict_inv, iod_combined_indices
+from utils.utils_timing import timed
+
+# Distances between decile distributions get_la_distances can compute.
+DISTANCE_METRICS = ["wasserstein", "total_variation"]
+# LAs compared with every other LA at a time, so the (rows, LAs, index, decile) differences
+# stay a few MB.
+DISTANCE_BLOCK_ROWS = 64
+# Which LAs most_similar_las compares each LA with.
+NATION_FILTERS = ["any", "same", "other"]
+
+
+class DecileDistributions(NamedTuple):
+    # Share of each group's LSOAs in each decile, shaped (group, index, decile).
+    shares: np.ndarray
+    # Number of LSOAs of each group, shaped (group, index).
+    n_lsoas: np.ndarray
+    # Group labels, e.g. LA codes.
+    groups: pd.Index
+    indices: Tuple[str, ...]
+
+
+def _countries(codes: pd.Series) -> pd.Series:
+    """Country of each LA or LSOA code, from its first letter."""
+    return codes.astype(str).str[0].map(COUNTRIES)
+
+
+@lru_cache(maxsize=8)
+@timed("comparison")
+def get_decile_distributions(
+    groups: str = "lad19cd", indices: Tuple[str, ...] = tuple(iod_combined_indices)
+) -> DecileDistributions:
+    """Decile distributions of the English and Welsh LSOAs of each group in the comparison data
+    (get_english_wales_lsoa_iod_2019), counted with one np.bincount (see decile_counts).
+
+    Args:
+        groups (str, optional): Column to group on, e.g. "lad19cd" or "region_name", or
+            "country" for England and Wales. Defaults to "lad19cd".
+        indices (Tuple[str, ...], optional): Decile columns. Defaults to the four comparison domains.
+
+    Returns:
+        DecileDistributions: The shares, shared between callers, so don't modify them.
+            Groups without LSOAs are left out.
+    """
+    data = get_english_wales_lsoa_iod_2019()
+    if groups == "country":
+        groups = pd.Series(_countries(data.lsoa11cd).to_numpy(), index=data.lsoa11cd)
+    counts, labels = decile_counts(data, groups, list(indices))
+    counted = counts[:, :, 1:].transpose(1, 0, 2)
+    n_lsoas = counted.sum(axis=2)
+    keep = n_lsoas.sum(axis=1) > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.nan_to_num(counted / n_lsoas[:, :, None])
+    return DecileDistributions(shares[keep], n_lsoas[keep], labels[keep], tuple(indices))
+
+
+@lru_cache(maxsize=4)
+@timed("comparison")
+def get_domain_crosstabs(
+    country: Optional[str] = None, indices: Tuple[str, ...] = tuple(iod_combined_indices)
+) -> np.ndarray:
+    """Cross-tabulating the deciles of every pair of domains at once, with one np.bincount
+    over a combined (domain a, domain b, decile a, decile b) key.
+
+    Args:
+        country (str, optional): "England" or "Wales". Defaults to both.
+        indices (Tuple[str, ...], optional): Decile columns. Defaults to the four comparison domains.
+
+    Returns:
+        np.ndarray: Counts of LSOAs shaped (domain a, domain b, decile a, decile b), deciles
+            1 to 10 at positions 0 to 9. It is shared between callers, so don't modify it.
+    """
+    data = get_english_wales_lsoa_iod_2019()
+    if country is not None:
+        data = data[(_countries(data.lsoa11cd) == country).to_numpy()]
+    deciles = np.column_stack([data[column].to_numpy(dtype=np.int64) - 1 for column in indices])
+    n_indices = len(indices)
+    pairs = np.arange(n_indices * n_indices).reshape(n_indices, n_indices)
+    keys = (pairs[None] * N_DECILES + deciles[:, :, None]) * N_DECILES + deciles[:, None, :]
+    counts = np.bincount(keys.ravel(), minlength=n_indices * n_indices * N_DECILES * N_DECILES)
+    return counts.reshape(n_indices, n_indices, N_DECILES, N_DECILES)
+
+
+def domain_crosstab(index_a: str, index_b: str, country: Optional[str] = None) -> pd.DataFrame:
+    """Number of LSOAs in each pair of deciles of two comparison domains,
+    e.g. domain_crosstab("income_domain_decile", "employment_domain_decile", "Wales").
+
+    Args:
+        index_a (str): Domain of the rows.
+        index_b (str): Domain of the columns.
+        country (str, optional): "England" or "Wales". Defaults to both.
+
+    Returns:
+        pd.DataFrame: 10 by 10 counts, indexed on the deciles of index_a with a column per
+            decile of index_b.
+    """
+    counts = get_domain_crosstabs(country)
+    a, b = iod_combined_indices.index(index_a), iod_combined_indices.index(index_b)
+    deciles = range(1, N_DECILES + 1)
+    return pd.DataFrame(
+        counts[a, b],
+        index=pd.Index(deciles, name=iod_combined_dict_inv[index_a]),
+        columns=pd.Index(deciles, name=iod_combined_dict_inv[index_b]),
+    )
+
+
+def pairwise_distances(shares: np.ndarray, metric: str = "wasserstein") -> np.ndarray:
+    """Distances between every pair of groups' decile distributions, averaged over the indices,
+    by broadcasting DISTANCE_BLOCK_ROWS groups at a time against all of them. "wasserstein" is
+    the earth mover's distance between the deciles (the summed difference of the cumulative
+    shares, in deciles); "total_variation" is half the summed difference of the shares.
+
+    Args:
+        shares (np.ndarray): Shares shaped (group, index, decile).
+        metric (str, optional): One of DISTANCE_METRICS. Defaults to "wasserstein".
+
+    Returns:
+        np.ndarray: Symmetric distances shaped (group, group), 0 on the diagonal.
+    """
+    if metric not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; one of {DISTANCE_METRICS}")
+    values = np.cumsum(shares, axis=2) if metric == "wasserstein" else shares
+    values = values.astype(np.float32)
+    n_groups, n_indices = values.shape[:2]
+    distances = np.empty((n_groups, n_groups), dtype=np.float64)
+    for start in range(0, n_groups, DISTANCE_BLOCK_ROWS):
+        block = values[start : start + DISTANCE_BLOCK_ROWS]
+        differences = np.abs(block[:, None] - values[None])
+        distances[start : start + len(block)] = differences.sum(axis=(2, 3)) / n_indices
+    if metric == "total_variation":
+        distances /= 2
+    return distances
+
+
+@lru_cache(maxsize=len(DISTANCE_METRICS))
+@timed("comparison")
+def get_la_distances(metric: str = "wasserstein") -> pd.DataFrame:
+    """Distances between the decile distributions of every pair of English and Welsh LAs
+    over the four comparison domains.
+
+    Args:
+        metric (str, optional): One of DISTANCE_METRICS. Defaults to "wasserstein".
+
+    Returns:
+        pd.DataFrame: Square dataframe indexed and columned on the LA codes. It is shared
+            between callers, so don't modify it.
+    """
+    distributions = get_decile_distributions("lad19cd")
+    lad19cds = pd.Index(distributions.groups.astype(str), name="lad19cd")
+    return pd.DataFrame(
+        pairwise_distances(distributions.shares, metric), index=lad19cds, columns=lad19cds
+    )
+
+
+@timed("comparison")
+def most_similar_las(
+    n_similar: int = 5, metric: str = "wasserstein", nations: str = "any"
+) -> pd.DataFrame:
+    """The LAs whose comparison domain deciles are distributed most like each LA's.
+
+    Args:
+        n_similar (int, optional): Similar LAs listed for each LA. Defaults to 5.
+        metric (str, optional): One of DISTANCE_METRICS. Defaults to "wasserstein".
+        nations (str, optional): Compare each LA with LAs of "any" nation, the "same" nation
+            or the "other" nation (English LAs with Welsh ones and the other way around).
+            Defaults to "any".
+
+    Returns:
+        pd.DataFrame: One row per LA and similar LA, with lad19cd, lad19nm, country, rank
+            (1 is the most similar), similar_lad19cd, similar_lad19nm, similar_country and
+            distance columns.
+    """
+    if nations not in NATION_FILTERS:
+        raise ValueError(f"Unknown nations {nations!r}; one of {NATION_FILTERS}")
+    distances = get_la_distances(metric)
+    lad19cds = distances.index.to_series()
+    countries = _countries(lad19cds).to_numpy()
+    candidates = distances.to_numpy().copy()
+    np.fill_diagonal(candidates, np.inf)
+    if nations != "any":
+        same_nation = countries[:, None] == countries[None, :]
+        candidates[same_nation if nations == "other" else ~same_nation] = np.inf
+
+    n_similar = min(n_similar, len(lad19cds) - 1)
+    order = np.argsort(candidates, axis=1, kind="stable")[:, :n_similar]
+    rows = np.repeat(np.arange(len(lad19cds)), n_similar)
+    similar = order.ravel()
+    similar_distances = candidates[rows, similar]
+    keep = np.isfinite(similar_distances)
+    rows, similar, similar_distances = rows[keep], similar[keep], similar_distances[keep]
+
+    la_names = get_area_hierarchy().la_names
+    names = np.array([la_names.get(lad19cd, lad19cd) for lad19cd in lad19cds], dtype=object)
+    codes = lad19cds.to_numpy()
+    return pd.DataFrame(
+        {
+            "lad19cd": codes[rows],
+            "lad19nm": names[rows],
+            "country": countries[rows],
+            "rank": np.tile(np.arange(1, n_similar + 1), len(lad19cds))[keep],
+            "similar_lad19cd": codes[similar],
+            "similar_lad19nm": names[similar],
+            "similar_country": countries[similar],
+            "distance": similar_distances,
+        }
+    )
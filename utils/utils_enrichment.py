@@ -0,0 +1,147 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from getters.english_la_iod_data_2019 import get_english_la_iod_2019
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_iod_values import iod_indices, wiod_indices
+from utils.utils_timing import timed
+
+# Rows read, joined and written at a time; memory use depends on this, not on the size of the input.
+ENRICH_CHUNK_ROWS = 250_000
+ENRICH_KEYS = ["lsoa11cd", "lad19cd"]
+
+
+@lru_cache(maxsize=len(ENRICH_KEYS))
+def get_decile_table(key: str) -> pd.DataFrame:
+    """Building the table rows are enriched from, once per process; the English and Welsh LSOA
+    deciles for "lsoa11cd", or the English LA deciles for "lad19cd". It has an extra, empty
+    last row that codes missing from the IoD data are joined to.
+
+    Args:
+        key (str): "lsoa11cd" or "lad19cd".
+
+    Returns:
+        pd.DataFrame: Nullable UInt8 deciles, indexed on the codes.
+    """
+    if key == "lsoa11cd":
+        english = get_english_lsoa_iod_2019(columns=[key] + iod_indices).set_index(key)
+        welsh = get_welsh_lsoa_iod_2019(columns=[key] + wiod_indices).set_index(key)
+        table = pd.concat([english, welsh])
+    elif key == "lad19cd":
+        table = get_english_la_iod_2019(columns=[key] + iod_indices)
+        table = table.set_index(table[key].astype(str))[iod_indices]
+    else:
+        raise ValueError(f"Can only enrich on {ENRICH_KEYS}, not {key!r}")
+    table = table.astype("UInt8")
+    return pd.concat([table, table.iloc[:0].reindex([None])])
+
+
+def enrich_chunk(chunk: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Adding the deciles of each row's LSOA or LA, with a hash lookup of the codes;
+    the deciles are missing for codes that aren't in the IoD data.
+
+    Args:
+        chunk (pd.DataFrame): Rows with a key column.
+        key (str): "lsoa11cd" or "lad19cd".
+
+    Returns:
+        pd.DataFrame: The rows with the decile columns added.
+    """
+    table = get_decile_table(key)
+    clashes = chunk.columns.intersection(table.columns)
+    if len(clashes):
+        raise ValueError(f"The input already has decile columns: {list(clashes)}")
+    positions = table.index[:-1].get_indexer(chunk[key].astype(str).str.strip())
+    deciles = table.iloc[np.where(positions >= 0, positions, len(table) - 1)]
+    return pd.concat([chunk.reset_index(drop=True), deciles.reset_index(drop=True)], axis=1)
+
+
+def read_chunks(path: Path, chunk_rows: int = ENRICH_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Reading a CSV (every column as text, as written) or Parquet file a chunk of rows at a time."""
+    if path.suffix == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+def detect_key(path: Path) -> str:
+    """Picking the first of ENRICH_KEYS that is a column of the file."""
+    if path.suffix == ".parquet":
+        columns = pq.read_schema(path).names
+    else:
+        columns = pd.read_csv(path, nrows=0).columns
+    for key in ENRICH_KEYS:
+        if key in columns:
+            return key
+    raise ValueError(f"{path} has none of the columns {ENRICH_KEYS}")
+
+
+def output_schema(path: Path, key: str) -> pa.Schema:
+    """Arrow schema of the enriched file; the input's columns, as the whole file types them
+    (rather than one chunk, whose columns may be all null), followed by the decile columns."""
+    if path.suffix == ".parquet":
+        schema = pq.read_schema(path)
+        index_columns = (schema.pandas_metadata or {}).get("index_columns", [])
+        fields = [field for field in schema.remove_metadata() if field.name not in index_columns]
+    else:
+        columns = pd.read_csv(path, dtype=str, keep_default_na=False, nrows=0).columns
+        fields = [pa.field(column, pa.string()) for column in columns]
+    deciles = pa.Schema.from_pandas(get_decile_table(key), preserve_index=False)
+    return pa.schema(fields + list(deciles.remove_metadata()))
+
+
+@timed("enrich")
+def enrich_file(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    key: Optional[str] = None,
+    chunk_rows: int = ENRICH_CHUNK_ROWS,
+) -> Dict[str, int]:
+    """Streaming a CSV or Parquet file of LSOA or LA codes through enrich_chunk into a CSV or
+    Parquet file (picked by the extensions), one chunk at a time. Both are written by pyarrow,
+    which writes CSV several times faster than pandas, to a temporary file that is renamed once
+    it is complete. The output columns are typed from the whole input file (see output_schema).
+
+    Args:
+        input_path (Union[str, Path]): File to enrich.
+        output_path (Union[str, Path]): File to write.
+        key (str, optional): Column with the codes. Defaults to the first of ENRICH_KEYS in the file.
+        chunk_rows (int, optional): Rows per chunk. Defaults to ENRICH_CHUNK_ROWS.
+
+    Returns:
+        Dict[str, int]: Number of rows read and of rows whose code was found.
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    key = key or detect_key(input_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    counts = {"rows": 0, "matched": 0}
+    decile_columns = get_decile_table(key).columns
+    schema = output_schema(input_path, key)
+    try:
+        with open(tmp_path, "wb") as f:
+            writer = (
+                pq.ParquetWriter(f, schema)
+                if output_path.suffix == ".parquet"
+                else pa_csv.CSVWriter(f, schema)
+            )
+            for chunk in read_chunks(input_path, chunk_rows):
+                enriched = enrich_chunk(chunk, key)
+                counts["rows"] += len(enriched)
+                counts["matched"] += int(enriched[decile_columns].notna().any(axis=1).sum())
+                writer.write_table(
+                    pa.Table.from_pandas(enriched, schema=schema, preserve_index=False)
+                )
+            writer.close()
+        tmp_path.replace(output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return counts
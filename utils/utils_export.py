@@ -0,0 +1,308 @@
+import hashlib
+import json
+from functools import lru_cache
+from typing import BinaryIO, Callable, Dict, Iterator, NamedTuple, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from getters.english_la_iod_data_2019 import get_english_la_iod_2019
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from getters.lsoa_la_tiles_2011 import get_lsoa_la_tile_geometries, has_lsoa_la_tile
+from utils.utils_iod_values import iod_indices, wiod_indices
+from utils.utils_lsoa_index import COUNTRY_LSOA_TABLES
+from utils.utils_page_data import get_region_rows
+from utils.utils_timing import timed
+
+# Rows encoded per chunk, so streaming an export never holds the whole file in memory.
+EXPORT_CHUNK_ROWS = 10_000
+# Number of (selection, format) exports kept in memory.
+EXPORT_CACHE_SIZE = 16
+
+
+class ExportSelection(NamedTuple):
+    """What the user is looking at, e.g. ExportSelection("lsoa", lad19cds=("E06000001",)).
+
+    kind is one of EXPORT_KINDS. Build the tuples sorted, so the same selection made in a
+    different order shares a cache entry.
+    """
+
+    kind: str
+    region_names: Tuple[str, ...] = ()
+    lad19cds: Tuple[str, ...] = ()
+
+
+class ExportFormat(NamedTuple):
+    extension: str
+    mime: str
+    # Encodes a dataframe as the bytes of the file, a chunk at a time.
+    encode: Callable[[pd.DataFrame], Iterator[bytes]]
+
+
+def _chunks(data: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    """Splitting a dataframe into EXPORT_CHUNK_ROWS row slices (one empty slice if it has no rows)."""
+    for start in range(0, max(len(data), 1), EXPORT_CHUNK_ROWS):
+        yield data.iloc[start : start + EXPORT_CHUNK_ROWS]
+
+
+class _ChunkSink:
+    """Write-only file collecting what a writer wrote since it was last drained, and counting
+    the bytes written so far (ParquetWriter records the file offsets of its row groups)."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data: bytes) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def encode_csv(data: pd.DataFrame) -> Iterator[bytes]:
+    """Encoding a dataframe as UTF-8 CSV, one chunk at a time.
+
+    Args:
+        data (pd.DataFrame): Pandas dataframe to encode.
+
+    Yields:
+        bytes: The next part of the file.
+    """
+    for i, chunk in enumerate(_chunks(data)):
+        yield chunk.to_csv(index=False, header=i == 0).encode("utf-8")
+
+
+def encode_parquet(data: pd.DataFrame) -> Iterator[bytes]:
+    """Encoding a dataframe as Parquet, one row group per chunk.
+
+    Args:
+        data (pd.DataFrame): Pandas dataframe to encode.
+
+    Yields:
+        bytes: The next part of the file.
+    """
+    schema = pa.Schema.from_pandas(data, preserve_index=False)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for chunk in _chunks(data):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    # The footer is written on close.
+    yield sink.drain()
+
+
+def encode_geojson(data: pd.DataFrame) -> Iterator[bytes]:
+    """Encoding LSOA rows as a GeoJSON FeatureCollection, one chunk at a time. The geometry
+    comes from the LA tiles (pipeline/build_lsoa_la_tiles.py), so GeoJSON is only offered for
+    selections whose tiles have been built (see get_export_formats).
+
+    Args:
+        data (pd.DataFrame): LSOA IoD data, with lsoa11cd and lad19cd columns.
+
+    Yields:
+        bytes: The next part of the file.
+    """
+    geometries = {}
+    for lad19cd in data.lad19cd.unique():
+        geometries.update(get_lsoa_la_tile_geometries(str(lad19cd)))
+    yield b'{"type": "FeatureCollection", "features": ['
+    for i, chunk in enumerate(_chunks(data)):
+        records = chunk.astype(object).where(chunk.notna(), None).to_dict("records")
+        features = ", ".join(
+            json.dumps(
+                {
+                    "type": "Feature",
+                    "properties": record,
+                    "geometry": geometries.get(record["lsoa11cd"]),
+                }
+            )
+            for record in records
+        )
+        if features:
+            yield ((", " if i else "") + features).encode("utf-8")
+    yield b"]}"
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "CSV": ExportFormat("csv", "text/csv", encode_csv),
+    "Parquet": ExportFormat("parquet", "application/vnd.apache.parquet", encode_parquet),
+    "GeoJSON": ExportFormat("geojson", "application/geo+json", encode_geojson),
+}
+
+
+def _la_rows(selection: ExportSelection) -> pd.DataFrame:
+    """English LA rows of the chosen LAs."""
+    data = get_english_la_iod_2019()
+    return data[data.lad19cd.isin(selection.lad19cds)]
+
+
+def _region_rows(selection: ExportSelection) -> pd.DataFrame:
+    """English LA rows of the chosen regions."""
+    return get_region_rows("la", selection.region_names)
+
+
+def _lsoa_rows(selection: ExportSelection) -> pd.DataFrame:
+    """English and Welsh LSOA rows of the chosen LAs, each from its country's table (by the
+    first letter of the LA code), the English first. A selection of both countries has the
+    English and the Welsh decile columns, each missing for the other country's LSOAs."""
+    parts = []
+    for country, get_data in COUNTRY_LSOA_TABLES.items():
+        lad19cds = [lad19cd for lad19cd in selection.lad19cds if lad19cd.startswith(country)]
+        if lad19cds:
+            data = get_data()
+            parts.append(data[data.lad19cd.isin(lad19cds)])
+    if len(parts) == 1:
+        return parts[0]
+    if not parts:
+        return get_english_lsoa_iod_2019().iloc[:0]
+    deciles = {column: "UInt8" for column in iod_indices + wiod_indices}
+    return pd.concat(
+        [part.astype({"lad19cd": str, "lad19nm": str, "region_name": str}) for part in parts],
+        ignore_index=True,
+    ).astype(deciles)
+
+
+def _comparison_rows(selection: ExportSelection) -> pd.DataFrame:
+    """England-Wales comparison LSOA rows of the chosen LAs."""
+    data = get_english_wales_lsoa_iod_2019()
+    return data[data.lad19cd.isin(selection.lad19cds)]
+
+
+# The rows behind each kind of selection, and the formats they can be downloaded as.
+EXPORT_KINDS: Dict[str, Tuple[Callable[[ExportSelection], pd.DataFrame], Tuple[str, ...]]] = {
+    "la": (_la_rows, ("CSV", "Parquet")),
+    "region": (_region_rows, ("CSV", "Parquet")),
+    "lsoa": (_lsoa_rows, ("CSV", "Parquet", "GeoJSON")),
+    "comparison": (_comparison_rows, ("CSV", "Parquet", "GeoJSON")),
+}
+
+
+def get_export_formats(selection: ExportSelection) -> Tuple[str, ...]:
+    """Returning the formats a selection can be downloaded as; GeoJSON only when the LSOA tile
+    of every chosen LA has been built, as the geometry would otherwise be null.
+
+    Args:
+        selection (ExportSelection): The selection.
+
+    Returns:
+        Tuple[str, ...]: Names from EXPORT_FORMATS.
+    """
+    formats = EXPORT_KINDS[selection.kind][1]
+    if "GeoJSON" in formats and not all(map(has_lsoa_la_tile, selection.lad19cds)):
+        return tuple(file_format for file_format in formats if file_format != "GeoJSON")
+    return formats
+
+
+def selection_hash(selection: ExportSelection) -> str:
+    """Short, stable hash of a selection, used in the file name.
+
+    Args:
+        selection (ExportSelection): The selection.
+
+    Returns:
+        str: 12 hex characters.
+    """
+    key = json.dumps(selection._asdict(), sort_keys=True).encode("utf-8")
+    return hashlib.sha1(key).hexdigest()[:12]
+
+
+def iter_export(selection: ExportSelection, file_format: str) -> Iterator[bytes]:
+    """Streaming the IoD rows behind a selection as a file, chunk by chunk, e.g. to a response
+    or a file on disk, so the whole export is never held in memory as bytes.
+
+    Args:
+        selection (ExportSelection): The selection to export.
+        file_format (str): One of get_export_formats(selection), e.g. "CSV".
+
+    Raises:
+        ValueError: If the selection can't be exported in that format.
+
+    Returns:
+        Iterator[bytes]: The parts of the file, in order.
+    """
+    if file_format not in get_export_formats(selection):
+        raise ValueError(f"This {selection.kind} selection can't be exported as {file_format}")
+    select_rows = EXPORT_KINDS[selection.kind][0]
+    return EXPORT_FORMATS[file_format].encode(select_rows(selection))
+
+
+def write_export(selection: ExportSelection, file_format: str, file: BinaryIO) -> None:
+    """Writing the IoD rows behind a selection to a binary file, chunk by chunk (see iter_export).
+
+    Args:
+        selection (ExportSelection): The selection to export.
+        file_format (str): One of get_export_formats(selection), e.g. "CSV".
+        file (BinaryIO): File to write to.
+
+    Raises:
+        ValueError: If the selection can't be exported in that format.
+    """
+    for chunk in iter_export(selection, file_format):
+        file.write(chunk)
+
+
+@lru_cache(maxsize=EXPORT_CACHE_SIZE)
+@timed("export")
+def export_selection(selection: ExportSelection, file_format: str) -> bytes:
+    """Exporting the IoD rows behind a selection as the bytes of a download. This isn't
+    streamed: st.download_button needs the whole file, so the chunks of iter_export are joined.
+    Only the export asked for is built, and the last EXPORT_CACHE_SIZE are kept, keyed on the
+    selection and format, so downloading the same selection again costs nothing.
+
+    Args:
+        selection (ExportSelection): The selection to export.
+        file_format (str): One of get_export_formats(selection), e.g. "CSV".
+
+    Returns:
+        bytes: The file contents.
+    """
+    return b"".join(iter_export(selection, file_format))
+
+
+def export_file_name(selection: ExportSelection, file_format: str) -> str:
+    """File name of an export, e.g. "iod_lsoa_1a2b3c4d5e6f.csv".
+
+    Args:
+        selection (ExportSelection): The selection to export.
+        file_format (str): One of EXPORT_FORMATS.
+
+    Returns:
+        str: The file name.
+    """
+    extension = EXPORT_FORMATS[file_format].extension
+    return f"iod_{selection.kind}_{selection_hash(selection)}.{extension}"
+
+
+def export_mime(file_format: str) -> str:
+    """MIME type of an export format.
+
+    Args:
+        file_format (str): One of EXPORT_FORMATS.
+
+    Returns:
+        str: The MIME type.
+    """
+    return EXPORT_FORMATS[file_format].mime
+
+
+def clear_export_cache() -> None:
+    """Dropping the memoized exports, e.g. after the data has been rebuilt."""
+    export_selection.cache_clear()
@@ -0,0 +1,99 @@
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Tuple
+
+import pandas as pd
+
+from getters.english_la_iod_data_2019 import get_english_la_iod_2019
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from getters.iod_data_loader import get_data_dir
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+
+# Country of each LA code prefix.
+COUNTRIES = {"E": "England", "W": "Wales"}
+HIERARCHY_COLUMNS = ["lad19cd", "lad19nm", "region_name"]
+
+
+class AreaHierarchy(NamedTuple):
+    """Regions and LAs of England and Wales, each list sorted by name, so the app's option
+    lists are dictionary lookups. The mappings are read-only; the hierarchy is shared."""
+
+    # Country -> region names.
+    country_regions: Mapping[str, Tuple[str, ...]]
+    # Country -> LA names.
+    country_las: Mapping[str, Tuple[str, ...]]
+    # Region name -> LA names.
+    region_las: Mapping[str, Tuple[str, ...]]
+    # LA name -> LA code, and back.
+    la_codes: Mapping[str, str]
+    la_names: Mapping[str, str]
+    # LA code -> region name.
+    la_regions: Mapping[str, str]
+
+    def regions(self, country: str = "England") -> Tuple[str, ...]:
+        """Region names of a country, "England" or "Wales"."""
+        return self.country_regions[country]
+
+    def las(self, region_name: str) -> Tuple[str, ...]:
+        """LA names of a region, e.g. "London"."""
+        return self.region_las[region_name]
+
+    def las_of_regions(self, region_names: Iterable[str]) -> Tuple[str, ...]:
+        """LA names of several regions, sorted."""
+        return tuple(sorted(la for region in region_names for la in self.region_las[region]))
+
+    def la_code(self, lad19nm: str) -> str:
+        """LA code of an LA name, e.g. "Cardiff" -> "W06000015". The old names the comparison
+        table still uses are accepted too, e.g. "Shepway" -> "E07000112"."""
+        if lad19nm in self.la_codes:
+            return self.la_codes[lad19nm]
+        return _old_la_codes(get_data_dir())[lad19nm]
+
+
+def _sorted_groups(keys: pd.Series, values: pd.Series) -> Mapping[str, Tuple[str, ...]]:
+    """Distinct values of each key, sorted."""
+    pairs = pd.DataFrame({"key": keys.astype(str), "value": values.astype(str)})
+    pairs = pairs.drop_duplicates().sort_values(["key", "value"])
+    return MappingProxyType(
+        {key: tuple(group) for key, group in pairs.groupby("key", sort=False).value}
+    )
+
+
+@lru_cache(maxsize=2)
+def _old_la_codes(data_dir: Path) -> Mapping[str, str]:
+    """LA code of each LA name of the comparison table in data_dir (e.g. Shepway, now Folkestone
+    and Hythe); only its two LA columns are read, and only for names the hierarchy lacks."""
+    las = get_english_wales_lsoa_iod_2019(columns=["lad19nm", "lad19cd"]).drop_duplicates()
+    return MappingProxyType(dict(zip(las.lad19nm.astype(str), las.lad19cd.astype(str))))
+
+
+@lru_cache(maxsize=2)
+def _build_hierarchy(data_dir: Path) -> AreaHierarchy:
+    """Building the hierarchy from the English LAs of the LA table and the Welsh LAs (with
+    their Welsh regions) of the Welsh LSOA table in data_dir; the English LSOA table isn't read."""
+    english = get_english_la_iod_2019(columns=HIERARCHY_COLUMNS)
+    english = english[english.lad19cd.astype(str).str.startswith("E")]
+    welsh = get_welsh_lsoa_iod_2019(columns=HIERARCHY_COLUMNS).drop_duplicates()
+    las = pd.concat([english.astype(str), welsh.astype(str)], ignore_index=True)
+    country = las.lad19cd.str[0].map(COUNTRIES)
+    # The LA codes and names, one row per LA.
+    codes = las.drop_duplicates("lad19cd")
+    return AreaHierarchy(
+        country_regions=_sorted_groups(country, las.region_name),
+        country_las=_sorted_groups(country, las.lad19nm),
+        region_las=_sorted_groups(las.region_name, las.lad19nm),
+        la_codes=MappingProxyType(dict(zip(codes.lad19nm, codes.lad19cd))),
+        la_names=MappingProxyType(dict(zip(codes.lad19cd, codes.lad19nm))),
+        la_regions=MappingProxyType(dict(zip(codes.lad19cd, codes.region_name))),
+    )
+
+
+def get_area_hierarchy() -> AreaHierarchy:
+    """Returning the region/LA hierarchy of England and Wales, built once per data folder
+    (IOD_DATA_DIR), from the English LA and Welsh LSOA data.
+
+    Returns:
+        AreaHierarchy: The shared, read-only hierarchy.
+    """
+    return _build_hierarchy(get_data_dir())
@@ -0,0 +1,273 @@
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from getters.english_la_iod_data_2019 import get_english_la_iod_2019
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_iod_values import (
+    iod_combined_indices,
+    iod_combined_names,
+    iod_indices,
+    iod_names,
+    wiod_indices,
+    wiod_names,
+)
+from utils.utils_timing import timed
+
+# Columns of the area table, besides the area code it is indexed on and the dataset. Each wide
+# table has some of them (only the LA table has country, the Welsh tables have no region_code).
+AREA_COLUMNS = ["area_name", "lad19cd", "lad19nm", "country", "region_code", "region_name"]
+
+
+class StoreDataset(NamedTuple):
+    # Wide table the dataset is read from.
+    getter: Callable[..., pd.DataFrame]
+    # Column with the area codes; "lad19cd" for LAs, "lsoa11cd" for LSOAs.
+    area_column: str
+    # Decile columns, and the names of their indices in the same order.
+    indices: List[str]
+    names: List[str]
+
+
+# Datasets of the store, by name.
+STORE_DATASETS: Dict[str, StoreDataset] = {
+    "english_la": StoreDataset(get_english_la_iod_2019, "lad19cd", iod_indices, iod_names),
+    "english_lsoa": StoreDataset(get_english_lsoa_iod_2019, "lsoa11cd", iod_indices, iod_names),
+    "welsh_lsoa": StoreDataset(get_welsh_lsoa_iod_2019, "lsoa11cd", wiod_indices, wiod_names),
+    "comparison": StoreDataset(
+        get_english_wales_lsoa_iod_2019, "lsoa11cd", iod_combined_indices, iod_combined_names
+    ),
+}
+
+
+# Name of each decile column; "Income Domain" is both a Welsh and a comparison index.
+INDEX_NAMES: Dict[str, str] = {
+    index: name
+    for spec in STORE_DATASETS.values()
+    for index, name in zip(spec.indices, spec.names)
+}
+
+
+def _name_column(area_column: str) -> str:
+    return "lad19nm" if area_column == "lad19cd" else "lsoa11nm"
+
+
+class IodStore(NamedTuple):
+    """Every IoD decile of England and Wales in long format, one row per (area, dataset, index).
+    Each area's code, name, LA and region are stored once per dataset in the area table, as the
+    datasets don't always agree (the comparison table still has Shepway, and puts one Welsh LSOA
+    in a different LA). The values hold uint8 deciles, the position of their (dataset, area) row
+    in the area table and dictionary encoded (categorical) dataset and index columns, 7 bytes a
+    value. The values are sorted so each (dataset, index) is a row range."""
+
+    # One row per (dataset, area), indexed on the LA or LSOA code, with dataset and
+    # AREA_COLUMNS columns; each dataset's rows are a row range, in the order of its wide table.
+    areas: pd.DataFrame
+    # Long values, with area (int32), dataset, iod (int8 categoricals) and decile (uint8) columns.
+    values: pd.DataFrame
+    # Row range of each (dataset, index) in the values.
+    blocks: Dict[Tuple[str, str], slice]
+    # Row range of each dataset in the area table.
+    dataset_areas: Dict[str, slice]
+    # Columns of each dataset's wide table, in order.
+    dataset_columns: Dict[str, List[str]]
+
+    def dataset_area_table(self, dataset: str) -> pd.DataFrame:
+        """The area table rows of one dataset (a view), e.g. to pick areas to pivot by region.
+
+        Args:
+            dataset (str): One of STORE_DATASETS.
+
+        Returns:
+            pd.DataFrame: Pandas dataframe indexed on the area code, with AREA_COLUMNS.
+        """
+        return self.areas.iloc[self.dataset_areas[dataset]]
+
+    def pivot(
+        self,
+        dataset: str,
+        indices: Optional[List[str]] = None,
+        area_codes: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """Wide view of a dataset, with the columns of its table; the area code and name, LA,
+        region and one decile column per index (uint8, or UInt8 if some are missing).
+
+        Args:
+            dataset (str): One of STORE_DATASETS.
+            indices (List[str], optional): Decile columns. Defaults to all of the dataset's.
+            area_codes (Iterable[str], optional): Areas to keep. Defaults to all of the
+                dataset's, in the order of its table.
+
+        Returns:
+            pd.DataFrame: Pandas dataframe, one row per area.
+        """
+        spec = STORE_DATASETS[dataset]
+        indices = spec.indices if indices is None else indices
+        dataset_rows = self.dataset_areas[dataset]
+        rows = np.arange(dataset_rows.start, dataset_rows.stop)
+        if area_codes is not None:
+            rows = rows[self.dataset_area_table(dataset).index.isin(list(area_codes))]
+        # Output row of each area table row, -1 for rows that aren't in the view.
+        lookup = np.full(len(self.areas), -1, dtype=np.int64)
+        lookup[rows] = np.arange(len(rows))
+        deciles = np.zeros((len(indices), len(rows)), dtype=np.uint8)
+        present = np.zeros((len(indices), len(rows)), dtype=bool)
+        area = self.values.area.to_numpy()
+        decile = self.values.decile.to_numpy()
+        for i, index in enumerate(indices):
+            block = self.blocks[(dataset, index)]
+            positions = lookup[area[block]]
+            keep = positions >= 0
+            deciles[i, positions[keep]] = decile[block][keep]
+            present[i, positions[keep]] = True
+
+        areas = self.areas.iloc[rows]
+        wide = {}
+        for column in self.dataset_columns[dataset]:
+            if column == spec.area_column:
+                wide[column] = areas.index.to_numpy()
+            elif column == _name_column(spec.area_column):
+                wide[column] = areas.area_name.to_numpy()
+            elif column in spec.indices:
+                if column not in indices:
+                    continue
+                i = indices.index(column)
+                wide[column] = (
+                    deciles[i]
+                    if present[i].all()
+                    else pd.arrays.IntegerArray(deciles[i], ~present[i])
+                )
+            else:
+                wide[column] = areas[column].array
+        wide = pd.DataFrame(wide)
+        if spec.area_column == "lad19cd":
+            wide = wide.astype({"lad19cd": "category", "lad19nm": "category"})
+        return wide
+
+    def long(
+        self,
+        datasets: Optional[Iterable[str]] = None,
+        indices: Optional[Iterable[str]] = None,
+        area_codes: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """Long rows of any datasets, indices and areas, e.g. an English and a Welsh LSOA's
+        deciles across every dataset; the row ranges of the (dataset, index) pairs asked for
+        are taken straight from the values.
+
+        Args:
+            datasets (Iterable[str], optional): Datasets to keep. Defaults to all of them.
+            indices (Iterable[str], optional): Decile columns to keep. Defaults to all of them.
+            area_codes (Iterable[str], optional): Areas to keep. Defaults to all of them.
+
+        Returns:
+            pd.DataFrame: Pandas dataframe with area_code, AREA_COLUMNS, dataset, iod,
+                iod_name and decile columns.
+        """
+        datasets = list(STORE_DATASETS) if datasets is None else list(datasets)
+        indices = None if indices is None else set(indices)
+        blocks = [
+            block
+            for (dataset, index), block in self.blocks.items()
+            if dataset in datasets and (indices is None or index in indices)
+        ]
+        rows = np.concatenate(
+            [np.arange(block.start, block.stop) for block in blocks] or [np.arange(0)]
+        )
+        area = self.values.area.to_numpy()[rows]
+        if area_codes is not None:
+            keep = self.areas.index.isin(list(area_codes))
+            rows, area = rows[keep[area]], area[keep[area]]
+
+        long = {"area_code": self.areas.index.to_numpy()[area]}
+        for column in AREA_COLUMNS:
+            values = self.areas[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = values.cat.codes.to_numpy()[area]
+                long[column] = pd.Categorical.from_codes(codes, dtype=values.dtype)
+            else:
+                long[column] = values.to_numpy()[area]
+        for column in ["dataset", "iod"]:
+            # Only the categories asked for are kept, as they would be in a melt of the wide table.
+            values = self.values[column].array
+            codes = values.codes[rows]
+            used = np.unique(
+                np.array(
+                    [values.codes[block.start] for block in blocks if block.stop > block.start],
+                    dtype=np.int64,
+                )
+            )
+            recode = np.full(len(values.categories), -1, dtype=np.int8)
+            recode[used] = np.arange(len(used))
+            long[column] = pd.Categorical.from_codes(recode[codes], values.categories[used])
+        index_names = [INDEX_NAMES[index] for index in long["iod"].categories]
+        name_categories = list(dict.fromkeys(index_names))
+        name_codes = np.array([name_categories.index(name) for name in index_names], dtype=np.int8)
+        long["iod_name"] = pd.Categorical.from_codes(
+            name_codes[long["iod"].codes], name_categories
+        )
+        long["decile"] = self.values.decile.to_numpy()[rows]
+        return pd.DataFrame(long)
+
+
+def _dataset_areas(spec: StoreDataset, data: pd.DataFrame) -> pd.DataFrame:
+    """Area table rows of one dataset's wide table; AREA_COLUMNS it lacks are missing."""
+    areas = pd.DataFrame(
+        {
+            column: data[column].astype(object).to_numpy()
+            for column in AREA_COLUMNS[1:]
+            if column in data.columns
+        },
+        index=pd.Index(data[spec.area_column].astype(str).to_numpy(), name="area_code"),
+    ).reindex(columns=AREA_COLUMNS[1:])
+    areas.insert(0, "area_name", data[_name_column(spec.area_column)].astype(str).to_numpy())
+    return areas
+
+
+@lru_cache(maxsize=1)
+@timed("store")
+def get_iod_store() -> IodStore:
+    """Building the long IoD store from the four wide tables, once per process.
+
+    Returns:
+        IodStore: The shared store; don't modify its dataframes in place.
+    """
+    index_categories = list(INDEX_NAMES)
+    area_tables, area_parts, dataset_parts, index_parts, decile_parts = [], [], [], [], []
+    blocks, dataset_areas, dataset_columns = {}, {}, {}
+    start = area_start = 0
+    for dataset_code, (dataset, spec) in enumerate(STORE_DATASETS.items()):
+        data = spec.getter()
+        area_tables.append(_dataset_areas(spec, data))
+        dataset_areas[dataset] = slice(area_start, area_start + len(data))
+        dataset_columns[dataset] = list(data.columns)
+        positions = np.arange(area_start, area_start + len(data), dtype=np.int32)
+        area_start += len(data)
+        for index in spec.indices:
+            column = data[index]
+            present = column.notna().to_numpy()
+            deciles = column.to_numpy(dtype=np.uint8, na_value=0)[present]
+            area_parts.append(positions[present])
+            decile_parts.append(deciles)
+            dataset_parts.append(np.full(len(deciles), dataset_code, dtype=np.int8))
+            index_parts.append(np.full(len(deciles), index_categories.index(index), dtype=np.int8))
+            blocks[(dataset, index)] = slice(start, start + len(deciles))
+            start += len(deciles)
+
+    areas = pd.concat(area_tables).astype("category")
+    values = pd.DataFrame(
+        {
+            "area": np.concatenate(area_parts),
+            "dataset": pd.Categorical.from_codes(
+                np.concatenate(dataset_parts), categories=list(STORE_DATASETS)
+            ),
+            "iod": pd.Categorical.from_codes(
+                np.concatenate(index_parts), categories=index_categories
+            ),
+            "decile": np.concatenate(decile_parts),
+        }
+    )
+    return IodStore(areas, values, blocks, dataset_areas, dataset_columns)
@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.utils_iod_values import iod_indices, iod_names
+from utils.utils_page_data import get_region_rows
+from utils.utils_timing import timed
+
+
+@timed("melt")
+def melt_iod_table(
+    data: pd.DataFrame,
+    id_vars: List[str],
+    indices: List[str] = iod_indices,
+    names: List[str] = iod_names,
+) -> pd.DataFrame:
+    """Turning a wide IoD table into long format, one row per area and index; the same rows
+    as pd.melt followed by mapping the index columns to their names, but with categorical
+    iod and iod_name columns built from codes instead of replacing strings.
+
+    Args:
+        data (pd.DataFrame): Wide IoD data, one decile column per index.
+        id_vars (List[str]): Columns identifying each area, e.g. ["lad19cd", "lad19nm", "region_name"].
+        indices (List[str], optional): Decile columns to melt. Defaults to iod_indices.
+        names (List[str], optional): Names of the indices, in the same order. Defaults to iod_names.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe with id_vars, iod, decile and iod_name columns.
+    """
+    n_rows = len(data)
+    rows = np.tile(np.arange(n_rows), len(indices))
+    index_codes = np.repeat(np.arange(len(indices)), n_rows)
+    long = pd.DataFrame(
+        {column: data[column].iloc[rows].reset_index(drop=True) for column in id_vars}
+    )
+    long["iod"] = pd.Categorical.from_codes(index_codes, categories=indices)
+    long["decile"] = pd.concat([data[column] for column in indices], ignore_index=True)
+    long["iod_name"] = pd.Categorical.from_codes(index_codes, categories=names)
+    return long
+
+
+@lru_cache(maxsize=16)
+def get_la_melt(region_filter: Tuple[str, ...]) -> pd.DataFrame:
+    """Long format English LA IoD data for the chosen regions, built once per region filter.
+
+    Args:
+        region_filter (Tuple[str, ...]): Region names to keep.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe with lad19cd, lad19nm, region_name, iod, decile and iod_name columns.
+    """
+    data = get_region_rows("la", region_filter)
+    return melt_iod_table(data, ["lad19cd", "lad19nm", "region_name"])
+
@@ -0,0 +1,85 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.iod_data_loader import get_data_dir
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_preprocessing import preprocess_strings
+
+# boundary_region of the Welsh LSOAs, which all sit in one boundary file.
+WALES_BOUNDARY_REGION = "wales"
+INDEX_COLUMNS = ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm", "region_name"]
+CATEGORY_COLUMNS = ["lad19cd", "lad19nm", "region_name", "boundary_region"]
+# LSOA table of each country, by the first letter of its LA and LSOA codes.
+COUNTRY_LSOA_TABLES = {"E": get_english_lsoa_iod_2019, "W": get_welsh_lsoa_iod_2019}
+
+
+def get_lsoa_index() -> pd.DataFrame:
+    """Building the English and Welsh LSOA index, keyed on the LSOA code (lsoa11cd) with the
+    LSOA name, LA, region and the boundary file each LSOA is drawn from. boundary_region is the
+    region_name argument of get_english_lsoa_shapefiles_2011, or "wales" for the Welsh file.
+    The rows are sorted by LA, so each LA's LSOAs are contiguous. It is built once per data
+    folder (IOD_DATA_DIR).
+
+    Returns:
+        pd.DataFrame: Pandas dataframe indexed on lsoa11cd.
+    """
+    return _build_lsoa_index(get_data_dir())
+
+
+@lru_cache(maxsize=4)
+def _build_country_index(data_dir: Path, country: str) -> pd.DataFrame:
+    """Building the LSOA index of one country ("E" or "W") from its LSOA table in data_dir."""
+    lsoas = COUNTRY_LSOA_TABLES[country](columns=INDEX_COLUMNS).astype({"region_name": str})
+    if country == "W":
+        lsoas = lsoas.assign(boundary_region=WALES_BOUNDARY_REGION)
+    else:
+        region_names = lsoas.region_name.unique()
+        region_slugs = dict(zip(region_names, preprocess_strings(pd.Series(region_names))))
+        lsoas = lsoas.assign(boundary_region=lsoas.region_name.map(region_slugs))
+    return (
+        lsoas.astype({column: "category" for column in CATEGORY_COLUMNS})
+        .sort_values(["lad19cd", "lsoa11cd"])
+        .set_index("lsoa11cd")
+    )
+
+
+@lru_cache(maxsize=2)
+def _build_lsoa_index(data_dir: Path) -> pd.DataFrame:
+    """Building the LSOA index from the English and Welsh indices of the data in data_dir."""
+    return pd.concat(
+        [
+            _build_country_index(data_dir, country).astype(dict.fromkeys(CATEGORY_COLUMNS, str))
+            for country in COUNTRY_LSOA_TABLES
+        ]
+    ).astype({column: "category" for column in CATEGORY_COLUMNS})
+
+
+@lru_cache(maxsize=4)
+def _la_ranges(data_dir: Path, country: str) -> Dict[str, slice]:
+    """Row range of each LA in the LSOA index of one country of the data in data_dir."""
+    lad19cd = _build_country_index(data_dir, country).lad19cd.astype(str).to_numpy()
+    starts = np.r_[0, np.flatnonzero(lad19cd[1:] != lad19cd[:-1]) + 1]
+    stops = np.r_[starts[1:], len(lad19cd)]
+    return {lad19cd[start]: slice(start, stop) for start, stop in zip(starts, stops)}
+
+
+def get_la_lsoa_index(lad19cd: str) -> pd.DataFrame:
+    """Returning the rows of the LSOA index for one LA. Only the index of the LA's country is
+    built, so e.g. the Welsh LSOA page never reads the English LSOA table.
+
+    Args:
+        lad19cd (str): The LA code, e.g. "W06000015".
+
+    Returns:
+        pd.DataFrame: Pandas dataframe indexed on lsoa11cd.
+    """
+    country = lad19cd[:1]
+    if country not in COUNTRY_LSOA_TABLES:
+        raise KeyError(lad19cd)
+    data_dir = get_data_dir()
+    return _build_country_index(data_dir, country).iloc[_la_ranges(data_dir, country)[lad19cd]]
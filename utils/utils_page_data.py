@@ -0,0 +1,145 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Tuple
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from getters.english_la_iod_data_2019 import get_english_la_iod_2019
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.english_wales_comparison_iod_2019 import get_english_wales_lsoa_iod_2019
+from getters.iod_data_loader import get_data_dir
+from getters.la_shapefiles_2019 import (
+    get_english_la_shapefiles_2019,
+    get_english_la_topojson_2019,
+)
+from getters.lsoa_shapefiles_2011 import (
+    get_welsh_lsoa_shapefiles_2011,
+    get_welsh_lsoa_topojson_2011,
+)
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_timing import timed
+
+# Set IOD_USE_TOPOJSON=1 to plot from the TopoJSON boundaries (pipeline/build_topojson.py),
+# once they have been published alongside the GeoJSON files.
+USE_TOPOJSON = os.environ.get("IOD_USE_TOPOJSON", "").lower() in ("1", "true", "yes")
+
+
+# Tables the pages slice by region_name.
+REGION_TABLES: Dict[str, Callable[[], pd.DataFrame]] = {
+    "la": get_english_la_iod_2019,
+    "lsoa": get_english_lsoa_iod_2019,
+    "welsh": get_welsh_lsoa_iod_2019,
+    "comparison": get_english_wales_lsoa_iod_2019,
+}
+
+
+class RegionIndex(NamedTuple):
+    # Positions of each region's rows in the table, in the table's row order.
+    positions: Dict[str, np.ndarray]
+
+
+def get_region_index(table: str) -> RegionIndex:
+    """Grouping the rows of one of REGION_TABLES by region, once per data folder
+    (IOD_DATA_DIR). Only the row positions are kept; the table itself stays the getter's
+    (shared, possibly memory-mapped) copy.
+
+    Args:
+        table (str): One of REGION_TABLES.
+
+    Returns:
+        RegionIndex: The row positions of each region.
+    """
+    return _build_region_index(get_data_dir(), table)
+
+
+@lru_cache(maxsize=2 * len(REGION_TABLES))
+def _build_region_index(data_dir: Path, table: str) -> RegionIndex:
+    """Building the region index of one of REGION_TABLES from the data in data_dir."""
+    regions = REGION_TABLES[table](columns=["region_name"]).region_name.astype("category").cat
+    region_codes = regions.codes.to_numpy()
+    # A stable sort keeps each region's rows in the table's order.
+    order = np.argsort(region_codes, kind="stable").astype(np.int32)
+    starts = np.searchsorted(region_codes[order], np.arange(len(regions.categories) + 1))
+    return RegionIndex(
+        {
+            name: order[start:stop]
+            for name, start, stop in zip(regions.categories, starts[:-1], starts[1:])
+            if stop > start
+        }
+    )
+
+
+def get_region_rows(table: str, region_names: Iterable[str]) -> pd.DataFrame:
+    """Rows of some regions of a table, in the table's order. When they are one contiguous run
+    of the table (e.g. every region of a table of English areas) they are a slice of the
+    getter's table, which copies no data; otherwise only the rows asked for are copied.
+
+    Args:
+        table (str): One of REGION_TABLES.
+        region_names (Iterable[str]): Regions to keep; unknown names are ignored.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe. It may share its data with other callers, so don't
+            modify it in place.
+    """
+    data = REGION_TABLES[table]()
+    positions = get_region_index(table).positions
+    chosen = [positions[name] for name in set(region_names) if name in positions]
+    rows = np.sort(np.concatenate(chosen)) if chosen else np.arange(0)
+    if len(rows) and rows[-1] - rows[0] == len(rows) - 1:
+        return data.iloc[rows[0] : rows[-1] + 1]
+    return data.take(rows)
+
+
+@lru_cache(maxsize=16)
+@timed("filter")
+def get_la_data(region_filter: Tuple[str, ...]) -> pd.DataFrame:
+    """English LA IoD data for the chosen regions (see get_region_rows).
+
+    Args:
+        region_filter (Tuple[str, ...]): Region names to keep.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe.
+    """
+    return get_region_rows("la", region_filter)
+
+
+def get_la_boundaries() -> alt.Data:
+    """English LA boundaries, as TopoJSON if USE_TOPOJSON is set."""
+    if USE_TOPOJSON:
+        return get_english_la_topojson_2019()
+    return get_english_la_shapefiles_2019()
+
+
+def get_welsh_lsoa_boundaries() -> alt.Data:
+    """Welsh LSOA boundaries, as TopoJSON if USE_TOPOJSON is set."""
+    if USE_TOPOJSON:
+        return get_welsh_lsoa_topojson_2011()
+    return get_welsh_lsoa_shapefiles_2011()
+
+
+# Datasets a page can declare it depends on, by name, each loaded through its cached getter.
+# The English LSOA boundaries are split by region, so the LSOA charts load them per LA instead.
+DATASET_ACCESSORS: Dict[str, Callable[[], Any]] = {
+    "english_la": get_english_la_iod_2019,
+    "english_lsoa": get_english_lsoa_iod_2019,
+    "welsh_lsoa": get_welsh_lsoa_iod_2019,
+    "comparison": get_english_wales_lsoa_iod_2019,
+    "la_boundaries": get_la_boundaries,
+    "welsh_lsoa_boundaries": get_welsh_lsoa_boundaries,
+}
+
+
+def load_page_datasets(dataset_names: Iterable[str]) -> None:
+    """Loading only the datasets a page depends on, so their getters' caches are warm before
+    the page's charts read them.
+
+    Args:
+        dataset_names (Iterable[str]): Names from DATASET_ACCESSORS.
+    """
+    for name in dataset_names:
+        DATASET_ACCESSORS[name]()
@@ -0,0 +1,82 @@
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+import altair as alt
+
+# As we are looking at the Deciles, the palettes have 10 colours; decile 1 first.
+DOMAIN = [i + 1 for i in range(10)]
+
+
+class Palette(NamedTuple):
+    # Hex colour of each decile, precomputed so nothing needs matplotlib at runtime
+    # (Spring and Autumn are matplotlib's YlGnBu and plasma_r, cut into 10 colours).
+    colours: List[str]
+    # Vega scheme the Altair scale uses instead of the colours, if any.
+    scheme: Optional[str] = None
+    reverse: Optional[bool] = None
+
+
+# Colour Pallette for the Choropleth maps
+PALETTES = {
+    "Spring": Palette(
+        ["#ffffd9", "#eff9b5", "#cfecb3", "#97d6b9", "#5dc0c0",
+         "#31a6c2", "#1f80b8", "#2355a4", "#22318d", "#081d58"],
+        scheme="yellowgreenblue",
+        reverse=False,
+    ),
+    "Summer": Palette(
+        ["#f94144", "#f3722c", "#f8961e", "#f9844a", "#f9c74f",
+         "#90be6d", "#43aa8b", "#4d908e", "#577590", "#277da1"],
+    ),
+    "Autumn": Palette(
+        ["#f0f921", "#fdca26", "#fb9f3a", "#ed7953", "#d8576b",
+         "#bd3786", "#9c179e", "#7201a8", "#46039f", "#0d0887"],
+        scheme="plasma",
+        reverse=True,
+    ),
+    # The scale reverses the range, so the map still starts at #7400b8 for decile 1.
+    "Winter": Palette(
+        ["#7400b8", "#6930c3", "#5e60ce", "#5390d9", "#4ea8de",
+         "#48bfe3", "#56cfe1", "#64dfdf", "#72efdd", "#80ffdb"],
+        reverse=True,
+    ),
+}
+
+
+def get_palette_names() -> List[str]:
+    """Returning the names of the colour palettes, in the order they are offered in the app.
+
+    Returns:
+        List[str]: Palette names, e.g. ["Spring", "Summer", "Autumn", "Winter"].
+    """
+    return list(PALETTES)
+
+
+def get_palette_colours(name: str) -> List[str]:
+    """Returning the hex colour of each decile for a palette.
+
+    Args:
+        name (str): Palette name, e.g. "Winter".
+
+    Returns:
+        List[str]: 10 hex colours, decile 1 first.
+    """
+    return list(PALETTES[name].colours)
+
+
+@lru_cache(maxsize=None)
+def get_colour_scale(name: str) -> alt.Scale:
+    """Building the Altair colour scale of a palette, once per palette.
+
+    Args:
+        name (str): Palette name, e.g. "Winter".
+
+    Returns:
+        alt.Scale: Scale over the deciles 1 to 10. It is shared, so don't modify it.
+    """
+    palette = PALETTES[name]
+    if palette.scheme is not None:
+        return alt.Scale(domain=DOMAIN, scheme=palette.scheme, reverse=palette.reverse)
+    if palette.reverse:
+        return alt.Scale(domain=DOMAIN, range=palette.colours[::-1], reverse=True)
+    return alt.Scale(domain=DOMAIN, range=palette.colours)
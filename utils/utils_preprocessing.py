@@ -1,9 +1,59 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
+# "/" becomes a space and :()%' are dropped, in one str.translate.
+_TRANSLATION = str.maketrans({"/": " ", ":": None, "(": None, ")": None, "%": None, "'": None})
+_TRANSLATED = re.compile(r"[/:()%']")
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+_LONG_SEPARATORS = re.compile(r"[^a-z0-9]{2}")
+_SPACES = re.compile(r" +")
+
+
+@lru_cache(maxsize=1024)
+def _underscores(run: str) -> str:
+    """Replacing a run of separators with the underscores the chained replaces used to leave:
+    double spaces were halved, then each character became _, and ___ then __ were collapsed."""
+    n = len(run) - sum(len(spaces) // 2 for spaces in _SPACES.findall(run))
+    n = n // 3 + n % 3
+    return "_" * (n // 2 + n % 2)
+
+
+@lru_cache(maxsize=65536)
+def preprocess_string(string: str) -> str:
+    """Cleaning one string as preprocess_strings does.
+
+    Args:
+        string (str): String to clean.
+
+    Returns:
+        str: Cleaned string.
+    """
+    # str.translate is slow for a dict table, so it is skipped for strings it wouldn't change.
+    if _TRANSLATED.search(string) is not None:
+        string = string.translate(_TRANSLATION)
+    string = string.strip().lower()
+    if _LONG_SEPARATORS.search(string) is None:
+        # Single separators, the usual case, each become one _.
+        return _SEPARATORS.sub("_", string)
+    return _SEPARATORS.sub(lambda match: _underscores(match.group()), string)
+
+
+def _preprocess_value(value) -> Optional[str]:
+    """Like the pandas .str methods, non-strings (other than missing values) become NaN."""
+    if isinstance(value, str):
+        return preprocess_string(value)
+    return np.nan
+
 
 def preprocess_strings(strings: pd.Series) -> pd.Series:
     """Cleaning list of strings; removing punctuation and extra spaces,
     making the text lower case and placing _ for the remaining whitespace.
+    Each distinct string is cleaned once, in a single regex pass. Missing values (None, NaN,
+    pd.NA) are kept as they are, as the pandas .str methods keep them.
 
     Args:
         strings (pd.Series): Panda series of strings to clean.
@@ -11,14 +61,15 @@ def preprocess_strings(strings: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Pandas series of cleaned strings.
     """
-    strings = (
-        strings.str.replace(r"[/]", " ", regex=True)
-        .str.replace(r"[:()\%']", "", regex=True)
-        .str.replace("  ", " ", regex=True)
-        .str.strip()
-        .str.lower()
-        .str.replace(r"[^a-zA-Z0-9_]", r"_", regex=True)
-        .str.replace("___", "_", regex=True)
-        .str.replace("__", "_", regex=True)
-    )
-    return strings
+    # factorize gives every missing value the code -1, whatever its kind, so those rows are
+    # copied back from the input.
+    codes, uniques = pd.factorize(strings)
+    cleaned = np.array([_preprocess_value(value) for value in uniques] + [None], dtype=object)
+    cleaned = cleaned[codes]
+    missing = codes < 0
+    if missing.any():
+        cleaned[missing] = strings.to_numpy(dtype=object)[missing]
+    cleaned = pd.Series(cleaned, index=strings.index, name=strings.name)
+    if isinstance(strings.dtype, pd.StringDtype):
+        return cleaned.astype(strings.dtype)
+    return cleaned
@@ -0,0 +1,86 @@
+from typing import List, Optional
+
+import pandas as pd
+
+
+def select_rows_and_columns(
+    data: pd.DataFrame,
+    columns: List[str],
+    column_filter: Optional[str] = None,
+    values: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Pruning a dataframe down to the rows and columns a chart actually uses, so only
+    those are serialised into the Vega-Lite spec sent to the browser.
+
+    Args:
+        data (pd.DataFrame): Pandas dataframe to prune.
+        columns (List[str]): Columns the chart uses (duplicates are dropped).
+        column_filter (str, optional): Column to filter the rows on, e.g. "lad19nm".
+        values (List[str], optional): Values of column_filter to keep.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe with only the rows and columns needed.
+    """
+    columns = list(dict.fromkeys(columns))
+    if column_filter is not None:
+        data = data[data[column_filter].isin(values)]
+    return data[columns]
+
+
+def la_lookup_table(
+    data: pd.DataFrame, indices: List[str], las: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """LA rows/columns for the transform_lookup of an LA choropleth.
+
+    Args:
+        data (pd.DataFrame): LA IoD data.
+        indices (List[str]): IoD decile columns shown on the map/tooltip.
+        las (List[str], optional): LA names to keep. Defaults to all LAs.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe.
+    """
+    return select_rows_and_columns(
+        data,
+        ["lad19cd", "lad19nm", "region_name"] + indices,
+        "lad19nm" if las is not None else None,
+        las,
+    )
+
+
+def lsoa_lookup_table(
+    data: pd.DataFrame,
+    indices: List[str],
+    column_filter: str,
+    values: List[str],
+) -> pd.DataFrame:
+    """LSOA rows/columns for the transform_lookup of an LSOA choropleth.
+
+    Args:
+        data (pd.DataFrame): LSOA IoD data.
+        indices (List[str]): IoD decile columns shown on the map/tooltip.
+        column_filter (str): Column to filter the rows on, e.g. "region_name" or "lad19nm".
+        values (List[str]): Values of column_filter to keep.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe.
+    """
+    return select_rows_and_columns(
+        data,
+        ["lsoa11cd", "lsoa11nm", "lad19cd", "lad19nm"] + indices,
+        column_filter,
+        values,
+    )
+
+
+def la_melt_table(la_melt: pd.DataFrame, las: List[str]) -> pd.DataFrame:
+    """Long format LA rows/columns for the decile bar charts.
+
+    Args:
+        la_melt (pd.DataFrame): Long format LA IoD data (lad19nm, iod_name, decile).
+        las (List[str]): LA names to keep.
+
+    Returns:
+        pd.DataFrame: Pandas dataframe.
+    """
+    return select_rows_and_columns(la_melt, ["lad19nm", "iod_name", "decile"], "lad19nm", las)
@@ -0,0 +1,177 @@
+from bisect import bisect_left, bisect_right, insort
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.utils_aggregation import LSOA_TABLES
+from utils.utils_lsoa_index import get_lsoa_index
+
+N_DECILES = 10
+# Batches editing more than this share of the LSOAs are applied with one re-sort, which is
+# quicker than that many single moves (about 2,000 edits for the English LSOAs).
+RESORT_FRACTION = 1 / 16
+
+
+def decile_cuts(n: int) -> List[int]:
+    """Returning the first position (0-based, most deprived first) of deciles 2 to 10 when
+    n areas are ranked, as in the published IoD deciles: decile k holds the ranks up to k * n / 10.
+
+    Args:
+        n (int): Number of ranked areas.
+
+    Returns:
+        List[int]: The nine cut positions.
+    """
+    return [k * n // N_DECILES for k in range(1, N_DECILES)]
+
+
+class DecileRanking:
+    """Ranking of the LSOAs on one index that keeps their deciles up to date as ranks are edited,
+    for what-if scenarios. The LSOAs are held in a list sorted on (rank, lsoa11cd), so an edit is a
+    binary search, a removal and an insertion rather than a re-sort of every LSOA. Only the LSOAs
+    that sit on a decile cut between an edited LSOA's old and new position change decile, so at
+    most nine other LSOAs are affected per edit. A lower rank is more deprived.
+
+    Args:
+        lsoa_codes (Iterable[str]): LSOA codes.
+        ranks (Iterable[float]): Rank (or score to rank on) of each LSOA.
+    """
+
+    def __init__(self, lsoa_codes: Iterable[str], ranks: Iterable[float]):
+        self.ranks: Dict[str, float] = dict(zip(lsoa_codes, ranks))
+        self.order: List[Tuple[float, str]] = sorted(
+            (rank, code) for code, rank in self.ranks.items()
+        )
+        self.cuts = decile_cuts(len(self.order))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def copy(self) -> "DecileRanking":
+        ranking = DecileRanking.__new__(DecileRanking)
+        ranking.ranks = dict(self.ranks)
+        ranking.order = list(self.order)
+        ranking.cuts = self.cuts
+        return ranking
+
+    def position_decile(self, position: int) -> int:
+        return bisect_right(self.cuts, position) + 1
+
+    def position(self, lsoa_code: str) -> int:
+        return bisect_left(self.order, (self.ranks[lsoa_code], lsoa_code))
+
+    def decile(self, lsoa_code: str) -> int:
+        """Returning the current decile of an LSOA.
+
+        Args:
+            lsoa_code (str): The LSOA code.
+
+        Returns:
+            int: Its decile, from 1 (most deprived) to 10.
+        """
+        return self.position_decile(self.position(lsoa_code))
+
+    def deciles(self) -> pd.Series:
+        """Returning the current decile of every LSOA.
+
+        Returns:
+            pd.Series: uint8 deciles, indexed on lsoa11cd in rank order.
+        """
+        positions = np.arange(len(self.order))
+        return pd.Series(
+            (np.searchsorted(self.cuts, positions, side="right") + 1).astype(np.uint8),
+            index=pd.Index([code for _, code in self.order], name="lsoa11cd"),
+        )
+
+    def _move(self, lsoa_code: str, rank: float, old_deciles: Dict[str, int]) -> None:
+        old_position = self.position(lsoa_code)
+        old_deciles.setdefault(lsoa_code, self.position_decile(old_position))
+        del self.order[old_position]
+        self.ranks[lsoa_code] = rank
+        insort(self.order, (rank, lsoa_code))
+        new_position = self.position(lsoa_code)
+        # The LSOAs in between shift one place towards the old position; those that shift
+        # across a cut are the ones at the cut (moving down) or just before it (moving up).
+        if new_position > old_position:
+            first = bisect_left(self.cuts, old_position + 1)
+            last = bisect_right(self.cuts, new_position)
+            shifted = [cut - 1 for cut in self.cuts[first:last]]
+            before = range(first + 2, last + 2)
+        else:
+            first = bisect_left(self.cuts, new_position + 1)
+            last = bisect_right(self.cuts, old_position)
+            shifted = self.cuts[first:last]
+            before = range(first + 1, last + 1)
+        for position, decile in zip(shifted, before):
+            old_deciles.setdefault(self.order[position][1], decile)
+
+    def _resort(self, ranks: Mapping[str, float]) -> Dict[str, int]:
+        before = self.deciles()
+        self.ranks.update(ranks)
+        self.order = sorted((rank, code) for code, rank in self.ranks.items())
+        after = self.deciles().reindex(before.index)
+        changed = after[after != before]
+        return dict(zip(changed.index, changed.astype(int)))
+
+    def update(self, ranks: Mapping[str, float]) -> Dict[str, int]:
+        """Setting new ranks for some LSOAs and recomputing the deciles they touch,
+        in O(k log n) comparisons for k edits (or with one re-sort for large batches).
+
+        Args:
+            ranks (Mapping[str, float]): New rank of each edited LSOA, keyed by lsoa11cd.
+
+        Returns:
+            Dict[str, int]: New decile of every LSOA whose decile changed (edited or not).
+        """
+        if len(ranks) > RESORT_FRACTION * len(self):
+            return self._resort(ranks)
+        old_deciles: Dict[str, int] = {}
+        for lsoa_code, rank in ranks.items():
+            if rank != self.ranks[lsoa_code]:
+                self._move(lsoa_code, rank, old_deciles)
+        new_deciles = {code: self.decile(code) for code in old_deciles}
+        return {
+            code: decile
+            for code, decile in new_deciles.items()
+            if decile != old_deciles[code]
+        }
+
+
+def affected_la_codes(lsoa_codes: Iterable[str]) -> Set[str]:
+    """Returning the LAs of some LSOAs, e.g. those whose decile DecileRanking.update changed,
+    to know which LAs' LSOA charts need building again.
+
+    Args:
+        lsoa_codes (Iterable[str]): LSOA codes.
+
+    Returns:
+        Set[str]: Their LA codes.
+    """
+    lsoa_index = get_lsoa_index()
+    return set(lsoa_index.lad19cd.reindex(list(lsoa_codes)).dropna().astype(str))
+
+
+@lru_cache(maxsize=32)
+def _baseline_ranking(dataset: str, index: str) -> DecileRanking:
+    get_data, _ = LSOA_TABLES[dataset]
+    data = get_data(columns=["lsoa11cd", index]).sort_values(
+        [index, "lsoa11cd"], kind="stable"
+    )
+    return DecileRanking(data.lsoa11cd, np.arange(1, len(data) + 1))
+
+
+def get_decile_ranking(index: str, dataset: str = "english") -> DecileRanking:
+    """Returning a ranking of the English or Welsh LSOAs on an index to run a what-if scenario
+    on. The data only has the deciles, so the LSOAs are ranked by decile and then by LSOA code,
+    which reproduces the published deciles; update() then takes ranks on the same 1 to n scale.
+
+    Args:
+        index (str): Decile column, e.g. "a_index_of_multiple_deprivation_imd".
+        dataset (str, optional): "english" or "welsh". Defaults to "english".
+
+    Returns:
+        DecileRanking: A fresh copy, which can be updated without touching other scenarios.
+    """
+    return _baseline_ranking(dataset, index).copy()
@@ -0,0 +1,210 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+
+from getters.english_lsoa_iod_data_2019 import get_english_lsoa_iod_2019
+from getters.lsoa_la_tiles_2011 import get_shapefiles_dir
+from getters.welsh_lsoa_iod_data_2019 import get_welsh_lsoa_iod_2019
+from utils.utils_iod_values import iod_indices, wiod_indices
+from utils.utils_lsoa_index import get_lsoa_index
+from utils.utils_timing import timed
+
+# The full resolution area geometries are stored as WKB in shapefiles/spatial_index by
+# pipeline/build_spatial_index.py, one file per layer (with the code column each layer is keyed on).
+SPATIAL_INDEX_DIR_NAME = "spatial_index"
+LAYERS = {"lsoa": "lsoa11cd", "la": "lad19cd"}
+LSOA_LOOKUP_COLUMNS = ["lad19cd", "lad19nm", "region_name"]
+
+
+def get_spatial_index_path(layer: str) -> Path:
+    """Returning where the geometries of a layer are stored.
+
+    Args:
+        layer (str): "lsoa" (LSOA 2011) or "la" (LA 2019).
+
+    Returns:
+        Path: Path to the Parquet file (which may not have been built yet).
+    """
+    return get_shapefiles_dir() / SPATIAL_INDEX_DIR_NAME / f"{layer}.parquet"
+
+
+def write_area_geometries(
+    path: Path, codes: np.ndarray, geometries: np.ndarray, crs: Optional[str]
+) -> None:
+    """Storing area codes and geometries, as WKB, with the coordinate reference system in the metadata.
+
+    Args:
+        path (Path): Parquet file to write.
+        codes (np.ndarray): Area codes.
+        geometries (np.ndarray): shapely geometries.
+        crs (str, optional): CRS of the coordinates, e.g. "EPSG:27700".
+    """
+    table = pa.table(
+        {
+            "code": pa.array(codes, pa.string()),
+            "wkb": pa.array(shapely.to_wkb(geometries), pa.binary()),
+        },
+        metadata={"crs": crs or ""},
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(path)
+
+
+class AreaIndex:
+    """STRtree over the polygons of one layer of areas, for bulk point-in-area lookups.
+
+    Only the codes and geometries are persisted (write_area_geometries); the tree itself is
+    rebuilt whenever an index is created or read, as shapely can't store it. Building it is
+    cheap next to parsing the WKB (about 10 ms for 35,000 polygons), so get_area_index reads
+    each layer once per process.
+
+    Args:
+        codes (np.ndarray): Area codes.
+        geometries (np.ndarray): shapely polygons of the areas.
+        crs (str, optional): CRS of the coordinates.
+    """
+
+    def __init__(self, codes: np.ndarray, geometries: np.ndarray, crs: Optional[str] = None):
+        self.codes = codes
+        self.geometries = geometries
+        self.crs = crs
+        self.tree = shapely.STRtree(geometries)
+
+    @classmethod
+    def read(cls, path: Path) -> "AreaIndex":
+        """Loading an index from a file written by write_area_geometries."""
+        table = pq.read_table(path)
+        crs = (table.schema.metadata or {}).get(b"crs", b"").decode() or None
+        geometries = shapely.from_wkb(table.column("wkb").to_numpy(zero_copy_only=False))
+        codes = table.column("code").to_numpy(zero_copy_only=False).astype(object)
+        return cls(codes, geometries, crs)
+
+    def to_index_crs(self, x: np.ndarray, y: np.ndarray, crs: Optional[str]):
+        """Reprojecting points into the index's CRS, e.g. from "EPSG:4326" longitude/latitude."""
+        if not crs or not self.crs or crs == self.crs:
+            return x, y
+        from pyproj import Transformer
+
+        return Transformer.from_crs(crs, self.crs, always_xy=True).transform(x, y)
+
+    def locate(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        crs: Optional[str] = None,
+        nearest: bool = True,
+        max_distance: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """Finding the area each point falls in; points outside every area (e.g. on the coast,
+        where the boundaries are clipped to the shoreline) take the nearest area instead.
+
+        Args:
+            x (np.ndarray): x coordinates (or longitudes).
+            y (np.ndarray): y coordinates (or latitudes).
+            crs (str, optional): CRS of the points, if not that of the index.
+            nearest (bool, optional): Fall back to the nearest area. Defaults to True.
+            max_distance (float, optional): Only fall back to areas this close, in the units of the index.
+
+        Returns:
+            pd.DataFrame: position (row of the area in the index, -1 if none was found),
+                code and distance (0 inside the area, NaN if none was found) of each point.
+        """
+        x, y = self.to_index_crs(np.asarray(x, np.float64), np.asarray(y, np.float64), crs)
+        points = shapely.points(x, y)
+        position = np.full(len(points), -1, dtype=np.int64)
+        distance = np.full(len(points), np.nan)
+
+        point_idx, area_idx = self.tree.query(points, predicate="intersects")
+        # A point on a shared border is in both areas; the first match is kept.
+        point_idx, first = np.unique(point_idx, return_index=True)
+        position[point_idx] = area_idx[first]
+        distance[point_idx] = 0.0
+
+        missing = np.flatnonzero(position < 0)
+        if nearest and len(missing):
+            (point_idx, area_idx), distances = self.tree.query_nearest(
+                points[missing], max_distance=max_distance, return_distance=True, all_matches=False
+            )
+            position[missing[point_idx]] = area_idx
+            distance[missing[point_idx]] = distances
+
+        codes = np.where(position >= 0, self.codes[position], None)
+        return pd.DataFrame({"position": position, "code": codes, "distance": distance})
+
+
+@lru_cache(maxsize=len(LAYERS))
+def get_area_index(layer: str = "lsoa") -> AreaIndex:
+    """Loading the spatial index of the LSOA (2011) or LA (2019) boundaries built by
+    pipeline/build_spatial_index.py, once per process.
+
+    Args:
+        layer (str, optional): "lsoa" or "la". Defaults to "lsoa".
+
+    Returns:
+        AreaIndex: The index.
+    """
+    path = get_spatial_index_path(layer)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No spatial index at {path}; build it with pipeline/build_spatial_index.py"
+        )
+    return AreaIndex.read(path)
+
+
+@lru_cache(maxsize=1)
+def _lsoa_attributes() -> pd.DataFrame:
+    """LA, region and English/Welsh deciles of each LSOA, in the order of the LSOA spatial index,
+    and an empty last row for points without an LSOA."""
+    codes = get_area_index("lsoa").codes
+    english = get_english_lsoa_iod_2019(columns=["lsoa11cd"] + iod_indices).set_index("lsoa11cd")
+    welsh = get_welsh_lsoa_iod_2019(columns=["lsoa11cd"] + wiod_indices).set_index("lsoa11cd")
+    deciles = pd.concat([english, welsh]).astype("UInt8")
+    return (
+        get_lsoa_index()[LSOA_LOOKUP_COLUMNS]
+        .join(deciles)
+        .reindex(codes)
+        .reset_index(drop=True)
+        .reindex(np.arange(len(codes) + 1))
+    )
+
+
+@timed("geocode")
+def lookup_lsoa_deciles(
+    x: np.ndarray,
+    y: np.ndarray,
+    crs: Optional[str] = None,
+    nearest: bool = True,
+    max_distance: Optional[float] = None,
+) -> pd.DataFrame:
+    """Geocoding points (e.g. postcode centroids) to their LSOA and its IoD deciles.
+
+    Args:
+        x (np.ndarray): x coordinates (or longitudes).
+        y (np.ndarray): y coordinates (or latitudes).
+        crs (str, optional): CRS of the points, e.g. "EPSG:4326", if not that of the boundaries.
+        nearest (bool, optional): Take the nearest LSOA for points outside every LSOA. Defaults to True.
+        max_distance (float, optional): Only take LSOAs this close, in the units of the boundaries.
+
+    Returns:
+        pd.DataFrame: One row per point, with lsoa11cd, distance (0 inside the LSOA), lad19cd,
+            lad19nm, region_name and the English or Welsh deciles; missing where no LSOA was found.
+    """
+    located = get_area_index("lsoa").locate(x, y, crs, nearest, max_distance)
+    attributes = _lsoa_attributes()
+    position = located.position.to_numpy()
+    matched = attributes.take(np.where(position >= 0, position, len(attributes) - 1))
+    return pd.concat(
+        [
+            located[["code", "distance"]].rename(columns={"code": "lsoa11cd"}),
+            matched.reset_index(drop=True),
+        ],
+        axis=1,
+    )
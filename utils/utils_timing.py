@@ -0,0 +1,136 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Set IOD_TIMING=1 to time the getters, data preparation and chart builds. When it isn't set,
+# timed() hands back the function unchanged and timer() an empty context manager.
+TIMING_ENABLED = os.environ.get("IOD_TIMING", "").lower() in ("1", "true", "yes")
+# Set IOD_TIMING_PROM_FILE to also write the totals in the Prometheus text format after
+# every page, e.g. into a node_exporter textfile collector folder.
+PROM_FILE = os.environ.get("IOD_TIMING_PROM_FILE")
+
+# Where the timings go is up to the logging config (e.g. config/logging.yaml, read by the
+# package's __init__.py); no handler is attached here.
+logger = logging.getLogger("geographical_iod_analysis.timing")
+if TIMING_ENABLED:
+    logger.setLevel(logging.INFO)
+
+_NULL_TIMER = nullcontext()
+_totals: Dict[str, Tuple[int, float]] = {}
+_totals_lock = threading.Lock()
+
+
+def record_timing(stage: str, seconds: float, **fields: Any) -> None:
+    """Logging one timing as a JSON line and adding it to the totals of its stage.
+
+    Args:
+        stage (str): Name of the stage, e.g. "chart.lsoa_chart".
+        seconds (float): Time the stage took.
+        **fields: Extra context to log, e.g. page="Welsh LSOA Breakdown".
+    """
+    with _totals_lock:
+        count, total = _totals.get(stage, (0, 0.0))
+        _totals[stage] = (count + 1, total + seconds)
+    logger.info(json.dumps({"stage": stage, "seconds": round(seconds, 6), **fields}, default=str))
+
+
+@contextmanager
+def _timer(stage: str, **fields: Any) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, time.perf_counter() - start, **fields)
+
+
+def timer(stage: str, **fields: Any):
+    """Context manager timing the block it wraps, e.g. with timer("page", page=choose):
+
+    Args:
+        stage (str): Name of the stage.
+        **fields: Extra context to log with the timing.
+
+    Returns:
+        The context manager (one that does nothing if timing is off).
+    """
+    if not TIMING_ENABLED:
+        return _NULL_TIMER
+    return _timer(stage, **fields)
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """Decorator timing every call of a function as the stage "<stage>.<function name>".
+    Put it under lru_cache, so only the calls that do the work are timed.
+
+    Args:
+        stage (str): Stage prefix, e.g. "getter".
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator (which returns the function
+            unchanged if timing is off).
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if not TIMING_ENABLED:
+            return function
+        name = f"{stage}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record_timing(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def get_timing_totals() -> Dict[str, Tuple[int, float]]:
+    """Returning the number of calls and total seconds of each stage so far.
+
+    Returns:
+        Dict[str, Tuple[int, float]]: (count, seconds), keyed by stage.
+    """
+    with _totals_lock:
+        return dict(_totals)
+
+
+def prometheus_text() -> str:
+    """Formatting the totals as a Prometheus summary, in the text exposition format.
+
+    Returns:
+        str: One _count and _sum sample per stage.
+    """
+    lines = [
+        "# HELP iod_stage_seconds Time spent in each stage of the IoD app.",
+        "# TYPE iod_stage_seconds summary",
+    ]
+    for stage, (count, seconds) in sorted(get_timing_totals().items()):
+        lines.append(f'iod_stage_seconds_count{{stage="{stage}"}} {count}')
+        lines.append(f'iod_stage_seconds_sum{{stage="{stage}"}} {seconds:.6f}')
+    return "\n".join(lines) + "\n"
+
+
+def dump_prometheus(path: Optional[str] = None) -> None:
+    """Writing prometheus_text() to a file, replacing it in one step so a scraper never
+    reads half a file. Does nothing if timing is off (IOD_TIMING), or if no path is given
+    and IOD_TIMING_PROM_FILE isn't set.
+
+    Args:
+        path (str, optional): File to write. Defaults to IOD_TIMING_PROM_FILE.
+    """
+    path = path or PROM_FILE
+    if not TIMING_ENABLED or not path:
+        return
+    tmp_path = Path(f"{path}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(prometheus_text())
+    tmp_path.replace(path)